@@ -9,7 +9,8 @@ from petsc4py import PETSc
 
 from fipy.tools import numerix
 from fipy.matrices.sparseMatrix import (_SparseMatrix, _RowMesh2Matrix,
-                                        _ColMesh2Matrix, _RowColMesh2Matrix)
+                                        _ColMesh2Matrix, _RowColMesh2Matrix,
+                                        _DeferredMeshMatrix)
 
 class _PETScMatrix(_SparseMatrix):
 
@@ -783,7 +784,7 @@ class _PETScColMeshMatrix(_PETScBaseMeshMatrix):
                                                   sizeHint=sizeHint,
                                                   matrix=matrix)
 
-class _PETScMeshMatrix(_PETScRowMeshMatrix):
+class _PETScMeshMatrix(_DeferredMeshMatrix, _PETScRowMeshMatrix):
     def __init__(self, mesh, numberOfVariables=1, numberOfEquations=1,
                  bandwidth=0, sizeHint=None, matrix=None):
         """Creates a `_PETScBaseMeshMatrix` associated with equations and variables.
@@ -817,6 +818,9 @@ class _PETScMeshMatrix(_PETScRowMeshMatrix):
                                                matrix=matrix,
                                                m2m=m2m)
 
+        self._deferAssembly(matrix=matrix,
+                            sizeHint=sizeHint or bandwidth * numberOfEquations * mesh.numberOfCells)
+
     def __mul__(self, other):
         """Multiply a sparse matrix by another sparse matrix
 
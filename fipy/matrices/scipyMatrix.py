@@ -4,10 +4,89 @@ __docformat__ = 'restructuredtext'
 
 __all__ = []
 
+import itertools
+
 import scipy.sparse as sp
+from scipy.sparse.linalg import LinearOperator
 from fipy.tools import numerix
 
-from fipy.matrices.sparseMatrix import _SparseMatrix
+from fipy.matrices.sparseMatrix import _SparseMatrix, _DeferredMeshMatrix
+from fipy.matrices import threadedAssembly
+
+def _signature(ids):
+    """Cheap, inexact description of an index vector
+
+    Used to look up a `_ScipyScatterPattern`, which then confirms that
+    the indices really match.
+    """
+    ids = numerix.asarray(ids)
+    sample = ids.ravel()[::max(1, ids.size // 32)]
+    return (ids.dtype.str, ids.shape, sample.tobytes())
+
+class _ScipyScatterPattern(object):
+    """Symbolic part of adding COO triplets to a CSR matrix
+
+    Holds the CSR structure that results from merging the structure of an
+    existing matrix with a set of (`id1`, `id2`) triplets, along with the
+    positions in the merged `data` array that each existing entry and
+    each new triplet scatter to.  Once computed, only the numeric scatter
+    needs to be repeated when the same triplets are added again.
+    """
+
+    _tokens = itertools.count()
+
+    def __init__(self, matrix, id1, id2):
+        rows, cols = matrix.shape
+
+        self.id1 = numerix.array(id1)
+        self.id2 = numerix.array(id2)
+
+        oldRows = numerix.repeat(numerix.arange(rows), numerix.diff(matrix.indptr))
+        oldKeys = oldRows.astype('int64') * cols + matrix.indices
+        newKeys = self.id1.astype('int64') * cols + self.id2
+
+        keys, inverse = numerix.unique(numerix.concatenate((oldKeys, newKeys)),
+                                       return_inverse=True)
+        inverse = inverse.ravel()
+
+        # identifies the merged structure for subsequent lookups
+        self.token = next(self._tokens)
+        self.nnz = len(keys)
+        self.indices = (keys % cols).astype(matrix.indices.dtype)
+        self.indptr = numerix.concatenate(([0],
+                                           numerix.cumsum(numerix.bincount(keys // cols,
+                                                                           minlength=rows))))
+        self.indptr = self.indptr.astype(matrix.indptr.dtype)
+        self.positions = inverse
+        self.oldPositions = inverse[:len(oldKeys)]
+        self.newPositions = inverse[len(oldKeys):]
+
+        # existing entries already in canonical order, with nothing
+        # new to insert, can be accumulated into `data` directly
+        self.inPlace = (self.nnz == len(oldKeys)
+                        and numerix.array_equal(self.oldPositions,
+                                                numerix.arange(self.nnz)))
+
+    def matches(self, id1, id2):
+        return (numerix.array_equal(self.id1, id1)
+                and numerix.array_equal(self.id2, id2))
+
+    def partition(self, new):
+        """The new (or all) positions, split among the assembly threads
+
+        Only computed the first time it's needed.
+        """
+        if not hasattr(self, "_partitions"):
+            self._partitions = {}
+        if new not in self._partitions:
+            if new:
+                positions = self.newPositions
+            else:
+                positions = self.positions
+            self._partitions[new] = threadedAssembly._ScatterPartition(positions,
+                                                                       nnz=self.nnz,
+                                                                       chunks=threadedAssembly._threads)
+        return self._partitions[new]
 
 class _ScipyMatrix(_SparseMatrix):
 
@@ -16,8 +95,17 @@ class _ScipyMatrix(_SparseMatrix):
     `_ScipyMatrix` is always `NxN`.
     Allows basic python operations __add__, __sub__ etc.
     Facilitate matrix populating in an easy way.
+
+    Values are accumulated in place only into a matrix that the
+    `_ScipyMatrix` built itself.  A matrix that was passed in, and may be
+    shared, is copied the first time it would change.
     """
 
+    _maxScatterPatterns = 64
+
+    # the `data` of `self.matrix`, if nothing else can refer to it
+    _ownedData = None
+
     def __init__(self, matrix):
         """Creates a `_ScipyMatrix`.
 
@@ -31,7 +119,9 @@ class _ScipyMatrix(_SparseMatrix):
         super(_ScipyMatrix, self).__init__()
 
     def copy(self):
-        return _ScipyMatrix(matrix=self.matrix.copy())
+        copy = _ScipyMatrix(matrix=self.matrix.copy())
+        copy._ownedData = copy.matrix.data
+        return copy
 
     def __getitem__(self, index):
         m = self.matrix[index]
@@ -54,6 +144,7 @@ class _ScipyMatrix(_SparseMatrix):
                                           self.matrix.shape)
         else:
             self.matrix = self.matrix + (sign * other)
+        self._ownedData = self.matrix.data
 
         return self
 
@@ -189,11 +280,10 @@ class _ScipyMatrix(_SparseMatrix):
         """
         assert len(id1) == len(id2) == len(vector)
 
-        # done in such a way to vectorize everything
-        tempVec = numerix.array(vector) - self.matrix[id1, id2].flat
-        tempMat = sp.csr_matrix((tempVec, (id1, id2)), self.matrix.shape)
-
-        self.matrix = self.matrix + tempMat
+        pattern = self._getScatterPattern(id1, id2)
+        data = self._scatterExisting(pattern)
+        data[pattern.newPositions] = vector
+        self._setScatteredMatrix(pattern, data)
 
     def putDiagonal(self, vector):
         """
@@ -222,7 +312,7 @@ class _ScipyMatrix(_SparseMatrix):
     def takeDiagonal(self):
         return self.matrix.diagonal()
 
-    def addAt(self, vector, id1, id2):
+    def addAt(self, vector, id1, id2, overlapping=False):
         """Add elements of `vector` to the positions in the matrix corresponding to (`id1`,`id2`)
 
         Parameters
@@ -246,12 +336,110 @@ class _ScipyMatrix(_SparseMatrix):
             12.300000  10.000000   3.000000  
                 ---     3.141593   2.960000  
              2.500000      ---     2.200000  
+
+        A matrix that another `_ScipyMatrix` wraps is left alone
+
+            >>> M = _ScipyMatrix(matrix=L.matrix)
+            >>> M.addAt([5.], [0], [0])
+            >>> print(M[0, 0], L[0, 0])
+            17.3 12.3
         """
         assert len(id1) == len(id2) == len(vector)
 
-        temp = sp.csr_matrix((vector, (id1, id2)), self.matrix.shape)
+        pattern = self._getScatterPattern(id1, id2)
+        vector = numerix.asarray(vector, dtype=float).ravel()
+        if pattern.inPlace:
+            if self.matrix.data is not self._ownedData:
+                # some other `_ScipyMatrix` may share `self.matrix`
+                key = self._structureKey
+                self.matrix = self.matrix.copy()
+                self._structure = (key, self.matrix.indptr, self.matrix.indices)
+                self._ownedData = self.matrix.data
+            if threadedAssembly._isWorthwhile(len(vector)):
+                # the threads write to disjoint parts of `data`
+                threadedAssembly._scatterAdd(self.matrix.data, vector,
+                                             pattern.partition(new=True))
+            else:
+                self.matrix.data += numerix.bincount(pattern.newPositions,
+                                                     weights=vector,
+                                                     minlength=pattern.nnz)
+        else:
+            weights = numerix.concatenate((self.matrix.data, vector))
+            if threadedAssembly._isWorthwhile(len(weights)):
+                data = numerix.zeros(pattern.nnz, dtype='d')
+                threadedAssembly._scatterAdd(data, weights,
+                                             pattern.partition(new=False))
+            else:
+                data = numerix.bincount(pattern.positions,
+                                        weights=weights,
+                                        minlength=pattern.nnz)
+            # `bincount` of nothing is integer, even with `weights`
+            self._setScatteredMatrix(pattern, data.astype('d', copy=False))
+
+    @property
+    def _scatterPatterns(self):
+        """Store of `_ScipyScatterPattern` objects
+
+        A bare matrix has nowhere durable to keep its patterns, so they
+        only live as long as the matrix.
+        """
+        if not hasattr(self, "_localScatterPatterns"):
+            self._localScatterPatterns = {}
+        return self._localScatterPatterns
+
+    @property
+    def _structureKey(self):
+        """Identifies the current sparsity structure of `self.matrix`
+
+        Remembered for as long as `self.matrix` keeps the same index arrays,
+        which is the case when values are accumulated in place.  A
+        structure of unknown origin is described by its contents.
+        """
+        matrix = self.matrix
+        cached = getattr(self, "_structure", None)
+        if (cached is None
+            or cached[1] is not matrix.indptr
+            or cached[2] is not matrix.indices):
+            if matrix.nnz == 0:
+                key = "empty"
+            else:
+                key = (matrix.indptr.tobytes(), matrix.indices.tobytes())
+            cached = (key, matrix.indptr, matrix.indices)
+            self._structure = cached
+        return cached[0]
+
+    def _getScatterPattern(self, id1, id2):
+        """Obtain the (possibly cached) pattern for adding at (`id1`, `id2`)
+        """
+        key = (self.matrix.shape, self._structureKey,
+               _signature(id1), _signature(id2))
+
+        patterns = self._scatterPatterns
+        pattern = patterns.get(key)
+        if pattern is None or not pattern.matches(id1, id2):
+            if len(patterns) >= self._maxScatterPatterns:
+                patterns.clear()
+            pattern = _ScipyScatterPattern(matrix=self.matrix, id1=id1, id2=id2)
+            patterns[key] = pattern
 
-        self.matrix = self.matrix + temp
+        return pattern
+
+    def _scatterExisting(self, pattern):
+        """Existing values of `self.matrix` laid out in the merged structure
+        """
+        # `bincount` of nothing is integer, even with `weights`
+        return numerix.bincount(pattern.oldPositions,
+                                weights=self.matrix.data,
+                                minlength=pattern.nnz).astype('d', copy=False)
+
+    def _setScatteredMatrix(self, pattern, data):
+        self.matrix = sp.csr_matrix((data,
+                                     pattern.indices.copy(),
+                                     pattern.indptr.copy()),
+                                    shape=self.matrix.shape)
+        self.matrix.has_sorted_indices = True
+        self._structure = (pattern.token, self.matrix.indptr, self.matrix.indices)
+        self._ownedData = self.matrix.data
 
     def addAtDiagonal(self, vector):
         if isinstance(vector, (int, float)):
@@ -395,6 +583,7 @@ class _ScipyMatrixFromShape(_ScipyMatrix):
         """
         if matrix is None:
             matrix = sp.csr_matrix((rows, cols))
+            self._ownedData = matrix.data
 
         super(_ScipyMatrixFromShape, self).__init__(matrix=matrix)
 
@@ -429,6 +618,18 @@ class _ScipyBaseMeshMatrix(_ScipyMatrixFromShape):
                                                    matrix=matrix,
                                                    storeZeros=storeZeros)
 
+    @property
+    def _scatterPatterns(self):
+        """Store of `_ScipyScatterPattern` objects, shared by all matrices of the `Mesh`
+
+        Terms build a fresh matrix on every sweep, but with the same
+        sequence of index vectors, so the patterns are kept with the mesh
+        that determines them.
+        """
+        if not hasattr(self.mesh, "_scipyScatterPatterns"):
+            self.mesh._scipyScatterPatterns = {}
+        return self.mesh._scipyScatterPatterns
+
     def _getGhostedValues(self, var):
         """Obtain current ghost values from across processes
 
@@ -507,7 +708,7 @@ class _ScipyColMeshMatrix(_ScipyBaseMeshMatrix):
                                                   matrix=matrix,
                                                   storeZeros=storeZeros)
 
-class _ScipyMeshMatrix(_ScipyRowMeshMatrix):
+class _ScipyMeshMatrix(_DeferredMeshMatrix, _ScipyRowMeshMatrix):
     def __init__(self, mesh, numberOfVariables=1, numberOfEquations=1,
                  bandwidth=0, sizeHint=None, matrix=None, storeZeros=True):
         """Creates a `_ScipyBaseMeshMatrix` associated with equations and variables.
@@ -541,6 +742,9 @@ class _ScipyMeshMatrix(_ScipyRowMeshMatrix):
                                                numberOfEquations=numberOfEquations,
                                                storeZeros=storeZeros)
 
+        self._deferAssembly(matrix=matrix,
+                            sizeHint=sizeHint or bandwidth * numberOfEquations * mesh.numberOfCells)
+
     def __mul__(self, other):
         if isinstance(other, _ScipyMeshMatrix):
             return _ScipyMeshMatrix(mesh=self.mesh,
@@ -586,6 +790,55 @@ class _ScipyMeshMatrix(_ScipyRowMeshMatrix):
         >>> print(numerix.allequal(numerix.array(m.matrix[nonZeroIdx]), numerix.array([1.0, 2.0])))
         True
 
+        Matrices built with the same sequence of indices on the same mesh
+        share their sparsity patterns
+
+        >>> from fipy import Grid1D
+        >>> mesh = Grid1D(nx=3)
+        >>> for sweep in range(2):
+        ...     m = _ScipyRowMeshMatrix(mesh=mesh, cols=3)
+        ...     m.addAt((1., 2., 3.), (0, 1, 2), (1, 2, 0))
+        ...     m.addAt((4., 5.), (0, 1), (1, 1))
+        >>> print(len(mesh._scipyScatterPatterns))
+        2
+        >>> print(m)
+            ---     5.000000      ---    
+            ---     5.000000   2.000000  
+         3.000000      ---        ---    
+
+        and values are accumulated in place when the indices are already
+        part of the structure
+
+        >>> data = m.matrix.data
+        >>> m.addAt((4., 5.), (0, 1), (1, 1))
+        >>> print(m.matrix.data is data)
+        True
+        >>> print(m)
+            ---     9.000000      ---    
+            ---    10.000000   2.000000  
+         3.000000      ---        ---    
+
+        With deferred assembly, contributions are only gathered as triplets
+        until the matrix is needed
+
+        >>> m = _ScipyMeshMatrix(mesh=mesh)
+        >>> m._deferredAssembly = True
+        >>> m._deferAssembly()
+        >>> m.addAt((1., 2., 3.), (0, 1, 2), (1, 2, 0))
+        >>> other = _ScipyMeshMatrix(mesh=mesh)
+        >>> other._deferredAssembly = True
+        >>> other._deferAssembly()
+        >>> other.addAt((4., 5.), (0, 1), (1, 1))
+        >>> m += other
+        >>> print(len(m._pendingTriplets[False]))
+        5
+        >>> print(m)
+            ---     5.000000      ---    
+            ---     5.000000   2.000000  
+         3.000000      ---        ---    
+        >>> print(m._pendingTriplets)
+        {}
+
         """
         pass
 
@@ -621,6 +874,279 @@ class _ScipyIdentityMeshMatrix(_ScipyIdentityMatrix):
         """
         _ScipyIdentityMatrix.__init__(self, size=mesh.numberOfCells)
 
+class _ScipyMatrixFreeOperator(LinearOperator):
+    """`LinearOperator` that applies a `_ScipyMatrixFreeMeshMatrix`
+    """
+
+    def __init__(self, matrix):
+        self._meshMatrix = matrix
+        super(_ScipyMatrixFreeOperator, self).__init__(dtype=numerix.dtype('d'),
+                                                       shape=matrix._shape)
+
+    def _matvec(self, x):
+        return self._meshMatrix.matvec(x)
+
+    def _rmatvec(self, x):
+        return self._meshMatrix.rmatvec(x)
+
+    def diagonal(self):
+        return self._meshMatrix.takeDiagonal()
+
+class _ScipyMatrixFreeMeshMatrix(_SparseMatrix):
+    """Mesh matrix that is applied without ever being assembled
+
+    The values and indices passed to each `addAt()` are kept as given, so
+    face contributions share the connectivity vectors that the terms cache
+    on the mesh, and only the face coefficients take up new memory.
+    Contributions to the diagonal are summed into a dense vector.  The
+    `matrix` is a :class:`~scipy.sparse.linalg.LinearOperator` that the
+    SciPy Krylov solvers use in place of a CSR matrix.
+
+    Only operations that do not need the assembled matrix are supported,
+    so matrix-matrix products, e.g., of higher-order diffusion terms, and
+    preconditioners that factor the matrix are not available.
+    """
+
+    def __init__(self, mesh, numberOfVariables=1, numberOfEquations=1,
+                 bandwidth=0, sizeHint=None, matrix=None, storeZeros=True):
+        """
+        Parameters
+        ----------
+        mesh : ~fipy.meshes.mesh.Mesh
+            The `Mesh` to apply the matrix for.
+        numberOfVariables : int
+            The columns of the matrix are determined by
+            `numberOfVariables * mesh.numberOfCells`.
+        numberOfEquations : int
+            The rows of the matrix are determined by
+            `numberOfEquations * mesh.numberOfCells`.
+        bandwidth : int
+            Ignored.
+        sizeHint : int
+            Ignored.
+        matrix : ~scipy.sparse.csr_matrix
+            Pre-assembled SciPy matrix to start from.
+        storeZeros : bool
+            Ignored.
+        """
+        self.mesh = mesh
+        self.numberOfVariables = numberOfVariables
+        self.numberOfEquations = numberOfEquations
+
+        self._blocks = []
+        self._diagonal = numerix.zeros((min(self._shape),), 'd')
+
+        super(_ScipyMatrixFreeMeshMatrix, self).__init__()
+
+        if matrix is not None:
+            matrix = matrix.tocoo()
+            self.addAt(matrix.data, matrix.row, matrix.col)
+
+    @property
+    def _shape(self):
+        return (self.numberOfEquations * self.mesh.numberOfCells,
+                self.numberOfVariables * self.mesh.numberOfCells)
+
+    @property
+    def matrix(self):
+        return _ScipyMatrixFreeOperator(self)
+
+    def copy(self):
+        other = _ScipyMatrixFreeMeshMatrix(mesh=self.mesh,
+                                           numberOfVariables=self.numberOfVariables,
+                                           numberOfEquations=self.numberOfEquations)
+        other._blocks = list(self._blocks)
+        other._diagonal = self._diagonal.copy()
+
+        return other
+
+    def addAt(self, vector, id1, id2, overlapping=False):
+        # keep the caller's index vectors, rather than views of them
+        id1 = numerix.asarray(id1)
+        id2 = numerix.asarray(id2)
+        if id1.ndim != 1:
+            id1 = id1.ravel()
+        if id2.ndim != 1:
+            id2 = id2.ravel()
+        vector = numerix.asarray(vector, dtype='d').ravel()
+        if vector.shape != id1.shape:
+            vector = numerix.resize(vector, id1.shape)
+
+        if id1 is id2 or numerix.array_equal(id1, id2):
+            self._diagonal += numerix.bincount(id1, weights=vector,
+                                               minlength=len(self._diagonal))
+        else:
+            self._blocks.append((vector, id1, id2))
+
+    def addAtDiagonal(self, vector):
+        if isinstance(vector, (int, float)):
+            vector = numerix.repeat(vector, len(self._diagonal))
+
+        ids = numerix.arange(len(vector))
+        self.addAt(vector, ids, ids)
+
+    def _blockDiagonal(self):
+        diagonal = numerix.zeros(self._diagonal.shape, 'd')
+        for vector, id1, id2 in self._blocks:
+            onDiagonal = (id1 == id2)
+            diagonal += numerix.bincount(id1[onDiagonal], weights=vector[onDiagonal],
+                                         minlength=len(diagonal))
+
+        return diagonal
+
+    def takeDiagonal(self):
+        return self._diagonal + self._blockDiagonal()
+
+    def putDiagonal(self, vector):
+        self._diagonal = numerix.zeros(self._diagonal.shape, 'd')
+        self._diagonal[:] = vector
+        self._diagonal -= self._blockDiagonal()
+
+    def matvec(self, x):
+        """Apply the matrix to `x`, one contribution at a time
+        """
+        x = numerix.asarray(x).ravel()
+        rows, cols = self._shape
+        n = len(self._diagonal)
+
+        y = numerix.zeros((rows,), 'd')
+        y[:n] = self._diagonal * x[:n]
+        for vector, id1, id2 in self._blocks:
+            y += numerix.bincount(id1, weights=vector * x[id2], minlength=rows)
+
+        return y
+
+    def rmatvec(self, x):
+        """Apply the transpose of the matrix to `x`
+        """
+        x = numerix.asarray(x).ravel()
+        rows, cols = self._shape
+        n = len(self._diagonal)
+
+        y = numerix.zeros((cols,), 'd')
+        y[:n] = self._diagonal * x[:n]
+        for vector, id1, id2 in self._blocks:
+            y += numerix.bincount(id2, weights=vector * x[id1], minlength=cols)
+
+        return y
+
+    def __iadd__(self, other):
+        if isinstance(other, _ScipyMatrixFreeMeshMatrix):
+            self._blocks.extend(other._blocks)
+            self._diagonal += other._diagonal
+        elif isinstance(other, _ScipyMatrix):
+            matrix = other.matrix.tocoo()
+            self.addAt(matrix.data, matrix.row, matrix.col)
+        elif not (isinstance(other, (int, float)) and other == 0):
+            raise TypeError("can only add matrices to a matrix-free matrix")
+
+        return self
+
+    def __add__(self, other):
+        result = self.copy()
+        result += other
+        return result
+
+    __radd__ = __add__
+
+    def __isub__(self, other):
+        self += -other
+        return self
+
+    def __sub__(self, other):
+        return self + (-other)
+
+    def __mul__(self, other):
+        if isinstance(other, (int, float)):
+            result = self.copy()
+            result._blocks = [(vector * other, id1, id2) for vector, id1, id2 in self._blocks]
+            result._diagonal *= other
+            return result
+        elif isinstance(other, _SparseMatrix):
+            raise NotImplementedError("matrix-free matrices cannot be multiplied by other matrices")
+        else:
+            shape = numerix.shape(other)
+            if shape == (self._shape[1],):
+                return self.matvec(other)
+            else:
+                raise TypeError
+
+    def __rmul__(self, other):
+        if isinstance(other, (int, float)):
+            return self * other
+        else:
+            return self.rmatvec(other)
+
+    def _assembled(self):
+        """The equivalent assembled `_ScipyMeshMatrix`
+        """
+        matrix = _ScipyMeshMatrix(mesh=self.mesh,
+                                  numberOfVariables=self.numberOfVariables,
+                                  numberOfEquations=self.numberOfEquations)
+        _ScipyMatrix.addAt(matrix, *self._triplets())
+        return matrix
+
+    def _triplets(self):
+        ids = numerix.arange(len(self._diagonal))
+        return (numerix.concatenate([self._diagonal] + [vector for vector, id1, id2 in self._blocks]),
+                numerix.concatenate([ids] + [id1 for vector, id1, id2 in self._blocks]),
+                numerix.concatenate([ids] + [id2 for vector, id1, id2 in self._blocks]))
+
+    @property
+    def numpyArray(self):
+        return self._assembled().numpyArray
+
+    @property
+    def CSR(self):
+        """The Compact Sparse Row description of the assembled matrix
+        """
+        return self._assembled().CSR
+
+    def __str__(self):
+        return str(self._assembled())
+
+    def _test(self):
+        """
+        Applying the matrix gives the same result as applying the
+        assembled matrix
+
+        >>> from fipy import Grid2D, CellVariable, DiffusionTerm, TransientTerm
+        >>> mesh = Grid2D(nx=3, ny=2)
+        >>> var = CellVariable(mesh=mesh, value=mesh.x * mesh.y, hasOld=True)
+        >>> var.constrain(1., where=mesh.facesLeft)
+        >>> eq = TransientTerm() == DiffusionTerm(coeff=mesh.faceCenters[0])
+        >>> _, L, b = eq._buildAndAddMatrices(var, _ScipyMeshMatrix, dt=1.)
+        >>> _, M, c = eq._buildAndAddMatrices(var, _ScipyMatrixFreeMeshMatrix, dt=1.)
+        >>> print(numerix.allclose(b, c))
+        True
+        >>> print(numerix.allclose(L.numpyArray, M.numpyArray))
+        True
+        >>> x = numerix.arange(6.)
+        >>> print(numerix.allclose(L * x, M.matrix * x))
+        True
+        >>> print(numerix.allclose(x * L, M.matrix.rmatvec(x)))
+        True
+        >>> print(numerix.allclose(L.takeDiagonal(), M.matrix.diagonal()))
+        True
+
+        Only the face coefficients are kept, not their connectivity
+
+        >>> print(len(M._blocks))
+        1
+        >>> rows = M._blocks[0][1]
+        >>> _, M, c = eq._buildAndAddMatrices(var, _ScipyMatrixFreeMeshMatrix, dt=1.)
+        >>> print(M._blocks[0][1] is rows)
+        True
+
+        Under-relaxation only changes the diagonal
+
+        >>> L.putDiagonal(L.takeDiagonal() / 0.5)
+        >>> M.putDiagonal(M.takeDiagonal() / 0.5)
+        >>> print(numerix.allclose(L.numpyArray, M.numpyArray))
+        True
+        """
+        pass
+
 def _test():
     import fipy.tests.doctestPlus
     return fipy.tests.doctestPlus.testmod()
@@ -4,7 +4,10 @@ __docformat__ = 'restructuredtext'
 
 __all__ = []
 
+import os
+
 from fipy.tools import numerix
+from fipy.tools import parser
 
 class _SparseMatrix(object):
 
@@ -148,6 +151,166 @@ class _SparseMatrix(object):
 ##         numMatrix = self.take(indices[0].ravel(), indices[1].ravel())
 ##      return numerix.reshape(numMatrix, shape)
 
+class _TripletBuffer(object):
+    """Growable storage of (value, row, column) triplets
+
+    Capacity is doubled as needed, so appending many small sets of
+    triplets costs amortized linear time.
+    """
+
+    def __init__(self, sizeHint=0):
+        """
+        Parameters
+        ----------
+        sizeHint : int
+            Initial capacity, e.g., the expected number of non-zeros.
+        """
+        capacity = max(int(sizeHint or 0), 16)
+        self._values = numerix.empty((capacity,), dtype=float)
+        self._rows = numerix.empty((capacity,), dtype=numerix.intp)
+        self._cols = numerix.empty((capacity,), dtype=numerix.intp)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def _reserve(self, size):
+        capacity = len(self._values)
+        if size > capacity:
+            capacity = max(size, 2 * capacity)
+            for name in ("_values", "_rows", "_cols"):
+                old = getattr(self, name)
+                new = numerix.empty((capacity,), dtype=old.dtype)
+                new[:self._size] = old[:self._size]
+                setattr(self, name, new)
+
+    def append(self, vector, id1, id2):
+        """Add triplets to the end of the buffer
+
+        Parameters
+        ----------
+        vector : array_like
+            The values.
+        id1 : array_like
+            The row indices.
+        id2 : array_like
+            The column indices.
+        """
+        vector = numerix.asarray(vector).ravel()
+        id1 = numerix.asarray(id1).ravel()
+        id2 = numerix.asarray(id2).ravel()
+
+        start = self._size
+        stop = start + len(vector)
+        self._reserve(stop)
+        self._values[start:stop] = vector
+        self._rows[start:stop] = id1
+        self._cols[start:stop] = id2
+        self._size = stop
+
+    def extend(self, other):
+        """Add the triplets of another `_TripletBuffer`
+        """
+        self.append(*other.triplets)
+
+    @property
+    def triplets(self):
+        """The stored (values, rows, columns)
+        """
+        return (self._values[:self._size],
+                self._rows[:self._size],
+                self._cols[:self._size])
+
+class _DeferredMeshMatrix(object):
+    """Mixin that defers assembly of a mesh matrix until it is needed
+
+    When enabled with :envvar:`FIPY_DEFERRED_ASSEMBLY` or
+    :option:`--deferred-assembly`, `addAt` and `addAtDiagonal` only
+    accumulate triplets, and adding one untouched deferred matrix to another
+    just concatenates their triplets.  The triplets are converted to the
+    backend format in a single `addAt` the first time the underlying
+    `matrix` is accessed, e.g., when the equation is solved.
+
+    .. attention:: Concrete classes must call `_deferAssembly()` once the
+       backend matrix has been created.
+    """
+
+    _deferredAssembly = ((os.getenv("FIPY_DEFERRED_ASSEMBLY") is not None)
+                         or bool(parser.parse("--deferred-assembly",
+                                              action="store_true")))
+
+    _pendingTriplets = None
+    _pristine = False
+
+    def _deferAssembly(self, matrix=None, sizeHint=None):
+        """Start accumulating triplets, if enabled
+
+        Parameters
+        ----------
+        matrix
+            Pre-assembled backend matrix, if any.  A matrix that starts
+            out with content is never treated as untouched.
+        sizeHint : int
+            Estimate of the number of non-zeros.
+        """
+        if self._deferredAssembly:
+            self._pendingTriplets = {}
+            self._pristine = matrix is None
+            self._sizeHint = sizeHint
+
+    def _getMatrix(self):
+        self._pristine = False
+        if self._pendingTriplets:
+            self._assembleTriplets()
+        return getattr(self, "_matrix", None)
+
+    def _setMatrix(self, matrix):
+        self._pristine = False
+        self._matrix = matrix
+
+    def _delMatrix(self):
+        del self._matrix
+        if self._pendingTriplets is not None:
+            self._pendingTriplets = {}
+
+    matrix = property(_getMatrix, _setMatrix, _delMatrix)
+
+    def _assembleTriplets(self):
+        """Convert all pending triplets to the backend format
+        """
+        pending = self._pendingTriplets
+        self._pendingTriplets = {}
+        for overlapping, buffer in pending.items():
+            vector, id1, id2 = buffer.triplets
+            super(_DeferredMeshMatrix, self).addAt(vector, id1, id2,
+                                                   overlapping=overlapping)
+
+    def _pendingBuffer(self, overlapping):
+        if overlapping not in self._pendingTriplets:
+            self._pendingTriplets[overlapping] = _TripletBuffer(sizeHint=self._sizeHint)
+        return self._pendingTriplets[overlapping]
+
+    def addAt(self, vector, id1, id2, overlapping=False):
+        if self._pendingTriplets is None:
+            super(_DeferredMeshMatrix, self).addAt(vector, id1, id2,
+                                                   overlapping=overlapping)
+        else:
+            self._pendingBuffer(overlapping).append(vector, id1, id2)
+
+    def __iadd__(self, other):
+        if (self._pendingTriplets is not None
+            and isinstance(other, _DeferredMeshMatrix)
+            and type(other) is type(self)
+            and other.mesh is self.mesh
+            and other._pristine):
+
+            for overlapping, buffer in other._pendingTriplets.items():
+                self._pendingBuffer(overlapping).extend(buffer)
+
+            return self
+        else:
+            return super(_DeferredMeshMatrix, self).__iadd__(other)
+
 class _Mesh2Matrix(object):
     _bodies = None
     _ghosts = None
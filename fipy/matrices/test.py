@@ -10,11 +10,11 @@ if solver == 'trilinos':
 elif solver == 'no-pysparse':
     docTestModuleNames = ('trilinosMatrix',)
 elif solver == 'scipy' or solver == 'pyamg':
-    docTestModuleNames = ('scipyMatrix',)
+    docTestModuleNames = ('scipyMatrix', 'threadedAssembly')
 elif solver == 'pysparse':
     docTestModuleNames = ('pysparseMatrix',)
 elif solver == 'pyamgx':
-    docTestModuleNames = ('scipyMatrix',)
+    docTestModuleNames = ('scipyMatrix', 'threadedAssembly')
 elif solver == 'petsc':
     docTestModuleNames = ('petscMatrix',)
 else:
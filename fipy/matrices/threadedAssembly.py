@@ -0,0 +1,139 @@
+"""Scatter of matrix contributions on a pool of threads
+
+Most of the time spent assembling a large :term:`SciPy` matrix goes to
+adding each of the contributions of the terms, which arrive as (value,
+row, column) triplets, to its place among the non-zeros of the matrix.
+When :envvar:`FIPY_ASSEMBLY_THREADS` or :option:`--assembly-threads` asks
+for more than one thread, the non-zeros are split into as many ranges as
+there are threads, the triplets are sorted by the range they fall in, and
+each range is summed by a compiled loop that releases the GIL.  Because
+the ranges don't overlap, the threads write straight into the matrix,
+with nothing to merge afterwards.  The sorting is done once, when the
+sparsity pattern of the contributions is first seen.
+
+Requires the :mod:`numba` package.
+"""
+from __future__ import division
+from __future__ import unicode_literals
+from builtins import object
+from builtins import zip
+__docformat__ = 'restructuredtext'
+
+__all__ = []
+
+import os
+import warnings
+
+from fipy.tools import numerix
+from fipy.tools import parser
+
+def _requestedThreads():
+    threads = parser.parse("--assembly-threads", action="store", type="int", default=None)
+    if threads is None:
+        threads = os.getenv("FIPY_ASSEMBLY_THREADS")
+    if threads is None:
+        return 1
+
+    threads = int(threads)
+    if threads < 1:
+        threads = os.cpu_count() or 1
+
+    return threads
+
+_threads = _requestedThreads()
+
+if _threads > 1:
+    from fipy.tools.inline import _checkForNumba
+    if not _checkForNumba():
+        warnings.warn("threaded assembly requires numba; continuing without it",
+                      UserWarning, stacklevel=2)
+        _threads = 1
+
+def _scatterRange(data, sortedPositions, order, weights, start, stop):
+    for k in range(start, stop):
+        data[sortedPositions[k]] += weights[order[k]]
+
+_kernel = None
+
+def _getKernel():
+    global _kernel
+
+    if _kernel is None:
+        from numba import njit
+        _kernel = njit(nogil=True, cache=True)(_scatterRange)
+
+    return _kernel
+
+# fewer triplets than this per thread aren't worth handing out
+_minimumTriplets = 2**15
+
+_pool = None
+
+def _getPool():
+    global _pool
+
+    if _pool is None:
+        from concurrent.futures import ThreadPoolExecutor
+        _pool = ThreadPoolExecutor(max_workers=_threads)
+
+    return _pool
+
+def _isWorthwhile(count):
+    """Whether `count` triplets should be scattered by threads"""
+    return _threads > 1 and count >= 2 * _minimumTriplets
+
+class _ScatterPartition(object):
+    """Triplets sorted by which of `chunks` ranges of the non-zeros they
+    belong to
+
+    >>> partition = _ScatterPartition(numerix.array([4, 0, 3, 1, 4, 2]),
+    ...                               nnz=5, chunks=2)
+    >>> print(partition.sortedPositions)
+    [0 1 2 3 4 4]
+    >>> print(partition.bounds)
+    [0 2 6]
+    """
+
+    def __init__(self, positions, nnz, chunks):
+        positions = numerix.asarray(positions)
+        self.order = numerix.argsort(positions, kind="stable")
+        self.sortedPositions = positions[self.order]
+        edges = (numerix.arange(chunks + 1) * nnz) // chunks
+        self.bounds = numerix.searchsorted(self.sortedPositions, edges)
+
+def _scatterAdd(data, weights, partition):
+    """Add each of `weights` to its position in `data`
+
+    >>> from fipy.tools import numerix
+    >>> positions = numerix.array([4, 0, 3, 1, 4, 2, 0])
+    >>> weights = numerix.array([1., 2., 3., 4., 5., 6., 7.])
+    >>> data = numerix.ones(5)
+    >>> _scatterAdd(data, weights,
+    ...             _ScatterPartition(positions, nnz=5, chunks=3)) # doctest: +NUMBA
+    >>> print(data) # doctest: +NUMBA
+    [10.  5.  7.  4.  7.]
+    >>> print(numerix.allclose(data - 1, numerix.bincount(positions, weights=weights))) # doctest: +NUMBA
+    True
+    """
+    scatter = _getKernel()
+    weights = numerix.ascontiguousarray(weights, dtype=float)
+    ranges = [(start, stop)
+              for start, stop in zip(partition.bounds[:-1], partition.bounds[1:])
+              if stop > start]
+
+    if len(ranges) > 1:
+        futures = [_getPool().submit(scatter, data, partition.sortedPositions,
+                                     partition.order, weights, start, stop)
+                   for start, stop in ranges]
+        for future in futures:
+            future.result()
+    else:
+        for start, stop in ranges:
+            scatter(data, partition.sortedPositions, partition.order, weights, start, stop)
+
+def _test():
+    import fipy.tests.doctestPlus
+    return fipy.tests.doctestPlus.testmod()
+
+if __name__ == "__main__":
+    _test()
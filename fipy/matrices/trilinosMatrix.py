@@ -11,7 +11,8 @@ from PyTrilinos import Epetra
 from PyTrilinos import EpetraExt
 
 from fipy.matrices.sparseMatrix import (_SparseMatrix, _RowMesh2Matrix,
-                                        _ColMesh2Matrix, _RowColMesh2Matrix)
+                                        _ColMesh2Matrix, _RowColMesh2Matrix,
+                                        _DeferredMeshMatrix)
 from fipy.tools import numerix
 
 # Current inadequacies of the matrix class:
@@ -990,7 +991,7 @@ class _TrilinosColMeshMatrix(_TrilinosBaseMeshMatrix):
         # Specify -1 to have the constructor compute the number of global elements.
         return Epetra.Map(-1, list(self._m2m.globalNonOverlappingColIDs), 0, comm)
 
-class _TrilinosMeshMatrix(_TrilinosRowMeshMatrix):
+class _TrilinosMeshMatrix(_DeferredMeshMatrix, _TrilinosRowMeshMatrix):
     def __init__(self, mesh, numberOfVariables=1, numberOfEquations=1,
                  bandwidth=0, sizeHint=None, matrix=None):
         """Creates a `_TrilinosRowMeshMatrix` associated with equations and variables.
@@ -1025,6 +1026,9 @@ class _TrilinosMeshMatrix(_TrilinosRowMeshMatrix):
                                                   matrix=matrix,
                                                   m2m=m2m)
 
+        self._deferAssembly(matrix=matrix,
+                            sizeHint=sizeHint or bandwidth * numberOfEquations * mesh.numberOfCells)
+
     @property
     def colMap(self):
         comm = self.mesh.communicator.epetra_comm
@@ -1045,9 +1049,9 @@ class _TrilinosMeshMatrix(_TrilinosRowMeshMatrix):
                                                bandwidth=self.bandwidth,
                                                numberOfVariables=self._m2m.numberOfVariables,
                                                numberOfEquations=self._m2m.numberOfEquations).matrix
-        return super(_TrilinosMeshMatrix, self).matrix
+        return self._getMatrix()
 
-    matrix = property(_getMatrixProperty, _TrilinosMatrixFromShape._setMatrix)
+    matrix = property(_getMatrixProperty, _DeferredMeshMatrix._setMatrix)
 
     def takeDiagonal(self):
         nonoverlapping_result = _TrilinosMatrixFromShape.takeDiagonal(self)
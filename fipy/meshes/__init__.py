@@ -6,6 +6,7 @@ from fipy.meshes.periodicGrid3D import *
 from fipy.meshes.skewedGrid2D import *
 from fipy.meshes.tri2D import *
 from fipy.meshes.gmshMesh import *
+from fipy.meshes.batchMesh import *
 
 __all__ = []
 __all__.extend(factoryMeshes.__all__)
@@ -15,3 +16,4 @@ __all__.extend(periodicGrid3D.__all__)
 __all__.extend(skewedGrid2D.__all__)
 __all__.extend(tri2D.__all__)
 __all__.extend(gmshMesh.__all__)
+__all__.extend(batchMesh.__all__)
@@ -1069,6 +1069,111 @@ class AbstractMesh(object):
     def __setstate__(self, state):
         return state["_RepresentationClass"].setstate(self, state)
 
+    def save(self, filename, geometry=True):
+        """Write the mesh to a binary file, to be read by :meth:`load`.
+
+        Pickling a mesh, as :mod:`~fipy.tools.dump` does, keeps only the
+        arguments or arrays it was built from, and builds it again when
+        it is unpickled.  `save` writes every array of the mesh, its
+        geometry included, as an uncompressed binary dataset, so that
+        :meth:`load` needn't calculate anything.
+
+        >>> import os, shutil, tempfile
+        >>> from fipy import Tri2D, CellVariable
+        >>> from fipy.meshes.mesh import Mesh
+        >>> directory = tempfile.mkdtemp()
+        >>> filename = os.path.join(directory, "mesh.npz")
+        >>> mesh = Tri2D(nx=30, ny=20, dx=0.5)
+        >>> mesh.save(filename)
+        >>> copy = Mesh.load(filename)
+        >>> print(type(copy).__name__, copy.numberOfCells)
+        Tri2D 2400
+        >>> print(numerix.allclose(copy.cellCenters, mesh.cellCenters))
+        True
+        >>> print(numerix.allclose(copy._cellToCellDistances,
+        ...                        mesh._cellToCellDistances))
+        True
+        >>> print((copy.exteriorFaces.value == mesh.exteriorFaces.value).all())
+        True
+        >>> print(copy.exteriorFaces.mesh is copy)
+        True
+
+        With `lazy=True`, the arrays are memory-mapped, and only read
+        from the disk as they are needed.  They are copied on write, so
+        changing them does not change the file.
+
+        >>> copy = Mesh.load(filename, lazy=True)
+        >>> var = CellVariable(mesh=copy, value=copy.x * copy.y)
+        >>> print(numerix.allclose(var.faceGrad.divergence,
+        ...                        CellVariable(mesh=mesh, value=mesh.x * mesh.y).faceGrad.divergence))
+        True
+
+        What terms and matrices cache on the mesh, to assemble faster, is
+        not written.
+
+        >>> from fipy import DiffusionTerm
+        >>> DiffusionTerm().solve(var=CellVariable(mesh=mesh))
+        >>> print(hasattr(mesh, "_diffusionInteriorFaceIDs"))
+        True
+        >>> mesh.save(filename)
+        >>> print(hasattr(Mesh.load(filename), "_diffusionInteriorFaceIDs"))
+        False
+
+        With `geometry=False`, only what a pickle would hold is written
+        and the mesh is built again when it is read.
+
+        >>> mesh.save(filename, geometry=False)
+        >>> print(numerix.allclose(Mesh.load(filename).cellCenters, mesh.cellCenters))
+        True
+
+        A mesh can only be loaded by a class it belongs to.
+
+        >>> from fipy.meshes.uniformGrid import UniformGrid
+        >>> UniformGrid.load(filename) # doctest: +IGNORE_EXCEPTION_DETAIL
+        Traceback (most recent call last):
+        ...
+        TypeError: The mesh in mesh.npz is a Tri2D, not a UniformGrid
+
+        >>> del copy, var
+        >>> shutil.rmtree(directory)
+
+        In parallel, each process writes its own partition of the mesh
+        to its own file, named `filename` followed by the number of the
+        process, *e.g.*, "mesh.npz.3", and the mesh can only be read by a
+        run with the same number of processes.
+
+        Parameters
+        ----------
+        filename : str
+            Name of the file to write.  If it ends in ".h5" or ".hdf5",
+            the file is written with :term:`h5py`, otherwise as a ".npz"
+            file, as :func:`numpy.savez` writes it.
+        geometry : bool
+            Whether to write the calculated geometry and topology of
+            the mesh, rather than only the arrays it is built from.
+        """
+        from fipy.tools.dump import _writeMesh
+        _writeMesh(self, filename, geometry=geometry)
+
+    @classmethod
+    def load(cls, filename, lazy=False):
+        """Read a mesh written by :meth:`save`.
+
+        Parameters
+        ----------
+        filename : str
+            Name of the file to read.
+        lazy : bool
+            Whether to memory-map the arrays of the mesh, rather than
+            read them.
+        """
+        from fipy.tools.dump import _readMesh
+        mesh = _readMesh(filename, lazy=lazy)
+        if not isinstance(mesh, cls):
+            raise TypeError("The mesh in %s is a %s, not a %s"
+                            % (filename, type(mesh).__name__, cls.__name__))
+        return mesh
+
     def __repr__(self):
         return self.representation.repr()
 
@@ -0,0 +1,259 @@
+from __future__ import division
+from __future__ import unicode_literals
+__docformat__ = 'restructuredtext'
+
+from fipy.tools import numerix
+from fipy.tools import serialComm
+
+from fipy.meshes.mesh import Mesh
+from fipy.meshes.mesh1D import Mesh1D
+from fipy.meshes.mesh2D import Mesh2D
+
+__all__ = ["BatchMesh"]
+from future.utils import text_to_native_str
+__all__ = [text_to_native_str(n) for n in __all__]
+
+def BatchMesh(mesh, batchSize):
+    r"""Factory function for a mesh of `batchSize` copies of `mesh`, to
+    solve the same equation for many sets of coefficients at once.
+
+    The copies occupy the same space, so `facesLeft`, `cellCenters` and
+    the like select the same places in every copy, but no face joins one
+    copy to another.  Every `Term` therefore assembles, in one vectorized
+    pass, a block-diagonal matrix with one block for each copy, and one
+    solve gives the solutions for every member of the batch.  The cells
+    and faces of copy :math:`b` follow those of copy :math:`b - 1`.
+
+    Values with a leading batch dimension are laid out on the mesh with
+    :meth:`~_BatchMesh.batch` and taken back apart with
+    :meth:`~_BatchMesh.unbatch`.
+
+    >>> from fipy import Grid1D, CellVariable, DiffusionTerm, LinearLUSolver
+    >>> from fipy.tools import numerix
+    >>> mesh = BatchMesh(Grid1D(nx=4), batchSize=3) # doctest: +SERIAL
+    >>> print(mesh.numberOfCells, mesh.batchSize) # doctest: +SERIAL
+    12 3
+
+    Each member of the batch has its own right-hand boundary value
+
+    >>> right = numerix.array([1., 2., 4.])
+    >>> phi = CellVariable(mesh=mesh) # doctest: +SERIAL
+    >>> phi.constrain(0., where=mesh.facesLeft) # doctest: +SERIAL
+    >>> phi.constrain(mesh.batch(right, faces=True),
+    ...               where=mesh.facesRight) # doctest: +SERIAL
+    >>> DiffusionTerm().solve(var=phi, solver=LinearLUSolver()) # doctest: +SERIAL
+    >>> print(mesh.unbatch(phi.value)) # doctest: +SERIAL
+    [[0.125 0.375 0.625 0.875]
+     [0.25  0.75  1.25  1.75 ]
+     [0.5   1.5   2.5   3.5  ]]
+
+    and its own diffusivity in every cell
+
+    >>> D = numerix.array([[1., 1., 1., 1.],
+    ...                    [1., 1., 1., 1.],
+    ...                    [1., 1., 3., 3.]])
+    >>> DiffusionTerm(coeff=CellVariable(mesh=mesh,
+    ...                                  value=mesh.batch(D))).solve(var=phi) # doctest: +SERIAL
+
+    which gives the same answer as solving for that member alone
+
+    >>> single = CellVariable(mesh=mesh.baseMesh) # doctest: +SERIAL
+    >>> single.constrain(0., where=mesh.baseMesh.facesLeft) # doctest: +SERIAL
+    >>> single.constrain(4., where=mesh.baseMesh.facesRight) # doctest: +SERIAL
+    >>> DiffusionTerm(coeff=CellVariable(mesh=mesh.baseMesh,
+    ...                                  value=D[2])).solve(var=single) # doctest: +SERIAL
+    >>> print(numerix.allclose(mesh.unbatch(phi.value)[2], single.value)) # doctest: +SERIAL
+    True
+
+    Meshes of mixed elements, whose cells have different numbers of
+    faces, are batched just the same
+
+    >>> from fipy import Grid2D, Tri2D
+    >>> mixed = Grid2D(nx=2, ny=2) + (Tri2D(nx=1, ny=2) + [[2], [0]]) # doctest: +SERIAL
+    >>> mesh = BatchMesh(mixed, batchSize=3) # doctest: +SERIAL
+    >>> phi = CellVariable(mesh=mesh) # doctest: +SERIAL
+    >>> phi.constrain(0., where=mesh.facesLeft) # doctest: +SERIAL
+    >>> phi.constrain(mesh.batch(right, faces=True),
+    ...               where=mesh.facesRight) # doctest: +SERIAL
+    >>> DiffusionTerm().solve(var=phi, solver=LinearLUSolver()) # doctest: +SERIAL
+    >>> for member in range(3):
+    ...     single = CellVariable(mesh=mixed)
+    ...     single.constrain(0., where=mixed.facesLeft)
+    ...     single.constrain(right[member], where=mixed.facesRight)
+    ...     DiffusionTerm().solve(var=single, solver=LinearLUSolver())
+    ...     print(numerix.allclose(mesh.unbatch(phi.value)[member],
+    ...                            single.value)) # doctest: +SERIAL
+    True
+    True
+    True
+
+    .. note::
+
+       An iterative solver's tolerance applies to the residual of the
+       whole batch, not of each member.  The :class:`LinearLUSolver`, which
+       factors each block on its own, doesn't care.
+
+    Meshes whose geometry isn't entirely determined by their vertices,
+    such as cylindrical or periodic grids, can't be batched
+
+    >>> from fipy import CylindricalGrid1D
+    >>> BatchMesh(CylindricalGrid1D(nx=4), batchSize=3) # doctest: +SERIAL
+    Traceback (most recent call last):
+        ...
+    TypeError: CylindricalUniformGrid1D can't be batched
+
+    Parameters
+    ----------
+    mesh : ~fipy.meshes.mesh.Mesh
+        The mesh of each member of the batch. Must not be partitioned
+        among processes.
+    batchSize : int
+        Number of copies.
+    """
+    if mesh.communicator.Nproc > 1:
+        raise NotImplementedError("batches of partitioned meshes are not supported")
+
+    if mesh.dim == 1:
+        return _BatchMesh1D(mesh=mesh, batchSize=batchSize)
+    elif mesh.dim == 2:
+        return _BatchMesh2D(mesh=mesh, batchSize=batchSize)
+    else:
+        return _BatchMesh3D(mesh=mesh, batchSize=batchSize)
+
+class _BatchMesh(object):
+    """Copies of `baseMesh` that share its geometry, but not its topology
+    """
+
+    def __init__(self, mesh, batchSize):
+        self.baseMesh = mesh
+        self.batchSize = batchSize
+
+        # grids don't keep their topology in the form a `Mesh` takes
+        concatenable = mesh._concatenableMesh
+        vertexCoords = numerix.array(concatenable.vertexCoords)
+        faceVertexIDs = numerix.MA.filled(concatenable.faceVertexIDs, -1)
+        cellFaceIDs = numerix.MA.filled(concatenable.cellFaceIDs, -1)
+
+        super(_BatchMesh, self).__init__(vertexCoords=numerix.tile(vertexCoords, (1, batchSize)),
+                                         faceVertexIDs=self._offsetIDs(faceVertexIDs, vertexCoords.shape[-1]),
+                                         cellFaceIDs=self._offsetIDs(cellFaceIDs, faceVertexIDs.shape[-1]),
+                                         communicator=serialComm)
+
+        # cylindrical and periodic meshes are more than their topology
+        if not (numerix.allclose(self.cellVolumes[:mesh.numberOfCells], mesh.cellVolumes)
+                and numerix.allclose(self._cellDistances[:mesh.numberOfFaces], mesh._cellDistances)):
+            raise TypeError("%s can't be batched" % mesh.__class__.__name__)
+
+    def _offsetIDs(self, ids, count):
+        """`ids` of every copy, numbered after those of the previous copy
+
+        Padding of -1 is preserved.
+        """
+        offsets = numerix.arange(self.batchSize)[:, numerix.newaxis] * count
+        batched = (ids[..., numerix.newaxis, :] + offsets).reshape(ids.shape[:-1] + (-1,))
+        padding = numerix.broadcast_to((ids < 0)[..., numerix.newaxis, :],
+                                       ids.shape[:-1] + (self.batchSize, ids.shape[-1]))
+        return numerix.where(padding.reshape(batched.shape), -1, batched)
+
+    @property
+    def _isOrthogonal(self):
+        return self.baseMesh._isOrthogonal
+
+    def batch(self, value, faces=False):
+        """Lay out values with a leading batch dimension on the mesh
+
+        >>> from fipy import Grid1D
+        >>> mesh = BatchMesh(Grid1D(nx=2), batchSize=3) # doctest: +SERIAL
+        >>> print(mesh.batch([[1., 2.], [3., 4.], [5., 6.]])) # doctest: +SERIAL
+        [1. 2. 3. 4. 5. 6.]
+
+        Values that are constant over each member are spread over its cells
+
+        >>> print(mesh.batch([1., 2., 3.])) # doctest: +SERIAL
+        [1. 1. 2. 2. 3. 3.]
+
+        or faces
+
+        >>> print(mesh.batch([1., 2., 3.], faces=True)) # doctest: +SERIAL
+        [1. 1. 1. 2. 2. 2. 3. 3. 3.]
+
+        and the batch dimension of vectors goes to the back, with the
+        cells or faces
+
+        >>> print(mesh.batch([[[1., 2.]], [[3., 4.]], [[5., 6.]]]).shape) # doctest: +SERIAL
+        (1, 6)
+
+        Parameters
+        ----------
+        value : array_like
+            Values of each member of the batch, of shape `(batchSize,)`,
+            `(batchSize, N)`, or `(batchSize,) + elementshape + (N,)`,
+            where `N` is the number of cells (or faces) of `baseMesh`.
+        faces : bool
+            Whether the values belong to faces, rather than cells.
+
+        Returns
+        -------
+        ndarray
+            Of shape `elementshape + (batchSize * N,)`.
+        """
+        value = numerix.asarray(value)
+        if faces:
+            N = self.baseMesh.numberOfFaces
+        else:
+            N = self.baseMesh.numberOfCells
+
+        if value.shape[0] != self.batchSize:
+            raise ValueError("the leading dimension of the value must be %d" % self.batchSize)
+
+        if value.ndim < 2 or value.shape[-1] != N:
+            value = numerix.repeat(value[..., numerix.newaxis], N, axis=-1)
+
+        return numerix.moveaxis(value, 0, -2).reshape(value.shape[1:-1] + (-1,))
+
+    def unbatch(self, value):
+        """Give the values on the mesh a leading batch dimension
+
+        >>> from fipy import Grid1D
+        >>> mesh = BatchMesh(Grid1D(nx=2), batchSize=3) # doctest: +SERIAL
+        >>> print(mesh.unbatch(mesh.cellCenters).shape) # doctest: +SERIAL
+        (3, 1, 2)
+
+        Parameters
+        ----------
+        value : array_like
+            Values of shape `elementshape + (batchSize * N,)`.
+
+        Returns
+        -------
+        ndarray
+            Of shape `(batchSize,) + elementshape + (N,)`.
+        """
+        value = numerix.asarray(value)
+        value = value.reshape(value.shape[:-1] + (self.batchSize, -1))
+        return numerix.moveaxis(value, -2, 0)
+
+    def __getstate__(self):
+        return dict(mesh=self.baseMesh, batchSize=self.batchSize)
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def __repr__(self):
+        return "BatchMesh(%r, batchSize=%d)" % (self.baseMesh, self.batchSize)
+
+class _BatchMesh1D(_BatchMesh, Mesh1D):
+    pass
+
+class _BatchMesh2D(_BatchMesh, Mesh2D):
+    pass
+
+class _BatchMesh3D(_BatchMesh, Mesh):
+    pass
+
+def _test():
+    import fipy.tests.doctestPlus
+    return fipy.tests.doctestPlus.testmod()
+
+if __name__ == "__main__":
+    _test()
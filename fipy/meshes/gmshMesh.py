@@ -8,6 +8,7 @@ from builtins import str
 __docformat__ = 'restructuredtext'
 
 import os
+import struct
 from subprocess import Popen, PIPE
 import sys
 import tempfile
@@ -102,6 +103,14 @@ def _gmshVersion(communicator=parallelComm):
 
     return version
 
+def _requireGmshVersion(communicator=parallelComm):
+    # Enforce gmsh version to be either >= 2 or 2.5, based on Nproc.
+    version = _gmshVersion(communicator=communicator)
+    if version < StrictVersion("2.0"):
+        raise EnvironmentError("Gmsh version must be >= 2.0.")
+
+    return version
+
 def openMSHFile(name, dimensions=None, coordDimensions=None, communicator=parallelComm, overlap=1, mode='r', background=None):
     """Open a Gmsh `MSH` file
 
@@ -131,20 +140,17 @@ def openMSHFile(name, dimensions=None, coordDimensions=None, communicator=parall
     if overlap > 1:
         communicator = serialComm
 
-    # Enforce gmsh version to be either >= 2 or 2.5, based on Nproc.
-    version = _gmshVersion(communicator=communicator)
-    if version < StrictVersion("2.0"):
-        raise EnvironmentError("Gmsh version must be >= 2.0.")
-
     # If we're being passed a .msh file, leave it be. Otherwise,
     # we've gotta compile a .msh file from either (i) a .geo file,
     # or (ii) a gmsh script passed as a string.
 
     fileIsTemporary = False
+    cacheFile = None
 
     if mode.startswith('r'):
         if not os.path.exists(name):
             # we must have been passed a Gmsh script
+            version = _requireGmshVersion(communicator=communicator)
             if communicator.procID == 0:
                 (f, geoFile) = tempfile.mkstemp('.geo')
                 file = os.fdopen(f, 'w')
@@ -157,8 +163,9 @@ def openMSHFile(name, dimensions=None, coordDimensions=None, communicator=parall
         else:
             # Gmsh isn't picky about file extensions,
             # so we peek at the start of the file to deduce the type
-            f = open(name, 'r')
-            filetype = f.readline().strip()
+            # (binary MSH files only start with text)
+            f = open(name, 'rb')
+            filetype = f.readline().decode('ascii', 'replace').strip()
             f.close()
             if filetype == "$MeshFormat":
                 geoFile = None
@@ -171,6 +178,7 @@ def openMSHFile(name, dimensions=None, coordDimensions=None, communicator=parall
             else:
                 # must be a Gmsh script file
                 geoFile = name
+                version = _requireGmshVersion(communicator=communicator)
 
         if geoFile is not None:
             gmshFlags = ["-%d" % dimensions, "-nopopup"]
@@ -196,6 +204,26 @@ def openMSHFile(name, dimensions=None, coordDimensions=None, communicator=parall
 
             gmshFlags += ["-format", "msh2"]
 
+            # the background isn't part of the key, so its meshes aren't cached
+            if background is None:
+                cacheFile = _meshCacheFile(name=name,
+                                           version=version,
+                                           dimensions=dimensions,
+                                           coordDimensions=coordDimensions,
+                                           communicator=communicator,
+                                           overlap=overlap,
+                                           gmshFlags=gmshFlags)
+
+            if (cacheFile is not None
+                and communicator.all(nx.array(os.path.exists(cacheFile)))):
+                if communicator.procID == 0 and not os.path.exists(name):
+                    os.unlink(geoFile)
+
+                return _CachedMSHFile(cacheFile=cacheFile,
+                                      dimensions=dimensions,
+                                      coordDimensions=coordDimensions,
+                                      communicator=communicator)
+
             if background is not None:
                 if communicator.procID == 0:
                     f, bgmf = tempfile.mkstemp(suffix=".pos")
@@ -254,7 +282,48 @@ def openMSHFile(name, dimensions=None, coordDimensions=None, communicator=parall
                    communicator=communicator,
                    gmshOutput=gmshOutput,
                    mode=mode,
-                   fileIsTemporary=fileIsTemporary)
+                   fileIsTemporary=fileIsTemporary,
+                   cacheFile=cacheFile)
+
+# change whenever the arrays kept in the mesh cache change
+_meshCacheVersion = 1
+
+def _meshCacheFile(name, version, dimensions, coordDimensions, communicator, overlap, gmshFlags):
+    """Path of the file that caches the mesh Gmsh makes of `name` for this
+    process, or `None` if :envvar:`FIPY_GMSH_CACHE` doesn't name a directory
+
+    The key is a hash of the geometry, the version of Gmsh, and everything
+    that determines how it is meshed and partitioned.  Files that the
+    geometry `Include`s or `Merge`s are not part of the key.
+    """
+    import hashlib
+    import json
+
+    directory = os.getenv("FIPY_GMSH_CACHE")
+    if not directory:
+        return None
+
+    if os.path.exists(name):
+        with open(name, 'rb') as f:
+            geometry = f.read()
+    else:
+        geometry = "".join(name).encode('utf-8')
+
+    key = json.dumps([_meshCacheVersion,
+                      hashlib.sha256(geometry).hexdigest(),
+                      str(version),
+                      dimensions,
+                      coordDimensions,
+                      communicator.Nproc,
+                      overlap,
+                      gmshFlags])
+    key = hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+    if communicator.procID == 0 and not os.path.isdir(directory):
+        os.makedirs(directory)
+    communicator.Barrier()
+
+    return os.path.join(directory, "%s.%d.npz" % (key, communicator.procID))
 
 def openPOSFile(name, communicator=parallelComm, mode='w'):
     """Open a Gmsh `POS` post-processing file
@@ -495,7 +564,10 @@ class MSHFile(GmshFile):
     Does not support gmsh versions < 2. If partitioning, gmsh
     version must be >= 2.5.
 
-    TODO: Refactor face extraction functions.
+    Reads ASCII and binary files in `MSH` format 2 and 4.1. The
+    `$Nodes` and `$Elements` sections are parsed in bulk, and the
+    elements are grouped by type into arrays of fixed width. Partitioned
+    meshes must be in `MSH` format 2.
     """
     def __init__(self, filename,
                        dimensions,
@@ -503,7 +575,8 @@ class MSHFile(GmshFile):
                        communicator=parallelComm,
                        gmshOutput="",
                        mode='r',
-                       fileIsTemporary=False):
+                       fileIsTemporary=False,
+                       cacheFile=None):
         """
         Parameters
         ----------
@@ -526,348 +599,717 @@ class MSHFile(GmshFile):
             Add a `b` to the mode for binary files.
         fileIsTemporary : bool
             If `True`, `filename` should be cleaned up on deletion
+        cacheFile : str
+            If given, where to keep what `read()` finds, for
+            `_CachedMSHFile` to return next time
         """
         self.dimensions = dimensions
         self.coordDimensions = coordDimensions
         self.gmshOutput = gmshOutput
+        self.cacheFile = cacheFile
 
         self.mesh = None
         self.meshWritten = False
 
         GmshFile.__init__(self, filename=filename, communicator=communicator, mode=mode, fileIsTemporary=fileIsTemporary)
 
-    def _getMetaData(self):
+    def _findSection(self, data, title, start=0, end=None):
         """
-        Extracts `gmshVersion`, file-type, and data-size in that
-        order.
+        Returns the offset of the line that follows the `$[title]` header
+        line, searching `data` from `start` to `end`, or -1 if there is no
+        such header.
+        """
+        marker = ("$%s" % title).encode("ascii")
+        if end is None:
+            end = len(data)
+        pos = start
+        while True:
+            pos = data.find(marker, pos, end)
+            if pos < 0:
+                return -1
+            after = pos + len(marker)
+            # don't mistake, e.g., `$NodesData` for `$Nodes`
+            if ((pos == 0 or data[pos-1:pos] in (b"\n", b"\r"))
+                and data[after:after+1] in (b"\n", b"\r", b"")):
+                eol = data.find(b"\n", after)
+                if eol < 0:
+                    return len(data)
+                return eol + 1
+            pos = after
+
+    def _sectionText(self, data, title, start):
+        """
+        Returns the bytes between the header line at `start` and
+        `$End[title]`.
         """
-        self._seekForHeader("MeshFormat")
-        metaData = self.fileobj.readline().split()
-        self.fileobj.seek(0)
-        return [float(x) for x in metaData]
+        end = data.find(("$End%s" % title).encode("ascii"), start)
+        if end < 0:
+            raise EOFError("No `End%s' footer found!" % title)
+        return data[start:end]
 
-    def _isolateData(self, title):
+    def _getMetaData(self, data):
         """
-        Gets all data between $[title] and $End[title], writes
-        it out to its own file.
+        Extracts `gmshVersion`, file-type, and data-size in that
+        order, followed by the byte order of a binary file.
         """
-        newF, newPath = tempfile.mkstemp(title, text=True)
-        newF = os.fdopen(newF, 'w')
-        try:
-            self._seekForHeader(title)
-        except Exception as e:
-            newF.close()
-            os.unlink(newPath)
-            raise
+        start = self._findSection(data, "MeshFormat")
+        if start < 0:
+            raise EOFError("No `MeshFormat' header found!")
+        eol = data.find(b"\n", start)
+        metaData = [float(x) for x in data[start:eol].split()]
 
-        # extract the actual data within section
-        while True:
-            line = self.fileobj.readline()
-            if ("$End%s" % title) not in line:
-                newF.write(line)
-            else: break
+        byteorder = "<"
+        if metaData[1] == 1:
+            # binary files follow the format with a one, to tell the byte order
+            if struct.unpack("<i", data[eol+1:eol+5])[0] != 1:
+                byteorder = ">"
 
-        self.fileobj.seek(0)
-        newF.close()
-        return newPath
+        return metaData + [byteorder]
 
-    def _seekForHeader(self, title):
+    def _readNodes(self, data, start):
         """
-        Iterate through a file until we end up at the section header
-        for `title`. Function has obvious side-effects on `self.fileobj`.
+        Returns the Gmsh ID and the coordinates of every node, along with
+        the offset at which the `$Nodes` section ends.
         """
-        while True:
-            line = self.fileobj.readline()
-            if len(line) == 0:
-                raise EOFError("No `%s' header found!" % title)
-                break
-            elif (("$%s" % title) not in line):
-                continue
-            else:
-                break # found header
+        if self.version >= 4:
+            reader = _MSH4Reader(data, start, self.fileType, self.byteorder,
+                                 self.dataSize, title="Nodes", dtype=float)
+            numBlocks, numNodes, minTag, maxTag = reader.read(4, 'n')
+            ids = []
+            coords = []
+            for block in range(numBlocks):
+                dim, entityTag, parametric = reader.read(3, 'i')
+                count = reader.read(1, 'n')[0]
+                ids.append(reader.read(count, 'n'))
+                # parametric nodes carry their coordinates on the entity, too
+                width = 3 + (dim if parametric else 0)
+                coords.append(reader.read(count * width, 'd').reshape((count, width))[:, :3])
+            return (nx.concatenate(ids + [nx.zeros((0,), nx.INT_DTYPE)]),
+                    nx.concatenate(coords + [nx.zeros((0, 3))]),
+                    reader.end)
+
+        eol = data.find(b"\n", start)
+        count = int(data[start:eol])
+        if self.fileType == 1:
+            record = nx.dtype([("id", self.byteorder + "i4"),
+                               ("coords", "%sf%d" % (self.byteorder, self.dataSize), (3,))])
+            try:
+                nodes = nx.frombuffer(data, dtype=record, count=count, offset=eol + 1)
+            except ValueError:
+                raise EOFError("No `EndNodes' footer found!")
+            return (nodes["id"].astype(nx.INT_DTYPE),
+                    nodes["coords"].astype(float),
+                    eol + 1 + nodes.nbytes)
+        else:
+            text = self._sectionText(data, "Nodes", eol + 1)
+            values = nx.fromstring(text, dtype=float, sep=" ")
+            if len(values) != 4 * count:
+                raise GmshException("Expected %d nodes, not %g" % (count, len(values) / 4.))
+            values = values.reshape((count, 4))
+            return (values[:, 0].astype(nx.INT_DTYPE),
+                    values[:, 1:],
+                    eol + 1 + len(text))
+
+    def _readElements(self, data, start, entities):
+        """
+        Returns a list of `_ElementBlock` objects, each holding elements of
+        one type and with the same number of tags.
+        """
+        if self.version >= 4:
+            reader = _MSH4Reader(data, start, self.fileType, self.byteorder,
+                                 self.dataSize, title="Elements", dtype=nx.INT_DTYPE)
+            numBlocks, numElements, minTag, maxTag = reader.read(4, 'n')
+            blocks = []
+            position = 0
+            for block in range(numBlocks):
+                dim, entityTag, elType = reader.read(3, 'i')
+                count = reader.read(1, 'n')[0]
+                width = 1 + self._nodesPerElement(elType)
+                values = reader.read(count * width, 'n').reshape((count, width))
+                # MSH 2 tags are the physical and the geometrical entities
+                tags = nx.empty((count, 2), dtype=nx.INT_DTYPE)
+                tags[:, 0] = entities.get((dim, entityTag), 0)
+                tags[:, 1] = entityTag
+                blocks.append(_ElementBlock(elType=elType,
+                                            order=nx.arange(position, position + count),
+                                            ids=values[:, 0],
+                                            tags=tags,
+                                            nodes=values[:, 1:]))
+                position += count
+            return blocks
+
+        eol = data.find(b"\n", start)
+        if self.fileType == 1:
+            count = int(data[start:eol])
+            dtype = self.byteorder + "i4"
+            pos = eol + 1
+            blocks = []
+            position = 0
+            try:
+                while position < count:
+                    elType, following, numTags = nx.frombuffer(data, dtype=dtype, count=3, offset=pos)
+                    width = 1 + numTags + self._nodesPerElement(elType)
+                    values = nx.frombuffer(data, dtype=dtype, count=following * width,
+                                           offset=pos + 12).reshape((following, width))
+                    values = values.astype(nx.INT_DTYPE)
+                    blocks.append(_ElementBlock(elType=elType,
+                                                order=nx.arange(position, position + following),
+                                                ids=values[:, 0],
+                                                tags=values[:, 1:1 + numTags],
+                                                nodes=values[:, 1 + numTags:]))
+                    pos += 12 + 4 * following * width
+                    position += following
+            except ValueError:
+                raise EOFError("No `EndElements' footer found!")
+            return blocks
+        else:
+            return self._readASCIIElements(self._sectionText(data, "Elements", start))
 
-    def _deriveCellsAndFaces(self, cellsToVertIDs, shapeTypes, numCells):
+    def _readASCIIElements(self, text):
         """
-        Uses element information obtained from `_parseElementFile` to deliver
-        `facesToVertices` and `cellsToFaces`.
+        Splits the lines of an MSH 2 `$Elements` section into blocks.
+
+        Every number in the section is parsed at once, and the lines are
+        told apart by where the numbers and the newlines fall.
+        """
+        chars = nx.frombuffer(text, dtype=nx.uint8)
+        # anything but spaces, tabs, and newlines is part of a number
+        solid = chars > ord(" ")
+        starts = nx.flatnonzero(solid[1:] & ~solid[:-1]) + 1
+        if len(chars) > 0 and solid[0]:
+            starts = nx.concatenate(([0], starts))
+        lines = nx.searchsorted(nx.flatnonzero(chars == ord("\n")), starts)
+
+        values = nx.fromstring(text, dtype=nx.INT_DTYPE, sep=" ")
+        if len(values) != len(starts):
+            raise GmshException("Unable to parse the `$Elements' section")
+
+        # the position of the first number of each line and how many there are
+        firsts = nx.concatenate(([True], lines[1:] != lines[:-1])) if len(lines) else nx.zeros((0,), bool)
+        offsets = nx.flatnonzero(firsts)
+        widths = nx.diff(nx.concatenate((offsets, [len(values)])))
+
+        # skip the number of elements
+        offsets, widths = offsets[1:], widths[1:]
+        if nx.any(widths < 3):
+            raise GmshException("Unable to parse the `$Elements' section")
+
+        elTypes = values[offsets + 1]
+        tagCounts = values[offsets + 2]
+        if nx.any((elTypes < 0) | (tagCounts < 0) | (tagCounts + 3 > widths)):
+            raise GmshException("Unable to parse the `$Elements' section")
+
+        # lines are alike if they have the same length, type, and number of tags
+        kinds = (widths * (elTypes.max() + 1) + elTypes) * (widths.max() + 1) + tagCounts
+        kinds, which = nx.unique(kinds, return_index=True, return_inverse=True)[1:]
+
+        blocks = []
+        for kind, first in enumerate(kinds):
+            order = nx.flatnonzero(which == kind)
+            width, elType, numTags = widths[first], elTypes[first], tagCounts[first]
+            lineValues = values[offsets[order][..., nx.newaxis] + nx.arange(width)]
+            blocks.append(_ElementBlock(elType=elType,
+                                        order=order,
+                                        ids=lineValues[:, 0],
+                                        tags=lineValues[:, 3:3 + numTags],
+                                        nodes=lineValues[:, 3 + numTags:]))
+        return blocks
+
+    def _readEntities(self, data, start):
+        """
+        Returns the first physical entity of each `(dimension, tag)`
+        geometrical entity of an MSH 4 file, or zero if it has none.
+        """
+        entities = dict()
+        if start < 0:
+            return entities
+
+        reader = _MSH4Reader(data, start, self.fileType, self.byteorder,
+                             self.dataSize, title="Entities", dtype=float)
+        counts = reader.read(4, 'n')
+        for dim, count in enumerate(counts):
+            for entity in range(count):
+                tag = reader.read(1, 'i')[0]
+                # a point, or the corners of a bounding box
+                reader.read(3 if dim == 0 else 6, 'd')
+                physicals = reader.read(reader.read(1, 'n')[0], 'i')
+                entities[(dim, tag)] = physicals[0] if len(physicals) > 0 else 0
+                if dim > 0:
+                    reader.read(reader.read(1, 'n')[0], 'i')
+
+        return entities
+
+    def _nodesPerElement(self, elType):
+        try:
+            return _nodesPerElement[elType]
+        except KeyError:
+            raise GmshException("Gmsh element type %d is not supported" % elType)
+
+    def _splitTags(self, block):
+        """
+        Returns the physical and geometrical entity of each element of
+        `block`, and any remaining tags.
         """
+        if block.tags.shape[1] >= 2:
+            return block.tags[:, 0], block.tags[:, 1], block.tags[:, 2:]
+        else:
+            # the partition tags for don't seem to always be present
+            # and don't always make much sense when they are
+            unknown = -nx.ones(block.tags.shape[:1], dtype=nx.INT_DTYPE)
+            return unknown, unknown, block.tags
 
-        allShapes  = nx.unique(shapeTypes).tolist()
-        maxFaces   = max([self.numFacesPerCell[x] for x in allShapes])
+    def _partitionCells(self, cellBlocks):
+        """
+        Return two lists of `(block, selection, physicalEntities,
+        geometricalEntities)`, the first for non-ghost cells and the second
+        for ghost cells.
 
-        # `cellsToFaces` must be padded with -1; see mesh.py
-        currNumFaces = 0
-        cellsToFaces = nx.ones((numCells, maxFaces), 'l') * -1
-        facesDict    = {}
-        uniqueFaces  = []
-
-        # we now build `cellsToFaces` and `uniqueFaces`,
-        # the latter will result in `facesToVertices`.
-        for cellIdx in range(numCells):
-            shapeType = shapeTypes[cellIdx]
-            cell = cellsToVertIDs[cellIdx]
-
-            if shapeType in [5, 12, 17]: # hexahedron
-                faces = self._extractOrderedFaces(cell=cell,
-                                                  faceOrderings=[[0, 1, 2, 3], # ordering of vertices gleaned from
-                                                                 [4, 5, 6, 7], # a one-cube Grid3D example
-                                                                 [0, 1, 5, 4],
-                                                                 [3, 2, 6, 7],
-                                                                 [0, 3, 7, 4],
-                                                                 [1, 2, 6, 5]])
-            elif shapeType in [6, 13, 18]: # prism
-                faces = self._extractOrderedFaces(cell=cell,
-                                                  faceOrderings=[[0, 1, 2],
-                                                                 [5, 4, 3],
-                                                                 [3, 4, 1, 0],
-                                                                 [4, 5, 2, 1],
-                                                                 [5, 3, 0, 2]])
-            elif shapeType in [7, 14, 19]: # pyramid
-                faces = self._extractOrderedFaces(cell=cell,
-                                                  faceOrderings=[[0, 1, 2, 3],
-                                                                 [0, 1, 4],
-                                                                 [1, 2, 4],
-                                                                 [2, 3, 4],
-                                                                 [3, 0, 4]])
+        All nastiness concerning ghost cell
+        calculation is consolidated here: if we were ever to need to CALCULATE
+        GHOST CELLS OURSELVES, the only code we'd have to change is in here.
+        """
+        pid = self.communicator.procID + 1
+
+        cells = []
+        ghosts = []
+        for block in cellBlocks:
+            physicalEntities, geometricalEntities, tags = self._splitTags(block)
+
+            if tags.shape[1] > 0:
+                # next item is a count
+                counts, tags = tags[:, 0], tags[:, 1:]
+                disagree = nx.flatnonzero(counts != tags.shape[1])
+                if len(disagree) > 0:
+                    warnings.warn("Partition count %d does not agree with number of remaining tags %d." % (counts[disagree[0]], tags.shape[1]),
+                                  SyntaxWarning, stacklevel=3)
+
+            if self.communicator.Nproc > 1:
+                # el is in this processor's partition
+                owned = nx.any(tags == pid, axis=1)
+                # this is our ghost cell
+                ghost = nx.any(tags == -pid, axis=1)
             else:
-                if shapeType in [2, 9, 20, 21, 22, 23, 24, 25]:
-                    faceLength = 2 # triangle
-                elif shapeType in [3, 10, 16]:
-                    faceLength = 2 # quadrangle
-                elif shapeType in [4, 11, 29, 30, 31]:
-                    faceLength = 3 # tetrahedron
-
-                faces = self._extractRegularFaces(cell=cell,
-                                                  faceLength=faceLength,
-                                                  facesPerCell=self.numFacesPerCell[shapeType])
-
-            for faceIdx in range(len(faces)):
-                # NB: currFace is sorted for the key to spot duplicates
-                currFace = faces[faceIdx]
-                keyStr   = ' '.join([str(x) for x in sorted(currFace)])
-
-                if keyStr in facesDict:
-                    cellsToFaces[cellIdx][faceIdx] = facesDict[keyStr]
-                else: # new face
-                    facesDict[keyStr] = currNumFaces
-                    cellsToFaces[cellIdx][faceIdx] = currNumFaces
-                    uniqueFaces.append(currFace)
-                    currNumFaces += 1
-
-        # pad short faces with -1
-        maxFaceLen = max([len(f) for f in uniqueFaces])
-        uniqueFaces = [[-1] * (maxFaceLen - len(f)) + f for f in uniqueFaces]
-
-        facesToVertices = nx.array(uniqueFaces, dtype=nx.INT_DTYPE)
-
-        return facesToVertices.swapaxes(0, 1)[::-1], cellsToFaces.swapaxes(0, 1).copy('C'), facesDict
-
-    def _translateNodesToVertices(self, entitiesNodes, vertexMap):
-        """Translates e`ntitiesNodes` from Gmsh node IDs to `vertexCoords` indices.
+                # we collect all cells
+                owned = nx.ones(block.ids.shape, dtype=bool)
+                ghost = nx.zeros(block.ids.shape, dtype=bool)
+
+            cells.append((block, owned, physicalEntities, geometricalEntities))
+            ghosts.append((block, ghost, physicalEntities, geometricalEntities))
+
+        return cells, ghosts
+
+    def _collectCells(self, selections, maxNodes):
         """
-        entitiesVertices = []
+        Gather the selected cells of every block, in the order they appear
+        in the file.
 
-        for entity in entitiesNodes:
-            try:
-                vertIndices = vertexMap[nx.array(entity)]
-            except IndexError:
-                vertIndices = nx.ones((len(entity),), 'l') * -1
-            entitiesVertices.append(vertIndices)
+        Returns the Gmsh IDs, shape types, Gmsh node IDs (padded with -1 to
+        `maxNodes`), physical entities, and geometrical entities of the
+        cells.
+        """
+        order = []
+        ids = []
+        shapes = []
+        nodes = []
+        physicalEntities = []
+        geometricalEntities = []
+        for block, selection, physical, geometrical in selections:
+            order.append(block.order[selection])
+            ids.append(block.ids[selection])
+            shapes.append(nx.zeros(order[-1].shape, dtype=nx.INT_DTYPE) + block.elType)
+            padded = -nx.ones((len(order[-1]), maxNodes), dtype=nx.INT_DTYPE)
+            padded[:, :block.nodes.shape[1]] = block.nodes[selection]
+            nodes.append(padded)
+            physicalEntities.append(physical[selection])
+            geometricalEntities.append(geometrical[selection])
+
+        order = nx.argsort(nx.concatenate(order + [nx.zeros((0,), nx.INT_DTYPE)]), kind="stable")
+
+        return [nx.concatenate(a + [nx.zeros((0,) + a[0].shape[1:], nx.INT_DTYPE)])[order]
+                for a in (ids, shapes, nodes, physicalEntities, geometricalEntities)]
+
+    def _faceTemplates(self, shapeType, numVerts):
+        """
+        Returns the vertices of each face of a cell of `shapeType` with
+        `numVerts` vertices, as positions within the cell.
+        """
+        if shapeType in [5, 12, 17]: # hexahedron
+            return [[0, 1, 2, 3], # ordering of vertices gleaned from
+                    [4, 5, 6, 7], # a one-cube Grid3D example
+                    [0, 1, 5, 4],
+                    [3, 2, 6, 7],
+                    [0, 3, 7, 4],
+                    [1, 2, 6, 5]]
+        elif shapeType in [6, 13, 18]: # prism
+            return [[0, 1, 2],
+                    [5, 4, 3],
+                    [3, 4, 1, 0],
+                    [4, 5, 2, 1],
+                    [5, 3, 0, 2]]
+        elif shapeType in [7, 14, 19]: # pyramid
+            return [[0, 1, 2, 3],
+                    [0, 1, 4],
+                    [1, 2, 4],
+                    [2, 3, 4],
+                    [3, 0, 4]]
+        else:
+            if shapeType in [2, 9, 20, 21, 22, 23, 24, 25]:
+                faceLength = 2 # triangle
+            elif shapeType in [3, 10, 16]:
+                faceLength = 2 # quadrangle
+            elif shapeType in [4, 11, 29, 30, 31]:
+                faceLength = 3 # tetrahedron
+
+            # faces of a regular poly(gon|hedron)
+            return [[(i + j) % numVerts for j in range(faceLength)] # we may wrap
+                    for i in range(self.numFacesPerCell[shapeType])]
+
+    def _deriveCellsAndFaces(self, cellsToVertIDs, shapeTypes, numVerts):
+        """
+        Uses element information obtained from `_collectCells` to deliver
+        `facesToVertices` and `cellsToFaces`, along with the sorted
+        vertices of each face, to look faces up by.
 
-        return entitiesVertices
+        The faces of all cells of the same shape are extracted at once.
+        Faces are numbered in the order they are first encountered, cell by
+        cell, and short faces are padded with -1 at the front.
+        """
+        numCells = len(shapeTypes)
+
+        kinds = nx.unique(shapeTypes * (numVerts.max() + 1) + numVerts, return_index=True)[1]
+        templates = [(shapeTypes[cell], numVerts[cell], self._faceTemplates(shapeTypes[cell], numVerts[cell]))
+                     for cell in kinds]
+        maxFaces = max([len(faces) for shapeType, verts, faces in templates])
+        maxFaceLen = max([len(face) for shapeType, verts, faces in templates for face in faces])
+
+        faces = -nx.ones((numCells, maxFaces, maxFaceLen), dtype=nx.INT_DTYPE)
+        present = nx.zeros((numCells, maxFaces), dtype=bool)
+        for shapeType, verts, template in templates:
+            cells = nx.flatnonzero((shapeTypes == shapeType) & (numVerts == verts))
+            vertIDs = cellsToVertIDs[cells]
+            for faceIdx, face in enumerate(template):
+                faces[cells, faceIdx, maxFaceLen - len(face):] = vertIDs[:, face]
+            present[cells, :len(template)] = True
+
+        faces = faces[present]
+        # NB: faces are sorted for the key to spot duplicates
+        faceIDs, firsts = _labelRows(_sortRows(faces))
 
-    def _extractRegularFaces(self, cell, faceLength, facesPerCell):
-        """Return faces for a regular poly(gon|hedron)
+        # `cellsToFaces` must be padded with -1; see mesh.py
+        cellsToFaces = -nx.ones((numCells, maxFaces), 'l')
+        cellsToFaces[present] = faceIDs
+
+        facesToVertices = faces[firsts]
 
-        Given `cell`, defined by node IDs, returns an array of
-        `facesPerCell` faces of length `faceLength` in terms of nodes.
+        return (facesToVertices.swapaxes(0, 1)[::-1],
+                cellsToFaces.swapaxes(0, 1).copy('C'),
+                _sortRows(facesToVertices))
+
+    def _mapFaceEntities(self, faceKeys, faceBlocks, vertGIDtoIdx):
         """
-        faces = []
-        for i in range(facesPerCell):
-            aFace = []
-            for j in range(faceLength):
-                aVertex = (i + j) % len(cell) # we may wrap
-                aFace.append(int(cell[aVertex]))
-            faces.append(aFace)
-        return faces
-
-    def _extractOrderedFaces(self, cell, faceOrderings):
-        """Return faces for a 8-node hexahedron cell.
+        Returns the physical and geometrical entity of each FiPy face,
+        taken from the Gmsh face element with the same vertices, if any.
         """
-        def orderingToFace(vertList):
-            aFace = []
-            for i in vertList:
-                aFace.append(int(cell[i]))
-            return aFace
+        numFaces, maxFaceLen = faceKeys.shape
+        physicalFaceMap = nx.zeros((numFaces,), 'l')
+        geometricalFaceMap = nx.zeros((numFaces,), 'l')
+
+        order = []
+        keys = []
+        physicalEntities = []
+        geometricalEntities = []
+        for block in faceBlocks:
+            nodes = block.nodes
+            if nodes.shape[1] > maxFaceLen:
+                continue
+
+            # nodes that aren't part of any cell can't be part of a FiPy face
+            known = nx.all((nodes >= 0) & (nodes < len(vertGIDtoIdx)), axis=1)
+            vertIDs = vertGIDtoIdx[nx.where(known[..., nx.newaxis], nodes, 0)]
+            known &= nx.all(vertIDs >= 0, axis=1)
+
+            key = -nx.ones((known.sum(), maxFaceLen), dtype=nx.INT_DTYPE)
+            key[:, maxFaceLen - nodes.shape[1]:] = _sortRows(vertIDs[known])
+
+            physical, geometrical, tags = self._splitTags(block)
+            order.append(block.order[known])
+            keys.append(key)
+            physicalEntities.append(physical[known])
+            geometricalEntities.append(geometrical[known])
 
-        return [orderingToFace(o) for o in faceOrderings]
+        if len(order) == 0:
+            return physicalFaceMap, geometricalFaceMap
+
+        order = nx.argsort(nx.concatenate(order), kind="stable")
+        keys = nx.concatenate(keys)[order]
+        physicalEntities = nx.concatenate(physicalEntities)[order]
+        geometricalEntities = nx.concatenate(geometricalEntities)[order]
+
+        # FiPy faces are all different, so they are labeled by their own IDs,
+        # and a Gmsh face with a label less than `numFaces` matches that face
+        labels, firsts = _labelRows(nx.concatenate((faceKeys, keys)))
+        labels = labels[numFaces:]
+        matched = nx.flatnonzero(labels < numFaces)
+
+        # the last Gmsh face to match a FiPy face wins
+        faceIDs, last = nx.unique(labels[matched][::-1], return_index=True)
+        matched = matched[::-1][last]
+        physicalFaceMap[faceIDs] = physicalEntities[matched]
+        geometricalFaceMap[faceIDs] = geometricalEntities[matched]
+
+        return physicalFaceMap, geometricalFaceMap
+
+    def _parseNames(self, data, end):
+        physicalNames = {
+            0: dict(),
+            1: dict(),
+            2: dict(),
+            3: dict()
+        }
+
+        start = self._findSection(data, "PhysicalNames", end=end)
+        if start >= 0:
+            lines = self._sectionText(data, "PhysicalNames", start).decode("utf-8").splitlines()
+
+            for nm in lines[1:]: # skip number of elements
+                nm = nm.split()
+                if len(nm) == 0:
+                    continue
+                if self.version > 2.0:
+                    dim = [int(nm.pop(0))]
+                else:
+                    # Gmsh format prior to 2.1 did not unambiguously tie
+                    # physical names to physical entities of different dimensions
+                    # http://article.gmane.org/gmane.comp.cad.gmsh.general/1601
+                    dim = [0, 1, 2, 3]
+                num = int(nm.pop(0))
+                name = " ".join(nm)[1:-1]
+                for d in dim:
+                    physicalNames[d][name] = int(num)
+
+        return physicalNames
 
     def read(self):
         """
-        0. Build `cellsToVertices`
-        1. Recover needed `vertexCoords` and mapping from file using
+        0. Read the `$Nodes` and `$Elements` sections in bulk
+        1. Sort elements into cells, ghost cells, and faces
+        2. Recover needed `vertexCoords` and mapping from file using
            `cellsToVertices`
-        2. Build `cellsToVertIDs` proper from `vertexCoords` and vertex map
-        3. Build faces
-        4. Build `cellsToFaces`
+        3. Build `cellsToVertIDs` proper from `vertexCoords` and vertex map
+        4. Build faces
+        5. Build `cellsToFaces`
 
-        Isolate relevant data into three files, store in
-        `self.nodesPath` for `$Nodes`,
-        `self.elemsPath` for `$Elements`.
-        `self.namesFile` for `$PhysicalNames`.
+        ASCII and binary files of MSH format 2 and 4.1 are read.
+        Partitioned meshes must be in MSH format 2.
 
         Returns `vertexCoords`, `facesToVertexID`, `cellsToFaceID`,
                 `cellGlobalIDMap`, `ghostCellGlobalIDMap`.
         """
-        self.version, self.fileType, self.dataSize = self._getMetaData()
-        self.nodesPath = self._isolateData("Nodes")
-        self.elemsPath = self._isolateData("Elements")
-        try:
-            self.namesPath = self._isolateData("PhysicalNames")
-        except EOFError as e:
-            self.namesPath = None
+        with open(self.filename, 'rb') as f:
+            data = f.read()
+
+        (self.version,
+         self.fileType,
+         self.dataSize,
+         self.byteorder) = self._getMetaData(data)
+
+        if 3 <= self.version < 4.1:
+            raise GmshException("Gmsh MSH file format version %g is not supported. Save the mesh in format 2.2 or 4.1." % self.version)
+        elif self.version >= 5:
+            raise GmshException("Gmsh MSH file format version %g is not supported" % self.version)
+        elif self.version >= 4 and self.communicator.Nproc > 1:
+            raise GmshException("Partitioned meshes must be saved in Gmsh MSH file format 2")
+
+        nodesStart = self._findSection(data, "Nodes")
+        if nodesStart < 0:
+            raise EOFError("No `Nodes' header found!")
+
+        if self.version >= 4:
+            entities = self._readEntities(data, self._findSection(data, "Entities", end=nodesStart))
+        else:
+            entities = None
 
-        try:
-            if self.dimensions is None:
-                nodesFile = open(self.nodesPath, 'r')
-                nodesFile.readline() # skip number of nodes
+        parprint("Parsing nodes.")
+        nodeIDs, nodeCoords, nodesEnd = self._readNodes(data, nodesStart)
 
-                # We assume we have a 2D file unless we find a node
-                # with a non-zero Z coordinate
-                self.dimensions = 2
-                for node in nodesFile:
-                    line   = node.split()
+        elementsStart = self._findSection(data, "Elements", start=nodesEnd)
+        if elementsStart < 0:
+            raise EOFError("No `Elements' header found!")
 
-                    newVert = [float(x) for x in line]
+        parprint("Parsing elements.")
+        blocks = self._readElements(data, elementsStart, entities)
 
-                    if newVert[2] != 0.0:
-                        self.dimensions = 3
-                        break
+        self.physicalNames = self._parseNames(data, end=nodesStart)
+
+        del data
 
-                nodesFile.close()
-
-            self.coordDimensions = self.coordDimensions or self.dimensions
-
-            # we need a conditional here so we don't pick up 2D shapes in 3D
-            if self.dimensions == 2:
-                self.numVertsPerFace = {1: 2, # 2-node line
-                                        8: 2} # 3-node line
-                self.numFacesPerCell = { 2: 3, # 3-node triangle (3 faces)
-                                         9: 3, # 6-node triangle (we only read 1st 3)
-                                        20: 3, # 9-node triangle (we only read 1st 3)
-                                        21: 3, # 10-node triangle (we only read 1st 3)
-                                        22: 3, # 12-node triangle (we only read 1st 3)
-                                        23: 3, # 15-node triangle (we only read 1st 3)
-                                        24: 3, # 15-node triangle (we only read 1st 3)
-                                        25: 3, # 21-node triangle (we only read 1st 3)
-                                         3: 4, # 4-node quadrangle (4 faces)
-                                        10: 4, # 9-node quadrangle (we only read 1st 4)
-                                        16: 4} # 8-node quadrangle (we only read 1st 4)
-            elif self.dimensions == 3:
-                self.numVertsPerFace = { 2: 3, # 3-node triangle (3 vertices)
-                                         9: 3, # 6-node triangle (we only read 1st 3)
-                                        20: 3, # 9-node triangle (we only read 1st 3)
-                                        21: 3, # 10-node triangle (we only read 1st 3)
-                                        22: 3, # 12-node triangle (we only read 1st 3)
-                                        23: 3, # 15-node triangle (we only read 1st 3)
-                                        24: 3, # 15-node triangle (we only read 1st 3)
-                                        25: 3, # 21-node triangle (we only read 1st 3)
-                                         3: 4, # 4-node quadrangle (4 vertices)
-                                        10: 4, # 9-node quadrangle (we only read 1st 4)
-                                        16: 4} # 8-node quadrangle (we only read 1st 4)
-                self.numFacesPerCell = { 4: 4, # 4-node tetrahedron (4 faces)
-                                        11: 4, # 10-node tetrahedron (we only read 1st 4)
-                                        29: 4, # 20-node tetrahedron (we only read 1st 4)
-                                        30: 4, # 35-node tetrahedron (we only read 1st 4)
-                                        31: 4, # 56-node tetrahedron (we only read 1st 4)
-                                         5: 6, # 8-node hexahedron (6 faces)
-                                        12: 6, # 27-node tetrahedron (we only read 1st 6)
-                                        17: 6, # 20-node tetrahedron (we only read 1st 6)
-                                         6: 5, # 6-node prism (5 faces)
-                                        13: 5, # 18-node prism (we only read 1st 6)
-                                        18: 5, # 15-node prism (we only read 1st 6)
-                                         7: 5, # 5-node pyramid (5 faces)
-                                        14: 5, # 14-node pyramid (we only read 1st 5)
-                                        19: 5} # 13-node pyramid (we only read 1st 5)
+        if self.dimensions is None:
+            # We assume we have a 2D file unless we find a node
+            # with a non-zero Z coordinate
+            if nx.any(nodeCoords[:, 2] != 0.0):
+                self.dimensions = 3
             else:
-                raise GmshException("Mesh has fewer than 2 or more than 3 dimensions")
-
-            parprint("Parsing elements.")
-            (cellsData,
-             ghostsData,
-             facesData) = self._parseElementFile()
-
-            cellsToGmshVerts = cellsData.nodes + ghostsData.nodes
-            numCellsTotal    = len(cellsData.nodes) + len(ghostsData.nodes)
-            allShapeTypes    = cellsData.shapes + ghostsData.shapes
-            allShapeTypes    = nx.array(allShapeTypes)
-            allShapeTypes    = nx.delete(allShapeTypes, nx.s_[numCellsTotal:])
-            self.physicalCellMap = nx.array(cellsData.physicalEntities
-                                            + ghostsData.physicalEntities)
-            self.geometricalCellMap = nx.array(cellsData.geometricalEntities
-                                               + ghostsData.geometricalEntities)
-
-            if numCellsTotal < 1:
-                errStr = "Gmsh hasn't produced any cells! Check your Gmsh code."
-                errStr += "\n\nGmsh output:\n%s" % "".join(self.gmshOutput).rstrip()
-                raise GmshException(errStr)
-
-            parprint("Recovering coords.")
-            parprint("numcells %d" % numCellsTotal)
-            vertexCoords, vertIDtoIdx = self._vertexCoordsAndMap(cellsToGmshVerts)
-
-            # translate Gmsh IDs to `vertexCoord` indices
-            cellsToVertIDs = self._translateNodesToVertices(cellsToGmshVerts,
-                                                            vertIDtoIdx)
-
-            parprint("Building cells and faces.")
-            (facesToV,
-             cellsToF,
-             facesDict) = self._deriveCellsAndFaces(cellsToVertIDs,
-                                                    allShapeTypes,
-                                                    numCellsTotal)
-
-            # cell entities were easy to record on parsing
-            # but we don't use Gmsh faces, so we need to correlate the nodes
-            # that make up the Gmsh faces with the vertex IDs of the FiPy faces
-            # so that we can check if any are named
-            faceEntitiesDict = dict()
-
-            # translate Gmsh IDs to `vertexCoord` indices
-            facesToVertIDs = self._translateNodesToVertices(facesData.nodes,
-                                                            vertIDtoIdx)
-
-            for face, physicalEntity, geometricalEntity in zip(facesToVertIDs,
-                                                               facesData.physicalEntities,
-                                                               facesData.geometricalEntities):
-                faceEntitiesDict[' '.join([str(x) for x in sorted(face)])] = (physicalEntity, geometricalEntity)
-
-            self.physicalFaceMap = nx.zeros(facesToV.shape[-1:], 'l')
-            self.geometricalFaceMap = nx.zeros(facesToV.shape[-1:], 'l')
-            for face in list(facesDict.keys()):
-                # not all faces are necessarily tagged
-                if face in faceEntitiesDict:
-                    self.physicalFaceMap[facesDict[face]] = faceEntitiesDict[face][0]
-                    self.geometricalFaceMap[facesDict[face]] = faceEntitiesDict[face][1]
-
-            self.physicalNames = self._parseNamesFile()
+                self.dimensions = 2
 
-        finally:
-            os.unlink(self.nodesPath)
-            os.unlink(self.elemsPath)
-            if self.namesPath is not None:
-                os.unlink(self.namesPath)
-
-        # convert lists of cell vertices to a properly oriented masked array
-        maxVerts = max([len(v) for v in cellsToVertIDs])
-        # ticket:539 - NumPy 1.7 casts to array before concatenation and empty array defaults to float
-        cellsToVertIDs = [nx.concatenate((v, nx.array([-1] * (maxVerts-len(v)), dtype=nx.INT_DTYPE))) for v in cellsToVertIDs]
+        self.coordDimensions = self.coordDimensions or self.dimensions
+
+        # we need a conditional here so we don't pick up 2D shapes in 3D
+        if self.dimensions == 2:
+            self.numVertsPerFace = {1: 2, # 2-node line
+                                    8: 2} # 3-node line
+            self.numFacesPerCell = { 2: 3, # 3-node triangle (3 faces)
+                                     9: 3, # 6-node triangle (we only read 1st 3)
+                                    20: 3, # 9-node triangle (we only read 1st 3)
+                                    21: 3, # 10-node triangle (we only read 1st 3)
+                                    22: 3, # 12-node triangle (we only read 1st 3)
+                                    23: 3, # 15-node triangle (we only read 1st 3)
+                                    24: 3, # 15-node triangle (we only read 1st 3)
+                                    25: 3, # 21-node triangle (we only read 1st 3)
+                                     3: 4, # 4-node quadrangle (4 faces)
+                                    10: 4, # 9-node quadrangle (we only read 1st 4)
+                                    16: 4} # 8-node quadrangle (we only read 1st 4)
+        elif self.dimensions == 3:
+            self.numVertsPerFace = { 2: 3, # 3-node triangle (3 vertices)
+                                     9: 3, # 6-node triangle (we only read 1st 3)
+                                    20: 3, # 9-node triangle (we only read 1st 3)
+                                    21: 3, # 10-node triangle (we only read 1st 3)
+                                    22: 3, # 12-node triangle (we only read 1st 3)
+                                    23: 3, # 15-node triangle (we only read 1st 3)
+                                    24: 3, # 15-node triangle (we only read 1st 3)
+                                    25: 3, # 21-node triangle (we only read 1st 3)
+                                     3: 4, # 4-node quadrangle (4 vertices)
+                                    10: 4, # 9-node quadrangle (we only read 1st 4)
+                                    16: 4} # 8-node quadrangle (we only read 1st 4)
+            self.numFacesPerCell = { 4: 4, # 4-node tetrahedron (4 faces)
+                                    11: 4, # 10-node tetrahedron (we only read 1st 4)
+                                    29: 4, # 20-node tetrahedron (we only read 1st 4)
+                                    30: 4, # 35-node tetrahedron (we only read 1st 4)
+                                    31: 4, # 56-node tetrahedron (we only read 1st 4)
+                                     5: 6, # 8-node hexahedron (6 faces)
+                                    12: 6, # 27-node tetrahedron (we only read 1st 6)
+                                    17: 6, # 20-node tetrahedron (we only read 1st 6)
+                                     6: 5, # 6-node prism (5 faces)
+                                    13: 5, # 18-node prism (we only read 1st 6)
+                                    18: 5, # 15-node prism (we only read 1st 6)
+                                     7: 5, # 5-node pyramid (5 faces)
+                                    14: 5, # 14-node pyramid (we only read 1st 5)
+                                    19: 5} # 13-node pyramid (we only read 1st 5)
+        else:
+            raise GmshException("Mesh has fewer than 2 or more than 3 dimensions")
+
+        cellBlocks = [block for block in blocks if block.elType in self.numFacesPerCell]
+        faceBlocks = [block for block in blocks if block.elType in self.numVertsPerFace]
+
+        # this will be subtracted from gmsh ID to obtain global ID
+        firstCells = [(block.order[0], block.ids[0]) for block in cellBlocks if len(block.ids) > 0]
+        if len(firstCells) > 0:
+            cellOffset = min(firstCells)[1]
+
+        cells, ghosts = self._partitionCells(cellBlocks)
+
+        numCells = sum([selection.sum() for block, selection, physical, geometrical in cells])
+        numCellsTotal = numCells + sum([selection.sum() for block, selection, physical, geometrical in ghosts])
+
+        if numCellsTotal < 1:
+            errStr = "Gmsh hasn't produced any cells! Check your Gmsh code."
+            errStr += "\n\nGmsh output:\n%s" % "".join(self.gmshOutput).rstrip()
+            raise GmshException(errStr)
+
+        maxNodes = max([block.nodes.shape[1]
+                        for block, selection, physical, geometrical in cells + ghosts
+                        if selection.any()])
+
+        (cellIDs,
+         shapeTypes,
+         cellsToGmshVerts,
+         physicalEntities,
+         geometricalEntities) = [nx.concatenate(pair)
+                                 for pair in zip(self._collectCells(cells, maxNodes),
+                                                 self._collectCells(ghosts, maxNodes))]
+
+        self.physicalCellMap = physicalEntities.astype('l')
+        self.geometricalCellMap = geometricalEntities.astype('l')
+
+        parprint("Recovering coords.")
+        parprint("numcells %d" % numCellsTotal)
+        vertexCoords, vertGIDtoIdx = self._vertexCoordsAndMap(cellsToGmshVerts, nodeIDs, nodeCoords)
+
+        # translate Gmsh IDs to `vertexCoord` indices
+        isVertex = cellsToGmshVerts >= 0
+        cellsToVertIDs = nx.where(isVertex, vertGIDtoIdx[nx.where(isVertex, cellsToGmshVerts, 0)], -1)
+
+        parprint("Building cells and faces.")
+        (facesToV,
+         cellsToF,
+         faceKeys) = self._deriveCellsAndFaces(cellsToVertIDs,
+                                               shapeTypes,
+                                               isVertex.sum(axis=1))
+
+        # cell entities were easy to record on parsing
+        # but we don't use Gmsh faces, so we need to correlate the nodes
+        # that make up the Gmsh faces with the vertex IDs of the FiPy faces
+        # so that we can check if any are named
+        (self.physicalFaceMap,
+         self.geometricalFaceMap) = self._mapFaceEntities(faceKeys, faceBlocks, vertGIDtoIdx)
+
+        # convert cell vertices to a properly oriented masked array
         cellsToVertIDs = nx.MA.masked_equal(cellsToVertIDs, value=-1).swapaxes(0, 1)
 
         parprint("Done with cells and faces.")
-        return (vertexCoords, facesToV, cellsToF,
-                cellsData.idmap, ghostsData.idmap,
-                cellsToVertIDs)
+        result = (vertexCoords, facesToV, cellsToF,
+                  (cellIDs[:numCells] - cellOffset).tolist(),
+                  (cellIDs[numCells:] - cellOffset).tolist(),
+                  cellsToVertIDs)
+
+        if self.cacheFile is not None:
+            self._writeCache(result)
+
+        return result
+
+    _cachedArrays = ("vertexCoords", "faceVertexIDs", "cellFaceIDs",
+                     "cellGlobalIDs", "ghostCellGlobalIDs", "cellVertexIDs")
+
+    _cachedMaps = ("physicalCellMap", "geometricalCellMap",
+                   "physicalFaceMap", "geometricalFaceMap")
+
+    def _writeCache(self, result):
+        """
+        Keep the result of `read()`, and the entity maps, in `cacheFile`.
+
+        The file is written under another name and then renamed, so that
+        a run that is interrupted, or another run that reads the cache,
+        never sees it half written.
+        """
+        import json
+        from fipy.tools.dump import _NPZStore
+
+        meta = dict(dimensions=self.dimensions,
+                    coordDimensions=self.coordDimensions,
+                    version=self.version,
+                    fileType=self.fileType,
+                    dataSize=self.dataSize,
+                    physicalNames=self.physicalNames)
+
+        (f, tmp) = tempfile.mkstemp(suffix=".npz", dir=os.path.dirname(self.cacheFile))
+        os.close(f)
+        try:
+            store = _NPZStore(tmp, mode="w")
+            try:
+                arrays = dict(zip(self._cachedArrays, result))
+                for name in ("cellGlobalIDs", "ghostCellGlobalIDs"):
+                    arrays[name] = nx.array(arrays[name], dtype=nx.INT_DTYPE)
+                arrays["cellVertexIDs"] = nx.MA.filled(arrays["cellVertexIDs"], -1)
+                for name in self._cachedArrays:
+                    store[name] = arrays[name]
+                for name in self._cachedMaps:
+                    store[name] = nx.asarray(getattr(self, name))
+                store["meta"] = nx.frombuffer(json.dumps(meta).encode('utf-8'), dtype=nx.uint8)
+            finally:
+                store.close()
+            os.replace(tmp, self.cacheFile)
+        except Exception:
+            os.unlink(tmp)
+            raise
 
     def write(self, obj, time=0.0, timeindex=0):
         if not self.formatWritten:
@@ -996,176 +1438,33 @@ class MSHFile(GmshFile):
 
         self.fileobj.write("$EndElementData\n")
 
-    def _vertexCoordsAndMap(self, cellsToGmshVerts):
+    def _vertexCoordsAndMap(self, cellsToGmshVerts, nodeIDs, nodeCoords):
         """
         Returns `vertexCoords` and mapping from Gmsh ID to `vertexCoords`
-        indices (same as in `MSHFile`).
+        indices.
 
-        Unlike parent, doesn't use `genfromtxt`
-        because we want to avoid loading the entire `.msh` file into memory.
+        Only the nodes that belong to cells become vertices.
         """
-        allVerts     = [v for c in cellsToGmshVerts for v in c] # flatten
-        allVerts     = nx.unique(nx.array(allVerts, dtype=nx.INT_DTYPE)) # remove dups
-        allVerts     = nx.sort(allVerts)
+        isVertex     = nx.zeros(cellsToGmshVerts.max() + 1, dtype=bool)
+        isVertex[cellsToGmshVerts[cellsToGmshVerts >= 0]] = True
+        allVerts     = nx.flatnonzero(isVertex) # sorted, without dups
         maxVertIdx   = allVerts[-1] + 1 # add one to offset zero
-        vertGIDtoIdx = nx.ones(maxVertIdx, 'l') * -1 # gmsh ID -> vertexCoords idx
-        vertexCoords = nx.empty((len(allVerts), self.coordDimensions))
-        nodeCount    = 0
+        vertGIDtoIdx = -nx.ones(maxVertIdx, 'l') # gmsh ID -> vertexCoords idx
 
         # establish map. This works because allVerts is a sorted set.
         vertGIDtoIdx[allVerts] = nx.arange(len(allVerts))
 
-        nodesFile = open(self.nodesPath, 'r')
-        nodesFile.readline() # skip number of nodes
-
-        # now we walk through node file with a sorted unique list of vertices
-        # in hand. When we encounter 0th element in `allVerts`, save it
-        # to `vertexCoords` then pop its ID off `allVerts`.
-        for node in nodesFile:
-            line   = node.split()
-            nodeID = int(line[0])
-
-            if nodeID == allVerts[nodeCount]:
-                newVert = [float(x) for x in line[1:self.coordDimensions+1]]
-                vertexCoords[nodeCount,:] = nx.array(newVert)
-                nodeCount += 1
-
-            if len(allVerts) == nodeCount:
-                break
-
-        nodesFile.close()
+        # find the nodes, which Gmsh need not have written in order
+        sorter = nx.argsort(nodeIDs, kind="stable")
+        found = nx.searchsorted(nodeIDs, allVerts, sorter=sorter)
+        found = sorter[nx.minimum(found, len(sorter) - 1)]
+        if len(nodeIDs) == 0 or nx.any(nodeIDs[found] != allVerts):
+            raise GmshException("Elements refer to nodes that are not in the `$Nodes' section")
 
         # transpose for FiPy
-        transCoords = vertexCoords.swapaxes(0, 1)
+        transCoords = nodeCoords[found, :self.coordDimensions].swapaxes(0, 1)
         return transCoords, vertGIDtoIdx
 
-    def _parseElementFile(self):
-        """
-        Return three objects, the first for non-ghost cells, the second for
-        ghost cells, and the third for faces.
-
-        All nastiness concerning ghost cell
-        calculation is consolidated here: if we were ever to need to CALCULATE
-        GHOST CELLS OURSELVES, the only code we'd have to change is in here.
-        """
-
-        def _parseTags(offset, currLineInts):
-            if offset == -1:
-                # if first valid shape
-                offset = currLineInts[0]
-
-            numTags = currLineInts[2]
-            tags    = currLineInts[3:(3+numTags)]
-
-            # the partition tags for don't seem to always be present
-            # and don't always make much sense when they are
-
-            if len(tags) >= 2:
-                physicalEntity = tags.pop(0)
-                geometricalEntity = tags.pop(0)
-            else:
-                physicalEntity = geometricalEntity = -1
-
-            return offset, tags, physicalEntity, geometricalEntity
-
-
-        cellsData = _ElementData()
-        ghostsData = _ElementData()
-        facesData = _ElementData()
-
-        cellOffset = -1 # this will be subtracted from gmsh ID to obtain global ID
-        faceOffset = -1 # this will be subtracted from gmsh ID to obtain global ID
-        pid = self.communicator.procID + 1
-
-        elemsFile = open(self.elemsPath, 'r')
-
-        elemsFile.readline() # skip number of elements
-        for el in elemsFile:
-            currLineInts = [int(x) for x in el.split()]
-            elemType     = currLineInts[1]
-
-            if elemType in list(self.numFacesPerCell.keys()):
-                # element is a cell
-
-                (cellOffset,
-                 tags,
-                 physicalEntity,
-                 geometricalEntity) = _parseTags(offset=cellOffset,
-                                                 currLineInts=currLineInts)
-                currLineInts[0] -= cellOffset
-
-                if len(tags) > 0:
-                    # next item is a count
-                    if tags[0] != len(tags) - 1:
-                        warnings.warn("Partition count %d does not agree with number of remaining tags %d." % (tags[0], len(tags) - 1),
-                                      SyntaxWarning, stacklevel=2)
-                    tags = tags[1:]
-
-                if self.communicator.Nproc > 1:
-                    for tag in tags:
-                        if -tag == pid:
-                            # if we're collecting ghost cells and this is our ghost cell
-                            ghostsData.add(currLine=currLineInts, elType=elemType,
-                                           physicalEntity=physicalEntity,
-                                           geometricalEntity=geometricalEntity)
-                        elif tag == pid:
-                            # el is in this processor's partition or we collect all cells
-                            cellsData.add(currLine=currLineInts, elType=elemType,
-                                          physicalEntity=physicalEntity,
-                                          geometricalEntity=geometricalEntity)
-                else:
-                    # we collect all cells
-                    cellsData.add(currLine=currLineInts, elType=elemType,
-                                  physicalEntity=physicalEntity,
-                                  geometricalEntity=geometricalEntity)
-            elif elemType in list(self.numVertsPerFace.keys()):
-                # element is a face
-
-                (faceOffset,
-                 tags,
-                 physicalEntity,
-                 geometricalEntity) = _parseTags(offset=faceOffset,
-                                                 currLineInts=currLineInts)
-                currLineInts[0] -= faceOffset
-
-                facesData.add(currLine=currLineInts, elType=elemType,
-                              physicalEntity=physicalEntity,
-                              geometricalEntity=geometricalEntity)
-
-        elemsFile.close()
-
-        return cellsData, ghostsData, facesData
-
-
-    def _parseNamesFile(self):
-        physicalNames = {
-            0: dict(),
-            1: dict(),
-            2: dict(),
-            3: dict()
-        }
-        if self.namesPath is not None:
-            namesFile = open(self.namesPath, 'r')
-
-            namesFile.readline() # skip number of elements
-            for nm in namesFile:
-                nm = nm.split()
-                if self.version > 2.0:
-                    dim = [int(nm.pop(0))]
-                else:
-                    # Gmsh format prior to 2.1 did not unambiguously tie
-                    # physical names to physical entities of different dimensions
-                    # http://article.gmane.org/gmane.comp.cad.gmsh.general/1601
-                    dim = [0, 1, 2, 3]
-                num = int(nm.pop(0))
-                name = " ".join(nm)[1:-1]
-                for d in dim:
-                    physicalNames[d][name] = int(num)
-
-            namesFile.close()
-
-        return physicalNames
-
     def makeMapVariables(self, mesh):
         """Utility function to make `MeshVariables` that define different domains in the mesh
         """
@@ -1263,36 +1562,289 @@ class MSHFile(GmshFile):
         ...     p = Popen(["gmsh", os.path.join(dir, "cyl.msh")]) # doctest: +GMSH
         ...     doctest_raw_input("CylindricalGrid2D... Press enter.")
 
+        Test importing, which doesn't need Gmsh when the `MSH` file exists
+
+        >>> f = openMSHFile(name=os.path.join(dir, "t2.msh"), mode='w') # doctest: +SERIAL
+        >>> f.write(t) # doctest: +SERIAL
+        >>> f.close() # doctest: +SERIAL
+        >>> tt = Gmsh2D(os.path.join(dir, "t2.msh"), communicator=serialComm) # doctest: +SERIAL
+        >>> print(tt.numberOfCells, tt.numberOfFaces) # doctest: +SERIAL
+        400 620
+        >>> print(nx.allclose(tt.cellCenters, t.cellCenters)) # doctest: +SERIAL
+        True
+
+        Binary files are read, too
+
+        >>> import struct
+        >>> with open(os.path.join(dir, "binary.msh"), "wb") as f:
+        ...     _ = f.write(b"$MeshFormat\\n2.2 1 8\\n" + struct.pack("<i", 1) + b"\\n$EndMeshFormat\\n")
+        ...     _ = f.write(b'$PhysicalNames\\n1\\n1 2 "bottom"\\n$EndPhysicalNames\\n')
+        ...     _ = f.write(b"$Nodes\\n4\\n")
+        ...     for node, (x, y) in enumerate([(0, 0), (1, 0), (1, 1), (0, 1)]):
+        ...         _ = f.write(struct.pack("<i3d", node + 1, x, y, 0.))
+        ...     _ = f.write(b"\\n$EndNodes\\n$Elements\\n3\\n")
+        ...     # two triangles, then a line on the bottom
+        ...     _ = f.write(struct.pack("<3i12i", 2, 2, 2,
+        ...                             1, 1, 1, 1, 2, 3,
+        ...                             2, 1, 1, 1, 3, 4))
+        ...     _ = f.write(struct.pack("<3i5i", 1, 1, 2,
+        ...                             3, 2, 5, 1, 2))
+        ...     _ = f.write(b"\\n$EndElements\\n")
+        >>> square = Gmsh2D(os.path.join(dir, "binary.msh"), communicator=serialComm)
+        >>> print(square.numberOfCells, square.cellVolumes.sum())
+        2 1.0
+        >>> print(square.physicalFaces["bottom"].value)
+        [ True False False False False]
+
+        as are files in format 4.1
+
+        >>> with open(os.path.join(dir, "msh41.msh"), "w") as f:
+        ...     _ = f.write('''$MeshFormat
+        ... 4.1 0 8
+        ... $EndMeshFormat
+        ... $Nodes
+        ... 1 4 1 4
+        ... 2 1 0 4
+        ... 1
+        ... 2
+        ... 3
+        ... 4
+        ... 0 0 0
+        ... 1 0 0
+        ... 1 1 0
+        ... 0 1 0
+        ... $EndNodes
+        ... $Elements
+        ... 1 2 1 2
+        ... 2 1 2 2
+        ... 1 1 2 3
+        ... 2 1 3 4
+        ... $EndElements
+        ... ''')
+        >>> square = Gmsh2D(os.path.join(dir, "msh41.msh"), communicator=serialComm)
+        >>> print(square.numberOfCells, square.geometricalCellMap.value)
+        2 [1 1]
+
         >>> import shutil
         >>> shutil.rmtree(dir)
         """
         pass
 
-class _ElementData(object):
+class _CachedMSHFile(MSHFile):
     """
-    Bookkeeping for cells. Declared as own class for generality.
+    Stands in for the `MSHFile` that Gmsh would have made, with what its
+    `read()` found taken from the mesh cache.
+
+    The arrays of the mesh are mapped from the cache, not read.
+    """
+    def __init__(self, cacheFile, dimensions, coordDimensions, communicator):
+        self.filename = cacheFile
+        self.communicator = communicator
+        self.dimensions = dimensions
+        self.coordDimensions = coordDimensions
+        self.gmshOutput = ""
+        self.cacheFile = None
+        self.fileIsTemporary = False
+
+    def read(self):
+        import json
+        from fipy.tools.dump import _NPZStore
+
+        store = _NPZStore(self.filename)
+        try:
+            (vertexCoords,
+             faceVertexIDs,
+             cellFaceIDs,
+             cellGlobalIDs,
+             ghostCellGlobalIDs,
+             cellVertexIDs) = [self._map(store, name) for name in self._cachedArrays]
+            for name in self._cachedMaps:
+                setattr(self, name, self._map(store, name))
+            meta = json.loads(nx.array(store["meta"]).tobytes().decode('utf-8'))
+        finally:
+            store.close()
+
+        self.dimensions = meta["dimensions"]
+        self.coordDimensions = meta["coordDimensions"]
+        self.version = meta["version"]
+        self.fileType = meta["fileType"]
+        self.dataSize = meta["dataSize"]
+        # JSON only has strings for keys
+        self.physicalNames = dict((int(dim), names)
+                                  for dim, names in meta["physicalNames"].items())
+
+        return (vertexCoords, faceVertexIDs, cellFaceIDs,
+                cellGlobalIDs.tolist(),
+                ghostCellGlobalIDs.tolist(),
+                nx.MA.masked_equal(cellVertexIDs, value=-1))
+
+    @staticmethod
+    def _map(store, name):
+        # still mapped, but `numerix` only takes from plain arrays
+        return store[name].view(nx.ndarray)
+
+    def close(self):
+        pass
+
+# number of nodes of each type of Gmsh element
+_nodesPerElement = {
+     1: 2,  # 2-node line
+     2: 3,  # 3-node triangle
+     3: 4,  # 4-node quadrangle
+     4: 4,  # 4-node tetrahedron
+     5: 8,  # 8-node hexahedron
+     6: 6,  # 6-node prism
+     7: 5,  # 5-node pyramid
+     8: 3,  # 3-node line
+     9: 6,  # 6-node triangle
+    10: 9,  # 9-node quadrangle
+    11: 10, # 10-node tetrahedron
+    12: 27, # 27-node hexahedron
+    13: 18, # 18-node prism
+    14: 14, # 14-node pyramid
+    15: 1,  # 1-node point
+    16: 8,  # 8-node quadrangle
+    17: 20, # 20-node hexahedron
+    18: 15, # 15-node prism
+    19: 13, # 13-node pyramid
+    20: 9,  # 9-node triangle
+    21: 10, # 10-node triangle
+    22: 12, # 12-node triangle
+    23: 15, # 15-node triangle
+    24: 15, # 15-node triangle
+    25: 21, # 21-node triangle
+    26: 4,  # 4-node line
+    27: 5,  # 5-node line
+    28: 6,  # 6-node line
+    29: 20, # 20-node tetrahedron
+    30: 35, # 35-node tetrahedron
+    31: 56, # 56-node tetrahedron
+    92: 64, # 64-node hexahedron
+    93: 125 # 125-node hexahedron
+}
+
+def _sortRows(rows):
+    """Sort each of the short rows of `rows`
+
+    >>> print(_sortRows(nx.array([[3, 1, 2], [-1, 5, 4]])))
+    [[ 1  2  3]
+     [-1  4  5]]
+    """
+    rows = nx.array(rows, dtype=nx.INT_DTYPE)
+    width = rows.shape[1]
+    # a bubble sort of the columns beats sorting millions of tiny rows
+    for i in range(width - 1):
+        for j in range(width - 1 - i):
+            lower = nx.minimum(rows[:, j], rows[:, j + 1])
+            rows[:, j + 1] = nx.maximum(rows[:, j], rows[:, j + 1])
+            rows[:, j] = lower
+    return rows
+
+def _labelRows(rows):
+    """Number the distinct rows of `rows` in the order they first appear
+
+    Returns the label of each row and the index of the first appearance
+    of each label.
+
+    >>> labels, firsts = _labelRows(nx.array([[3, 4], [1, 2], [3, 4], [0, 5]]))
+    >>> print(labels)
+    [0 1 0 2]
+    >>> print(firsts)
+    [0 1 3]
+    """
+    if len(rows) == 0:
+        return nx.zeros((0,), dtype=nx.INT_DTYPE), nx.zeros((0,), dtype=nx.INT_DTYPE)
+
+    # rows of small numbers are sorted fastest as one number
+    low = rows.min()
+    span = float(rows.max() - low + 1)
+    if span**rows.shape[1] < 2.**62:
+        key = nx.zeros(rows.shape[:1], dtype=nx.INT_DTYPE)
+        for column in rows.swapaxes(0, 1):
+            key = key * int(span) + (column - low)
+        order = nx.argsort(key)
+        sortedKey = key[order]
+        new = nx.concatenate(([True], sortedKey[1:] != sortedKey[:-1]))
+    else:
+        order = nx.lexsort(rows.swapaxes(0, 1)[::-1])
+        sortedRows = rows[order]
+        new = nx.concatenate(([True], nx.any(sortedRows[1:] != sortedRows[:-1], axis=1)))
+
+    # equal rows need not be sorted in order of appearance
+    firsts = nx.minimum.reduceat(order, nx.flatnonzero(new))
+    ranks = nx.empty(len(firsts), dtype=nx.INT_DTYPE)
+    ranks[nx.argsort(firsts)] = nx.arange(len(firsts))
+    labels = nx.empty(len(rows), dtype=nx.INT_DTYPE)
+    labels[order] = ranks[nx.cumsum(new) - 1]
+    return labels, nx.sort(firsts)
+
+class _MSH4Reader(object):
+    """
+    Reads the numbers of an MSH 4.1 section in sequence, whether the file
+    is ASCII or binary.
+
+    In a binary file, `int` values take four bytes, `size_t` values take
+    `dataSize` bytes, and `double` values take eight.
+    """
+    def __init__(self, data, start, fileType, byteorder, dataSize, title, dtype):
+        self.binary = (fileType == 1)
+        if self.binary:
+            self.data = data
+            self.pos = start
+            self.end = start
+            self.dtypes = {'i': byteorder + "i4",
+                           'n': "%su%d" % (byteorder, dataSize),
+                           'd': byteorder + "f8"}
+        else:
+            end = data.find(("$End%s" % title).encode("ascii"), start)
+            if end < 0:
+                raise EOFError("No `End%s' footer found!" % title)
+            self.values = nx.fromstring(data[start:end], dtype=dtype, sep=" ")
+            self.pos = 0
+            self.end = end
+        self.title = title
+
+    def read(self, count, kind):
+        """
+        Returns the next `count` numbers of `kind`, one of 'i' for `int`,
+        'n' for `size_t`, or 'd' for `double`.
+        """
+        count = int(count)
+        if self.binary:
+            try:
+                values = nx.frombuffer(self.data, dtype=self.dtypes[kind], count=count, offset=self.pos)
+            except ValueError:
+                raise EOFError("No `End%s' footer found!" % self.title)
+            self.pos += values.nbytes
+            self.end = self.pos
+        else:
+            values = self.values[self.pos:self.pos + count]
+            if len(values) < count:
+                raise GmshException("The `$%s' section ends early" % self.title)
+            self.pos += count
+
+        if kind == 'd':
+            return values.astype(float)
+        else:
+            return values.astype(nx.INT_DTYPE)
+
+class _ElementBlock(object):
+    """
+    Bookkeeping for elements of one type, read in bulk.
 
     :Properties:
-    - `nodes`: A Python list of the vertices that make up this element
-    - `shapes`: A `shapeTypes` Python list
-    - `idmap`: A Python list which maps `vertexCoords` index to global ID
-    - `physicalEntities`: A Python list of the Gmsh physical entities each element is in
-    - `geometricalEntities`: A Python list of the Gmsh geometrical entities each element is in
+    - `elType`: The Gmsh element type of every element of the block
+    - `order`: An array of the position of each element in the file
+    - `ids`: An array of the Gmsh ID of each element
+    - `tags`: An array of the tags of each element
+    - `nodes`: An array of the Gmsh node IDs of each element
     """
-    def __init__(self):
-        self.nodes = []
-        self.shapes = []
-        self.idmap = [] # vertexCoords idx -> gmsh ID (global ID)
-        self.physicalEntities = []
-        self.geometricalEntities = []
-
-    def add(self, currLine, elType, physicalEntity, geometricalEntity):
-        numTags = currLine[2]
-        self.nodes.append(currLine[(numTags+3):])
-        self.shapes.append(elType)
-        self.idmap.append(currLine[0])
-        self.physicalEntities.append(physicalEntity)
-        self.geometricalEntities.append(geometricalEntity)
+    def __init__(self, elType, order, ids, tags, nodes):
+        self.elType = int(elType)
+        self.order = order
+        self.ids = ids
+        self.tags = tags
+        self.nodes = nodes
 
 class _GmshTopology(_MeshTopology):
 
@@ -1870,6 +2422,34 @@ class Gmsh2D(Mesh2D):
 
         >>> os.remove(mshFile)
 
+        Meshes that Gmsh generates are kept in the directory named by
+        :envvar:`FIPY_GMSH_CACHE` and are taken from there, without running
+        Gmsh again, the next time the same geometry is meshed the same way
+
+        >>> import shutil
+        >>> cacheDir = tempfile.mkdtemp()
+        >>> os.environ["FIPY_GMSH_CACHE"] = cacheDir
+        >>> square = '''
+        ... Point(1) = {0, 0, 0, 0.5};
+        ... Point(2) = {1, 0, 0, 0.5};
+        ... Point(3) = {1, 1, 0, 0.5};
+        ... Point(4) = {0, 1, 0, 0.5};
+        ... Line(5) = {1, 2};
+        ... Line(6) = {2, 3};
+        ... Line(7) = {3, 4};
+        ... Line(8) = {4, 1};
+        ... Line Loop(9) = {5, 6, 7, 8};
+        ... Plane Surface(10) = {9};
+        ... '''
+        >>> first = Gmsh2D(square) # doctest: +GMSH
+        >>> print(len(os.listdir(cacheDir))) # doctest: +GMSH
+        1
+        >>> second = Gmsh2D(square) # doctest: +GMSH
+        >>> print(nx.allclose(first.cellCenters, second.cellCenters)) # doctest: +GMSH
+        True
+        >>> del os.environ["FIPY_GMSH_CACHE"]
+        >>> shutil.rmtree(cacheDir)
+
         """
 
 class Gmsh2DIn3DSpace(Gmsh2D):
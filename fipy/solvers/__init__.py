@@ -6,7 +6,9 @@ from importlib import import_module
 from fipy.tools.parser import _parseSolver
 
 from fipy.solvers.solver import *
+from fipy.solvers.autotuningSolver import *
 __all__ = list(solver.__all__)
+__all__.extend(autotuningSolver.__all__)
 from future.utils import text_to_native_str
 __all__ = [text_to_native_str(n) for n in __all__]
 
@@ -0,0 +1,314 @@
+from __future__ import division
+from __future__ import unicode_literals
+__docformat__ = 'restructuredtext'
+
+import importlib.util
+
+from fipy.solvers.solver import Solver
+from fipy.tools import numerix
+
+__all__ = ["AutotuningSolver"]
+from future.utils import text_to_native_str
+__all__ = [text_to_native_str(n) for n in __all__]
+
+class AutotuningSolver(Solver):
+    """
+    Chooses the fastest of several solvers for an equation.
+
+    The first solves are shared out among the `candidates`, in turn, and
+    timed.  From then on, the candidate that converged in the least time
+    is used, until it stops converging or needs more than `drift` times as
+    many iterations as when it was chosen, at which point the candidates
+    are tried again.  Solvers that can't solve asymmetric matrices are not
+    tried on them and, when the matrix is symmetric, neither are the
+    Krylov solvers that can.
+
+    The solves used for timing are real solves of the equation.  The
+    answer of a candidate that fails to converge is thrown away, and the
+    equation solved again with a candidate that has converged so far,
+    preferably a direct one.
+
+    Since the choice is kept by the `AutotuningSolver`, each equation
+    needs its own.  Setting :envvar:`FIPY_AUTOTUNE_SOLVER` gives every
+    equation that is solved without a `solver` an `AutotuningSolver` of
+    its own.
+
+    >>> from fipy import CellVariable, Grid1D, TransientTerm, DiffusionTerm
+    >>> mesh = Grid1D(nx=100)
+    >>> phi = CellVariable(mesh=mesh, hasOld=True)
+    >>> phi.constrain(1., where=mesh.facesLeft)
+    >>> eq = TransientTerm() == DiffusionTerm()
+    >>> solver = AutotuningSolver()
+    >>> tried = len(solver._eligible(symmetric=True))
+    >>> for step in range(tried + 2):
+    ...     phi.updateOld()
+    ...     eq.solve(var=phi, dt=1., solver=solver)
+    >>> print(solver.choice in solver.candidates)
+    True
+    >>> print(len(solver.statistics) == tried + 2)
+    True
+
+    Only symmetric matrices are given to solvers that need them
+
+    >>> from fipy import ConvectionTerm
+    >>> eq = TransientTerm() == DiffusionTerm() + ConvectionTerm(coeff=(1.,))
+    >>> solver = AutotuningSolver()
+    >>> for step in range(len(solver.candidates)):
+    ...     phi.updateOld()
+    ...     eq.solve(var=phi, dt=1., solver=solver)
+    >>> print(all(candidate._canSolveAsymmetric()
+    ...           for candidate in solver._tuning))
+    True
+
+    A candidate that doesn't converge while it is tried leaves the same
+    answer as one that does
+
+    >>> from fipy import LinearLUSolver, LinearGMRESSolver
+    >>> solver = AutotuningSolver(candidates=[LinearGMRESSolver(iterations=1),
+    ...                                       LinearLUSolver()])
+    >>> phi.setValue(0.)
+    >>> phi.updateOld()
+    >>> eq.solve(var=phi, dt=1., solver=solver)
+    >>> print([record["converged"] for record in solver.statistics])
+    [False, True]
+    >>> expected = CellVariable(mesh=mesh, hasOld=True)
+    >>> expected.constrain(1., where=mesh.facesLeft)
+    >>> eq.solve(var=expected, dt=1., solver=LinearLUSolver())
+    >>> print(numerix.allclose(phi, expected))
+    True
+    """
+
+    def __init__(self, candidates=None, trials=1, drift=2.):
+        """
+        Parameters
+        ----------
+        candidates : list of ~fipy.solvers.solver.Solver
+            Solvers to choose from, all of which must use the same kind of
+            matrix.  By default, the LU, PCG, and GMRES solvers of the
+            current solver suite, with its Jacobi, ILU, and algebraic
+            multigrid preconditioners, if it has them.
+        trials : int
+            Number of solves to time each candidate for.
+        drift : float
+            Factor by which the iterations of the chosen solver may grow
+            before the candidates are tried again.
+        """
+        if candidates is None:
+            candidates = self._defaultCandidates()
+
+        if len(set(candidate._matrixClass for candidate in candidates)) != 1:
+            raise ValueError("the candidates must all use the same kind of matrix")
+
+        super(AutotuningSolver, self).__init__()
+        self.candidates = list(candidates)
+        self.trials = trials
+        self.drift = drift
+        self.reset()
+
+    @staticmethod
+    def _defaultCandidates():
+        import fipy.solvers as suite
+
+        candidates = [getattr(suite, name)()
+                      for name in ("LinearLUSolver", "LinearPCGSolver", "LinearGMRESSolver")
+                      if hasattr(suite, name)]
+
+        if hasattr(suite, "LinearPCGSolver") and hasattr(suite, "JacobiPreconditioner"):
+            candidates.append(suite.LinearPCGSolver(precon=suite.JacobiPreconditioner()))
+        if hasattr(suite, "LinearGMRESSolver") and hasattr(suite, "ILUPreconditioner"):
+            candidates.append(suite.LinearGMRESSolver(precon=suite.ILUPreconditioner()))
+        if (hasattr(suite, "SmoothedAggregationPreconditioner")
+            and importlib.util.find_spec("pyamg") is not None):
+            for name in ("LinearPCGSolver", "LinearGMRESSolver"):
+                if hasattr(suite, name):
+                    candidates.append(getattr(suite, name)(precon=suite.SmoothedAggregationPreconditioner()))
+
+        return candidates
+
+    def reset(self):
+        """Forget the choice of solver and start trying the candidates again
+        """
+        self.choice = None
+        self._tuning = None
+        self._records = []
+        self._iterations = None
+        self._current = None
+
+    @property
+    def _matrixClass(self):
+        return self.candidates[0]._matrixClass
+
+    @staticmethod
+    def _isSymmetric(matrix, var):
+        """Whether the matrix is symmetric, to within roundoff
+
+        >>> from fipy import CellVariable, Grid1D, DiffusionTerm, ConvectionTerm
+        >>> mesh = Grid1D(nx=5)
+        >>> phi = CellVariable(mesh=mesh)
+        >>> def isSymmetric(eq):
+        ...     solver = eq._prepareLinearSystem(var=phi, solver=None,
+        ...                                      boundaryConditions=(), dt=None)
+        ...     return AutotuningSolver._isSymmetric(solver.matrix, phi)
+        >>> print(isSymmetric(DiffusionTerm()))
+        True
+        >>> print(isSymmetric(DiffusionTerm() + ConvectionTerm(coeff=(1.,))))
+        False
+        """
+        # the rows of a matrix that is split among processes can't be
+        # compared with its columns
+        if var.mesh.communicator.Nproc > 1:
+            return False
+
+        ptrs, cols, data = matrix.CSR
+        ptrs = numerix.asarray(ptrs)
+        cols = numerix.asarray(cols)
+        data = numerix.asarray(data)
+        rows = numerix.repeat(numerix.arange(len(ptrs) - 1), numerix.diff(ptrs))
+
+        scale = abs(data).max() if len(data) > 0 else 0.
+        nonzero = abs(data) > 1e-12 * scale
+        rows, cols, data = rows[nonzero], cols[nonzero], data[nonzero]
+
+        byRow = numerix.lexsort((cols, rows))
+        byColumn = numerix.lexsort((rows, cols))
+
+        return (numerix.array_equal(rows[byRow], cols[byColumn])
+                and numerix.array_equal(cols[byRow], rows[byColumn])
+                and numerix.allclose(data[byRow], data[byColumn],
+                                     rtol=1e-10, atol=1e-12 * scale))
+
+    def _eligible(self, symmetric):
+        if symmetric:
+            from fipy.solvers import LinearLUSolver
+
+            # Krylov methods for general matrices waste effort on
+            # symmetric ones
+            candidates = [candidate for candidate in self.candidates
+                          if (not candidate._canSolveAsymmetric()
+                              or isinstance(candidate, LinearLUSolver))]
+            if len(candidates) > 0:
+                return candidates
+            else:
+                return list(self.candidates)
+        else:
+            return ([candidate for candidate in self.candidates
+                     if candidate._canSolveAsymmetric()]
+                    or list(self.candidates))
+
+    def _storeMatrix(self, var, matrix, RHSvector):
+        super(AutotuningSolver, self)._storeMatrix(var=var, matrix=matrix, RHSvector=RHSvector)
+
+        if self.choice is not None:
+            self._current = self.choice
+        else:
+            if self._tuning is None:
+                self._tuning = self._eligible(symmetric=self._isSymmetric(matrix, var))
+                self._records = [[] for candidate in self._tuning]
+            solves = [len(records) for records in self._records]
+            self._current = self._tuning[solves.index(min(solves))]
+
+        self._current._storeMatrix(var=var, matrix=matrix, RHSvector=RHSvector)
+
+    def _choose(self):
+        best = None
+        for candidate, records in zip(self._tuning, self._records):
+            if all(record["converged"] for record in records):
+                time = sum(record["setupTime"] + record["solveTime"] for record in records)
+                if best is None or time < best[0]:
+                    best = (time, candidate, records)
+
+        if best is None:
+            # nothing converged, so settle for what came closest
+            closest = min(range(len(self._tuning)),
+                          key=lambda i: max(record["finalResidual"] / (record["initialResidual"] or 1.)
+                                            for record in self._records[i]))
+            best = (None, self._tuning[closest], self._records[closest])
+
+        time, self.choice, records = best
+        iterations = [record["iterations"] for record in records
+                      if record["iterations"] is not None]
+        if len(iterations) > 0:
+            self._iterations = max(iterations)
+
+    def _solveWith(self, candidate):
+        statistics = candidate.statistics
+        residuals = statistics.residuals
+        # candidates that don't converge are ranked by their residuals
+        statistics.residuals = residuals or self.choice is None
+        try:
+            candidate._solve()
+        finally:
+            statistics.residuals = residuals
+
+        record = candidate.statistics[-1]
+        self.statistics.record(**record)
+
+        return record
+
+    def _fallback(self):
+        """A candidate to solve with when the one being tried fails
+
+        Preferably a direct solver, otherwise one that has converged
+        every time it was tried, or `None`.
+        """
+        from fipy.solvers import LinearLUSolver
+
+        for candidate in self._tuning:
+            if isinstance(candidate, LinearLUSolver):
+                return candidate
+
+        for candidate, records in zip(self._tuning, self._records):
+            if len(records) > 0 and all(record["converged"] for record in records):
+                return candidate
+
+        return None
+
+    def _solve(self):
+        if self.choice is None:
+            # the value to try again from, if the candidate fails
+            value = numerix.array(self.var.value)
+
+        record = self._solveWith(self._current)
+
+        if self.choice is None:
+            self._records[self._tuning.index(self._current)].append(record)
+
+            fallback = self._fallback()
+            if not record["converged"] and fallback not in (None, self._current):
+                self.var[:] = value
+                fallback._storeMatrix(var=self.var, matrix=self.matrix, RHSvector=self.RHSvector)
+                self._solveWith(fallback)
+
+            if min(len(records) for records in self._records) >= self.trials:
+                self._choose()
+        elif (not record["converged"]
+              or (self._iterations is not None
+                  and record["iterations"] is not None
+                  and record["iterations"] > self.drift * max(self._iterations, 1))):
+            self.reset()
+
+    def _applyUnderRelaxation(self, underRelaxation=None):
+        self._current._applyUnderRelaxation(underRelaxation=underRelaxation)
+
+    def _calcResidualVector(self, residualFn=None):
+        return self._current._calcResidualVector(residualFn=residualFn)
+
+    def _calcResidual(self, residualFn=None):
+        return self._current._calcResidual(residualFn=residualFn)
+
+    def _calcRHSNorm(self):
+        return self._current._calcRHSNorm()
+
+    def __repr__(self):
+        return "%s(choice=%r)" % (self.__class__.__name__, self.choice)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        for candidate in self.candidates:
+            candidate.__exit__(exc_type, exc_value, traceback)
+
+def _test():
+    import fipy.tests.doctestPlus
+    return fipy.tests.doctestPlus.testmod()
+
+if __name__ == "__main__":
+    _test()
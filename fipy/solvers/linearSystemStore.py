@@ -0,0 +1,324 @@
+"""
+When the :envvar:`FIPY_CAPTURE_SYSTEMS` environment variable names a
+directory, every linear system that :meth:`~fipy.terms.term.Term.solve` or
+:meth:`~fipy.terms.term.Term.sweep` builds is saved there, before it is
+solved. The systems can then be solved again, with any combination of
+solver and preconditioner, without rerunning the simulation::
+
+    $ FIPY_CAPTURE_SYSTEMS=systems python mySimulation.py
+    $ python -m fipy.solvers.linearSystemStore systems \\
+    >   --solver "LinearGMRESSolver(precon=ILUPreconditioner())" \\
+    >   --solver "LinearPCGSolver(precon=JacobiPreconditioner())"
+
+Only serial runs are captured, and only solvers that work with
+:term:`SciPy` matrices can replay the systems.
+"""
+from __future__ import print_function
+from __future__ import unicode_literals
+from builtins import object
+from builtins import str
+__docformat__ = 'restructuredtext'
+
+import glob
+import os
+
+from fipy.solvers.solverStatistics import SolverStatistics
+from fipy.tools import numerix
+
+__all__ = ["LinearSystemStore", "LinearSystem"]
+from future.utils import text_to_native_str
+__all__ = [text_to_native_str(n) for n in __all__]
+
+class LinearSystem(object):
+    """A captured linear system, :math:`A x = b`
+
+    Attributes
+    ----------
+    matrix : ~scipy.sparse.csr_matrix
+        The matrix :math:`A`.
+    RHSvector : ndarray
+        The right-hand side :math:`b`.
+    initialGuess : ndarray
+        The value of the solution variable before it was solved for.
+    equation : str
+        The kinds of `Term` that built the system, *e.g.*,
+        ``"(TransientTerm + DiffusionTerm)"``.
+    variable : str
+        Name of the solution variable.
+    index : int
+        Order in which the system was captured.
+    dt : float
+        Time step the system was built with, or NaN.
+    """
+
+    def __init__(self, matrix, RHSvector, initialGuess, equation="", variable="", index=0, dt=numerix.nan):
+        self.matrix = matrix
+        self.RHSvector = RHSvector
+        self.initialGuess = initialGuess
+        self.equation = equation
+        self.variable = variable
+        self.index = index
+        self.dt = dt
+
+    def solve(self, solver):
+        """Solve the system
+
+        Parameters
+        ----------
+        solver : ~fipy.solvers.solver.Solver
+            A solver that works with :term:`SciPy` matrices.
+
+        Returns
+        -------
+        x : ndarray
+            The solution.
+        record : dict
+            The :attr:`~fipy.solvers.solver.Solver.statistics` of the solve.
+        """
+        from fipy.matrices.scipyMatrix import (_ScipyMatrix,
+                                               _ScipyMatrixFreeMeshMatrix)
+
+        if not issubclass(solver._matrixClass, (_ScipyMatrix, _ScipyMatrixFreeMeshMatrix)):
+            raise NotImplementedError("%s can't solve captured systems" % solver.__class__.__name__)
+
+        L = _ScipyMatrix(matrix=self.matrix.copy())
+        x = self.initialGuess.copy()
+        b = self.RHSvector.copy()
+
+        solver._storeMatrix(var=None, matrix=L, RHSvector=b)
+        solution = solver._solve_(L, x, b)
+        if solution is not None:
+            x = solution
+
+        record = solver.statistics[-1]
+        record["variable"] = self.variable
+
+        return x, record
+
+    def __repr__(self):
+        return "%s(variable=%r, index=%d, shape=%r)" % (self.__class__.__name__,
+                                                     self.variable,
+                                                     self.index,
+                                                     self.matrix.shape)
+
+class LinearSystemStore(object):
+    """Directory of captured linear systems
+
+    Each system is kept in its own ``system*.npz`` file, with the matrix in
+    binary CSR form.
+
+    >>> from fipy import CellVariable, Grid1D, TransientTerm, DiffusionTerm
+    >>> from fipy.tools import numerix
+    >>> from fipy.solvers.linearSystemStore import LinearSystemStore
+    >>> import tempfile, shutil
+    >>> directory = tempfile.mkdtemp()
+    >>> store = LinearSystemStore(directory)
+
+    >>> mesh = Grid1D(nx=20)
+    >>> phi = CellVariable(mesh=mesh, name="phi", hasOld=True)
+    >>> phi.constrain(1., where=mesh.facesLeft)
+    >>> eq = TransientTerm() == DiffusionTerm()
+    >>> solver = eq.getDefaultSolver(phi)
+    >>> for step in range(3):
+    ...     phi.updateOld()
+    ...     solver = eq._prepareLinearSystem(var=phi, solver=solver,
+    ...                                      boundaryConditions=(), dt=1.)
+    ...     store.capture(term=eq, solver=solver, dt=1.)
+    ...     solver._solve()
+    >>> print(len(store))
+    3
+    >>> system = store[2]
+    >>> print(system.variable, system.index, system.dt)
+    phi 2 1.0
+    >>> print(system.equation)
+    (TransientTerm + DiffusionTerm)
+
+    Solving the captured system again gives the same answer
+
+    >>> from fipy.solvers.scipy import LinearGMRESSolver
+    >>> x, record = system.solve(LinearGMRESSolver(tolerance=1e-12))
+    >>> print(numerix.allclose(x, phi.value))
+    True
+    >>> print(record["variable"], record["converged"])
+    phi True
+
+    and every system can be solved with several solvers at once
+
+    >>> from fipy.solvers.scipy import LinearPCGSolver, JacobiPreconditioner
+    >>> stats = store.replay([LinearGMRESSolver(tolerance=1e-12),
+    ...                       LinearPCGSolver(tolerance=1e-12,
+    ...                                       precon=JacobiPreconditioner())])
+    >>> summary = stats.summary(by="solver")
+    >>> print(summary["LinearGMRESSolver"]["solves"], summary["LinearPCGSolver"]["failures"])
+    3 0
+
+    Systems captured later are numbered after those already in the
+    directory
+
+    >>> print(LinearSystemStore(directory)._count)
+    3
+
+    >>> shutil.rmtree(directory)
+    """
+
+    def __init__(self, directory):
+        """
+        Parameters
+        ----------
+        directory : str
+            Where the systems are kept. Created if it does not exist.
+        """
+        self.directory = directory
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        self._count = len(self._filenames())
+
+    @classmethod
+    def _describe(cls, term):
+        # `repr(term)` spells out every coefficient, and not all of them
+        # can be represented
+        from fipy.terms.abstractBinaryTerm import _AbstractBinaryTerm
+        from fipy.terms.coupledBinaryTerm import _CoupledBinaryTerm
+
+        if isinstance(term, _AbstractBinaryTerm):
+            if isinstance(term, _CoupledBinaryTerm):
+                operator = " & "
+            else:
+                operator = " + "
+            return "(" + cls._describe(term.term) + operator + cls._describe(term.other) + ")"
+        else:
+            return term.__class__.__name__
+
+    def _filenames(self):
+        return sorted(glob.glob(os.path.join(self.directory, "system*.npz")))
+
+    def capture(self, term, solver, dt=None):
+        """Save the linear system that `term` last stored in `solver`
+
+        Parameters
+        ----------
+        term : ~fipy.terms.term.Term
+            The equation that built the system.
+        solver : ~fipy.solvers.solver.Solver
+            The solver the system was prepared for.
+        dt : float
+            Time step the system was built with.
+        """
+        var = solver.var
+        if var.mesh.communicator.Nproc > 1:
+            import warnings
+            warnings.warn("linear systems are only captured in serial",
+                          UserWarning, stacklevel=3)
+            return
+
+        ptrs, cols, data = solver.matrix.CSR
+        initialGuess = numerix.array(var).ravel()
+
+        filename = os.path.join(self.directory, "system%06d.npz" % self._count)
+        numerix.savez(filename,
+                      indptr=numerix.asarray(ptrs),
+                      indices=numerix.asarray(cols),
+                      data=numerix.asarray(data),
+                      shape=numerix.array((len(ptrs) - 1, len(initialGuess))),
+                      RHSvector=numerix.array(solver.RHSvector, dtype=float).ravel(),
+                      initialGuess=initialGuess,
+                      equation=numerix.array(self._describe(term)),
+                      variable=numerix.array(getattr(var, "name", "")),
+                      index=numerix.array(self._count),
+                      dt=numerix.array(numerix.nan if dt is None else float(dt)))
+        self._count += 1
+
+    @staticmethod
+    def _load(filename):
+        from scipy.sparse import csr_matrix
+
+        with numerix.load(filename) as f:
+            matrix = csr_matrix((f["data"], f["indices"], f["indptr"]),
+                                shape=tuple(f["shape"]))
+            return LinearSystem(matrix=matrix,
+                                RHSvector=f["RHSvector"],
+                                initialGuess=f["initialGuess"],
+                                equation=str(f["equation"]),
+                                variable=str(f["variable"]),
+                                index=int(f["index"]),
+                                dt=float(f["dt"]))
+
+    def __len__(self):
+        return len(self._filenames())
+
+    def __getitem__(self, index):
+        return self._load(self._filenames()[index])
+
+    def __iter__(self):
+        for filename in self._filenames():
+            yield self._load(filename)
+
+    def replay(self, solvers, names=None):
+        """Solve every captured system with each of `solvers`
+
+        Parameters
+        ----------
+        solvers : list of ~fipy.solvers.solver.Solver
+            Solvers that work with :term:`SciPy` matrices.
+        names : list of str, optional
+            What to call each solver in the records, instead of the name
+            of its class, *e.g.*, to tell preconditioners apart.
+
+        Returns
+        -------
+        ~fipy.solvers.solverStatistics.SolverStatistics
+            A record of each solve, in the order of the systems.
+        """
+        stats = SolverStatistics(capacity=None)
+        for system in self:
+            for i, solver in enumerate(solvers):
+                x, record = system.solve(solver)
+                record = dict(record)
+                if names is not None:
+                    record["solver"] = names[i]
+                stats.record(**record)
+
+        return stats
+
+def _main():
+    import argparse
+
+    import fipy.solvers
+
+    parser = argparse.ArgumentParser(description="Solve captured linear systems again")
+    parser.add_argument("directory",
+                        help="directory given to FIPY_CAPTURE_SYSTEMS")
+    parser.add_argument("--solver", action="append", dest="solvers",
+                        help="solver to try, e.g., "
+                             "\"LinearGMRESSolver(precon=ILUPreconditioner())\"; "
+                             "may be repeated")
+    parser.add_argument("--output",
+                        help="file to write every record to, as CSV, "
+                             "or as JSON if it ends in \".json\"")
+    args = parser.parse_args()
+
+    names = args.solvers or ["DefaultSolver()"]
+    namespace = dict((name, getattr(fipy.solvers, name)) for name in fipy.solvers.__all__)
+    solvers = [eval(name, namespace) for name in names]
+
+    stats = LinearSystemStore(args.directory).replay(solvers, names=names)
+
+    width = max(len(name) for name in names + ["solver"])
+    print("%-*s %8s %8s %12s %12s %12s" % (width, "solver", "solves", "failures",
+                                          "iterations", "setup (s)", "solve (s)"))
+    for solver, summary in stats.summary(by="solver").items():
+        print("%-*s %8d %8d %12d %12.4g %12.4g" % (width, solver,
+                                                   summary["solves"],
+                                                   summary["failures"],
+                                                   summary["iterations"],
+                                                   summary["setupTime"],
+                                                   summary["solveTime"]))
+
+    if args.output is not None:
+        if args.output.endswith(".json"):
+            stats.toJSON(args.output)
+        else:
+            stats.toCSV(args.output)
+
+if __name__ == "__main__":
+    _main()
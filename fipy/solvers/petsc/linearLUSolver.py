@@ -4,6 +4,7 @@ from past.utils import old_div
 __docformat__ = 'restructuredtext'
 
 import os
+from timeit import default_timer as timer
 
 from petsc4py import PETSc
 
@@ -31,6 +32,7 @@ class LinearLUSolver(PETScSolver):
                              iterations=iterations, precon="lu")
 
     def _solve_(self, L, x, b):
+        start = timer()
         ksp = PETSc.KSP()
         ksp.create(PETSc.COMM_WORLD)
         ksp.setType("preonly")
@@ -42,8 +44,13 @@ class LinearLUSolver(PETScSolver):
         L.assemble()
         ksp.setOperators(L)
         ksp.setFromOptions()
-        
-        for iteration in range(self.iterations):
+        ksp.setUp()
+        setupTime = timer() - start
+
+        start = timer()
+        # the last pass only measures the residual of the last correction
+        converged = False
+        for iteration in range(self.iterations + 1):
             errorVector = L * x - b
             tol = errorVector.norm()
             
@@ -51,12 +58,24 @@ class LinearLUSolver(PETScSolver):
                 tol0 = tol
                 
             if (tol / tol0) <= self.tolerance:
+                converged = True
+                break
+            elif iteration == self.iterations:
                 break
                 
             xError = x.copy()
 
             ksp.solve(errorVector, xError)
             x -= xError
+        solveTime = timer() - start
+
+        self._recordStatistics(iterations=iteration,
+                               initialResidual=tol0,
+                               finalResidual=tol,
+                               reason="converged" if converged else "iterations",
+                               converged=converged,
+                               setupTime=setupTime,
+                               solveTime=solveTime)
             
         if 'FIPY_VERBOSE_SOLVER' in os.environ:
             from fipy.tools.debug import PRINT
@@ -64,6 +83,6 @@ class LinearLUSolver(PETScSolver):
 #             b.view()
             PRINT('solver:', ksp.type)
             PRINT('precon:', ksp.getPC().type)
-            PRINT('iterations: %d / %d' % (iteration+1, self.iterations))
+            PRINT('iterations: %d / %d' % (iteration, self.iterations))
             PRINT('residual:', errorVector.norm(1))
 
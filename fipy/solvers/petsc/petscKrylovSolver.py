@@ -1,6 +1,7 @@
 __docformat__ = 'restructuredtext'
 
 import os
+from timeit import default_timer as timer
 
 from petsc4py import PETSc
 
@@ -52,6 +53,7 @@ class PETScKrylovSolver(PETScSolver):
                              iterations=iterations, precon=precon)
 
     def _solve_(self, L, x, b):
+        start = timer()
         ksp = PETSc.KSP()
         ksp.create(L.comm)
         ksp.setType(self.solver)
@@ -61,7 +63,22 @@ class PETScKrylovSolver(PETScSolver):
         L.assemble()
         ksp.setOperators(L)
         ksp.setFromOptions()
+        ksp.setUp()
+        setupTime = timer() - start
+
+        initialResidual = self._statisticsResidual(L, x, b)
+
+        start = timer()
         ksp.solve(b, x)
+        solveTime = timer() - start
+
+        self._recordStatistics(iterations=ksp.its,
+                               initialResidual=initialResidual,
+                               finalResidual=self._statisticsResidual(L, x, b),
+                               reason=_reason[ksp.reason],
+                               converged=(ksp.reason > 0),
+                               setupTime=setupTime,
+                               solveTime=solveTime)
 
         if 'FIPY_VERBOSE_SOLVER' in os.environ:
             from fipy.tools.debug import PRINT
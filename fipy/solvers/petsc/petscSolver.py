@@ -103,6 +103,15 @@ class PETScSolver(Solver):
     def _calcRHSNorm(self):
         return self.nonOverlappingRHSvector.Norm2()
 
+    @staticmethod
+    def _residualNorm(L, x, b):
+        Lx = L * x
+        residual = Lx - b
+        norm = residual.norm()
+        Lx.destroy()
+        residual.destroy()
+        return norm
+
     def __del__(self):
         if hasattr(self, "globalVectors"):
             globalMatrix, overlappingVector, overlappingRHSvector = self._globalMatrixAndVectors
@@ -2,6 +2,7 @@ from __future__ import unicode_literals
 from fipy.solvers.scipy.scipySolver import _ScipySolver
 from pyamg import solve
 import os
+from timeit import default_timer as timer
 from fipy.tools import numerix
 
 __all__ = ["LinearGeneralSolver"]
@@ -21,4 +22,22 @@ class LinearGeneralSolver(_ScipySolver):
         else:
             verbosity = False
 
-        return solve(L.matrix, b, verb=verbosity, tol=self.tolerance)
+        initialResidual = self._statisticsResidual(L, x, b)
+
+        start = timer()
+        x = solve(L.matrix, b, verb=verbosity, tol=self.tolerance)
+        solveTime = timer() - start
+
+        # `pyamg.solve` builds its hierarchy and iterates in one call,
+        # without reporting how many iterations it took
+        finalResidual = numerix.L2norm(L * x - b)
+        converged = finalResidual <= self.tolerance * numerix.L2norm(b)
+        self._recordStatistics(iterations=None,
+                               initialResidual=initialResidual,
+                               finalResidual=finalResidual,
+                               reason="converged" if converged else "tolerance not met",
+                               converged=converged,
+                               setupTime=0.,
+                               solveTime=solveTime)
+
+        return x
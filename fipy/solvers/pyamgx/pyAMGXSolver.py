@@ -1,4 +1,6 @@
 from __future__ import unicode_literals
+from timeit import default_timer as timer
+
 import numpy
 from scipy.sparse import csr_matrix
 
@@ -66,10 +68,15 @@ class PyAMGXSolver(Solver):
         self.var = var
         self.matrix = matrix
         self.RHSvector = RHSvector
+        start = timer()
         self.A_gpu.upload_CSR(self.matrix.matrix)
         self.solver.setup(self.A_gpu)
+        self._setupTime = timer() - start
 
     def _solve_(self, L, x, b):
+        initialResidual = self._statisticsResidual(L, x, b)
+
+        start = timer()
         # transfer data from CPU to GPU
         self.x_gpu.upload(x)
         self.b_gpu.upload(b)
@@ -79,6 +86,16 @@ class PyAMGXSolver(Solver):
 
         # download values from GPU to CPU
         self.x_gpu.download(x)
+        solveTime = timer() - start
+
+        self._recordStatistics(iterations=self.solver.iterations_number,
+                               initialResidual=initialResidual,
+                               finalResidual=self._statisticsResidual(L, x, b),
+                               reason=self.solver.status,
+                               converged=(self.solver.status == "success"),
+                               setupTime=self._setupTime,
+                               solveTime=solveTime)
+
         return x
 
     def _solve(self):
@@ -5,6 +5,7 @@ from builtins import range
 __docformat__ = 'restructuredtext'
 
 import os
+from timeit import default_timer as timer
 
 from pysparse.direct import superlu
 
@@ -52,6 +53,7 @@ class LinearLUSolver(PysparseSolver):
                                              iterations = iterations)
 
     def _solve_(self, L, x, b):
+        start = timer()
         diag = L.takeDiagonal()
         maxdiag = max(numerix.absolute(diag))
 
@@ -59,24 +61,41 @@ class LinearLUSolver(PysparseSolver):
         b = b * (1 / maxdiag)
 
         LU = superlu.factorize(L.matrix.to_csr())
+        setupTime = timer() - start
 
         if DEBUG:
             import sys
             print(L.matrix, file=sys.stderr)
 
+        start = timer()
         error0 = numerix.sqrt(numerix.sum((L * x - b)**2))
 
-        for iteration in range(self.iterations):
+        # the last pass only measures the residual of the last correction
+        converged = False
+        for iteration in range(self.iterations + 1):
             errorVector = L * x - b
 
             if (numerix.sqrt(numerix.sum(errorVector**2)) / error0)  <= self.tolerance:
+                converged = True
+                break
+            elif iteration == self.iterations:
                 break
 
             xError = numerix.zeros(len(b), 'd')
             LU.solve(errorVector, xError)
             x[:] = x - xError
+        solveTime = timer() - start
+
+        residual = numerix.sqrt(numerix.sum(errorVector**2))
+        self._recordStatistics(iterations=iteration,
+                               initialResidual=error0 * maxdiag,
+                               finalResidual=residual * maxdiag,
+                               reason="converged" if converged else "iterations",
+                               converged=converged,
+                               setupTime=setupTime,
+                               solveTime=solveTime)
 
         if 'FIPY_VERBOSE_SOLVER' in os.environ:
             from fipy.tools.debug import PRINT
-            PRINT('iterations: %d / %d' % (iteration+1, self.iterations))
-            PRINT('residual:', numerix.sqrt(numerix.sum(errorVector**2)))
+            PRINT('iterations: %d / %d' % (iteration, self.iterations))
+            PRINT('residual:', residual)
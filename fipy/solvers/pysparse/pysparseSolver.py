@@ -2,6 +2,8 @@ from __future__ import unicode_literals
 __docformat__ = 'restructuredtext'
 
 import os
+from timeit import default_timer as timer
+
 from fipy.solvers.pysparseMatrixSolver import _PysparseMatrixSolver
 
 __all__ = ["PysparseSolver"]
@@ -36,15 +38,34 @@ class PysparseSolver(_PysparseMatrixSolver):
             Right hand side vector
         """
 
+        initialResidual = self._statisticsResidual(L, x, b)
+
+        start = timer()
         A = L.matrix
 
         if self.preconditioner is None:
             P = None
         else:
             P, A = self.preconditioner._applyToMatrix(A)
+        setupTime = timer() - start
 
+        start = timer()
         info, iter, relres = self.solveFnc(A, b, x, self.tolerance,
                                            self.iterations, P)
+        solveTime = timer() - start
+
+        if info < 0:
+            reason = self._warningList[info].__name__
+        else:
+            reason = "converged"
+
+        self._recordStatistics(iterations=iter,
+                               initialResidual=initialResidual,
+                               finalResidual=self._statisticsResidual(L, x, b),
+                               reason=reason,
+                               converged=(info >= 0),
+                               setupTime=setupTime,
+                               solveTime=solveTime)
 
         self._raiseWarning(info, iter, relres)
 
@@ -1,10 +1,13 @@
 from __future__ import unicode_literals
 from fipy.solvers.scipy.linearCGSSolver import *
 from fipy.solvers.scipy.linearGMRESSolver import *
+from fipy.solvers.scipy.linearGCRODRSolver import *
 from fipy.solvers.scipy.linearBicgstabSolver import *
 from fipy.solvers.scipy.linearLUSolver import *
 from fipy.solvers.scipy.linearPCGSolver import *
 
+from fipy.solvers.scipy.preconditioners import *
+
 DefaultSolver = LinearLUSolver
 DummySolver = LinearGMRESSolver
 DefaultAsymmetricSolver = LinearLUSolver
@@ -19,6 +22,8 @@ __all__ = [text_to_native_str(n) for n in __all__]
 
 __all__.extend(linearCGSSolver.__all__)
 __all__.extend(linearGMRESSolver.__all__)
+__all__.extend(linearGCRODRSolver.__all__)
 __all__.extend(linearBicgstabSolver.__all__)
 __all__.extend(linearLUSolver.__all__)
 __all__.extend(linearPCGSolver.__all__)
+__all__.extend(preconditioners.__all__)
@@ -14,7 +14,7 @@ class LinearBicgstabSolver(_ScipyKrylovSolver):
     Scipy, with no preconditioning by default.
     """
 
-    def __init__(self, tolerance=1e-15, iterations=2000, precon=None):
+    def __init__(self, tolerance=1e-15, iterations=2000, precon=None, matrixFree=False):
         """
         Parameters
         ----------
@@ -24,7 +24,10 @@ class LinearBicgstabSolver(_ScipyKrylovSolver):
             Maximum number of iterative steps to perform.
         precon
             Preconditioner to use.
+        matrixFree : bool
+            Whether to apply the unassembled contributions of the terms,
+            instead of assembling a sparse matrix.
         """
 
-        super(LinearBicgstabSolver, self).__init__(tolerance=tolerance, iterations=iterations, precon=precon)
+        super(LinearBicgstabSolver, self).__init__(tolerance=tolerance, iterations=iterations, precon=precon, matrixFree=matrixFree)
         self.solveFnc = bicgstab
@@ -15,7 +15,7 @@ class LinearCGSSolver(_ScipyKrylovSolver):
     with no preconditioning by default.
     """
 
-    def __init__(self, tolerance=1e-15, iterations=2000, precon=None):
+    def __init__(self, tolerance=1e-15, iterations=2000, precon=None, matrixFree=False):
         """
         Parameters
         ----------
@@ -25,7 +25,10 @@ class LinearCGSSolver(_ScipyKrylovSolver):
             Maximum number of iterative steps to perform.
         precon
             Preconditioner to use.
+        matrixFree : bool
+            Whether to apply the unassembled contributions of the terms,
+            instead of assembling a sparse matrix.
         """
 
-        super(LinearCGSSolver, self).__init__(tolerance=tolerance, iterations=iterations, precon=precon)
+        super(LinearCGSSolver, self).__init__(tolerance=tolerance, iterations=iterations, precon=precon, matrixFree=matrixFree)
         self.solveFnc = cgs
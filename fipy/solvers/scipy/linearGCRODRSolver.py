@@ -0,0 +1,284 @@
+from __future__ import unicode_literals
+from builtins import range
+__docformat__ = 'restructuredtext'
+
+import numpy
+
+from scipy.linalg import eig, lstsq, qr, solve_triangular
+from scipy.sparse.linalg import LinearOperator, aslinearoperator
+
+from fipy.solvers.scipy.scipyKrylovSolver import _ScipyKrylovSolver
+
+__all__ = ["LinearGCRODRSolver"]
+from future.utils import text_to_native_str
+__all__ = [text_to_native_str(n) for n in __all__]
+
+class LinearGCRODRSolver(_ScipyKrylovSolver):
+    r"""
+    The `LinearGCRODRSolver` solves a linear system of equations using
+    GMRES with deflated restarting and subspace recycling, GCRO-DR
+    [ParksRecycling]_, with no preconditioning by default.
+
+    At every restart, the approximate eigenvectors that belong to the
+    smallest eigenvalues of the matrix, which are what slow the
+    convergence of GMRES, are kept and projected out of the next cycle.
+    They are also kept from one solve to the next, so, when the same
+    solver is passed to successive calls of `solve()` or `sweep()`, each
+    solve starts from what the previous ones learned about the matrix.
+    This pays off when the matrix changes slowly from one time step to
+    the next.
+
+    >>> from fipy import (CellVariable, ConvectionTerm, DiffusionTerm,
+    ...                   Grid2D, TransientTerm)
+    >>> from fipy.solvers.scipy import LinearLUSolver
+    >>> from fipy.tools import numerix
+    >>> def solve(solver, mesh, D):
+    ...     phi = CellVariable(mesh=mesh, value=mesh.x * mesh.y)
+    ...     phi.constrain(0., where=mesh.facesLeft)
+    ...     phi.constrain(1., where=mesh.facesRight)
+    ...     eq = (TransientTerm()
+    ...           == DiffusionTerm(coeff=D) - ConvectionTerm(coeff=(1., 0.5)))
+    ...     eq.solve(var=phi, solver=solver, dt=1.)
+    ...     return phi.value
+    >>> mesh = Grid2D(nx=30, ny=30, dx=1. / 30, dy=1. / 30)
+    >>> solver = LinearGCRODRSolver(tolerance=1e-10)
+    >>> for step in range(3):
+    ...     D = 1. + 0.01 * step
+    ...     print(numerix.allclose(solve(solver, mesh, D),
+    ...                            solve(LinearLUSolver(), mesh, D))) # doctest: +SERIAL
+    True
+    True
+    True
+
+    Each solve of the slowly changing matrix takes fewer iterations than
+    the one before
+
+    >>> iterations = [record["iterations"] for record in solver.statistics]
+    >>> print(iterations[1] < iterations[0], iterations[2] < iterations[1]) # doctest: +SERIAL
+    True True
+    >>> print(solver._recycled.shape) # doctest: +SERIAL
+    (10, 900)
+
+    which plain restarted GMRES, with nothing to recycle, doesn't do
+
+    >>> plain = LinearGCRODRSolver(tolerance=1e-10, restart=40, recycle=0)
+    >>> for step in range(2):
+    ...     _ = solve(plain, mesh, 1. + 0.01 * step) # doctest: +SERIAL
+    >>> iterations = [record["iterations"] for record in plain.statistics]
+    >>> print(iterations[1] == iterations[0], plain._recycled) # doctest: +SERIAL
+    True None
+
+    A recycled subspace that doesn't fit the next system, because the mesh
+    has changed, is discarded
+
+    >>> small = Grid2D(nx=10, ny=10, dx=0.1, dy=0.1)
+    >>> print(numerix.allclose(solve(solver, small, 1.),
+    ...                        solve(LinearLUSolver(), small, 1.))) # doctest: +SERIAL
+    True
+    >>> print(solver._recycled.shape) # doctest: +SERIAL
+    (10, 100)
+
+    The `tolerance` is relative to the norm of the right-hand side, however
+    small that is
+
+    >>> def steady(solver, scale):
+    ...     phi = CellVariable(mesh=mesh)
+    ...     phi.constrain(scale, where=mesh.facesRight)
+    ...     eq = DiffusionTerm() - ConvectionTerm(coeff=(1., 0.5))
+    ...     eq.solve(var=phi, solver=solver)
+    ...     return phi.value / scale
+    >>> print(numerix.allclose(steady(LinearGCRODRSolver(tolerance=1e-10), 1e-6),
+    ...                        steady(LinearLUSolver(), 1.), rtol=1e-8)) # doctest: +SERIAL
+    True
+
+    A solve that runs out of iterations says so
+
+    >>> short = LinearGCRODRSolver(tolerance=1e-10, iterations=15, restart=10, recycle=4)
+    >>> _ = solve(short, mesh, 1.) # doctest: +SERIAL
+    >>> record = list(short.statistics)[-1]
+    >>> print(record["iterations"], record["converged"], record["reason"]) # doctest: +SERIAL
+    15 False iterations
+
+    and the number of recycled vectors must leave room for new ones
+
+    >>> LinearGCRODRSolver(restart=10, recycle=10)
+    Traceback (most recent call last):
+        ...
+    ValueError: `recycle` must be smaller than `restart`
+
+    .. [ParksRecycling] M. L. Parks, E. de Sturler, G. Mackey,
+       D. D. Johnson, and S. Maiti, "Recycling Krylov subspaces for
+       sequences of linear systems", *SIAM J. Sci. Comput.* **28**(5),
+       1651--1674 (2006).
+
+    .. [DGKS] J. W. Daniel, W. B. Gragg, L. Kaufman, and G. W. Stewart,
+       "Reorthogonalization and stable algorithms for updating the
+       Gram-Schmidt QR factorization", *Math. Comp.* **30**(136),
+       772--795 (1976).
+    """
+
+    def __init__(self, tolerance=1e-15, iterations=2000, precon=None, matrixFree=False,
+                 restart=30, recycle=10):
+        """
+        Parameters
+        ----------
+        tolerance : float
+            Required error tolerance.
+        iterations : int
+            Maximum number of iterative steps to perform.
+        precon
+            Preconditioner to use.
+        matrixFree : bool
+            Whether to apply the unassembled contributions of the terms,
+            instead of assembling a sparse matrix.
+        restart : int
+            Number of dimensions of the search space, including the
+            recycled ones, at which to restart.
+        recycle : int
+            Number of approximate eigenvectors to keep between restarts
+            and between solves.
+        """
+        if not 0 <= recycle < restart:
+            raise ValueError("`recycle` must be smaller than `restart`")
+
+        super(LinearGCRODRSolver, self).__init__(tolerance=tolerance, iterations=iterations, precon=precon, matrixFree=matrixFree)
+        self.restart = restart
+        self.recycle = recycle
+        self.solveFnc = self._gcrodr
+        self._recycled = None
+
+    @staticmethod
+    def _harmonicRitzVectors(G, VhW, k):
+        """Real basis of the `k` harmonic Ritz vectors of smallest magnitude
+
+        They solve :math:`G^T G z = \\theta G^T \\hat{V}^T \\hat{W} z`. The
+        real and imaginary parts of a complex pair are taken together, so
+        one more than `k` vectors may be returned.
+        """
+        theta, Z = eig(numpy.dot(G.T, G), numpy.dot(G.T, VhW))
+        magnitude = numpy.where(numpy.isfinite(theta), abs(theta), numpy.inf)
+
+        vectors = []
+        for i in numpy.argsort(magnitude, kind="stable"):
+            if len(vectors) >= k:
+                break
+            if abs(theta[i].imag) > 0:
+                if theta[i].imag > 0:
+                    vectors.extend([Z[:, i].real, Z[:, i].imag])
+            else:
+                vectors.append(Z[:, i].real)
+
+        return numpy.array(vectors).T
+
+    def _gcrodr(self, A, b, x0, tol, maxiter, M, atol, callback=None):
+        # the bases are kept as rows, so that each vector is contiguous
+        A = aslinearoperator(A)
+        if M is None:
+            M = LinearOperator(A.shape, matvec=lambda v: v,
+                               matmat=lambda V: V, dtype=A.dtype)
+        else:
+            M = aslinearoperator(M)
+
+        n = len(b)
+        x = numpy.array(x0, dtype=float)
+        r = b - A.matvec(x)
+
+        # stop where SciPy's own Krylov solvers do
+        bnorm = numpy.linalg.norm(b)
+        if atol != 'legacy':
+            target = max(float(atol), tol * bnorm)
+        elif numpy.linalg.norm(r) <= tol:
+            return x, 0
+        elif bnorm == 0:
+            target = tol
+        else:
+            target = tol * bnorm
+
+        U = self._recycled
+        if U is not None and U.shape[1] == n:
+            # the matrix may have changed since `U` was found
+            C, R = qr(A.matmat(M.matmat(U.T)), mode="economic")
+            C = C.T
+            U = solve_triangular(R, U, trans='T')
+            x += M.matvec(numpy.dot(numpy.dot(C, r), U))
+            r -= numpy.dot(numpy.dot(C, r), C)
+        else:
+            C = U = numpy.zeros((0, n))
+
+        iterations = 0
+        beta = numpy.linalg.norm(r)
+        while beta > target and iterations < maxiter:
+            # Arnoldi on (I - C C^T) A, so that the new directions are
+            # orthogonal to the images of the recycled ones
+            k = len(U)
+            steps = min(max(self.restart - k, 1), maxiter - iterations)
+            V = numpy.zeros((steps + 1, n))
+            H = numpy.zeros((steps + 1, steps))
+            B = numpy.zeros((k, steps))
+            V[0] = r / beta
+            for j in range(steps):
+                w = A.matvec(M.matvec(V[j]))
+                iterations += 1
+                if callback is not None:
+                    # residual norm at the start of the cycle
+                    callback(beta)
+                if k > 0:
+                    B[:, j] = numpy.dot(C, w)
+                    w -= numpy.dot(B[:, j], C)
+                # classical Gram-Schmidt, repeated only if it cancelled
+                # too much [DGKS]
+                norm = numpy.linalg.norm(w)
+                for _ in range(2):
+                    h = numpy.dot(V[:j + 1], w)
+                    w -= numpy.dot(h, V[:j + 1])
+                    H[:j + 1, j] += h
+                    previous, norm = norm, numpy.linalg.norm(w)
+                    if norm > 0.7 * previous:
+                        break
+                H[j + 1, j] = norm
+                if H[j + 1, j] <= 1e-14 * beta:
+                    # the solution is in the search space
+                    steps = j + 1
+                    break
+                V[j + 1] = w / H[j + 1, j]
+            V = V[:steps + 1]
+            H = H[:steps + 1, :steps]
+            B = B[:, :steps]
+
+            # least squares over the recycled and new directions
+            scale = 1. / numpy.linalg.norm(U, axis=1)
+            W = numpy.concatenate((U * scale[..., numpy.newaxis], V[:-1]))
+            Vh = numpy.concatenate((C, V))
+            G = numpy.zeros((k + steps + 1, k + steps))
+            G[:k, :k] = numpy.diag(scale)
+            G[:k, k:] = B
+            G[k:, k:] = H
+            rhs = numpy.zeros(k + steps + 1)
+            rhs[k] = beta
+            y = lstsq(G, rhs)[0]
+            x += M.matvec(numpy.dot(y, W))
+            r = numpy.dot(rhs - numpy.dot(G, y), Vh)
+            beta = numpy.linalg.norm(r)
+
+            if self.recycle > 0 and k + steps > self.recycle:
+                P = self._harmonicRitzVectors(G, numpy.dot(Vh, W.T), self.recycle)
+                Q, R = qr(numpy.dot(G, P), mode="economic")
+                C = numpy.dot(Q.T, Vh)
+                U = solve_triangular(R, numpy.dot(P.T, W), trans='T')
+
+        if len(U) > 0:
+            self._recycled = U
+
+        if beta > target:
+            info = iterations
+        else:
+            info = 0
+
+        return x, info
+
+def _test():
+    import fipy.tests.doctestPlus
+    return fipy.tests.doctestPlus.testmod()
+
+if __name__ == "__main__":
+    _test()
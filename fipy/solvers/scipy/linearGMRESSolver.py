@@ -1,6 +1,8 @@
 from __future__ import unicode_literals
 __docformat__ = 'restructuredtext'
 
+from functools import partial
+
 from scipy.sparse.linalg import gmres
 
 from fipy.solvers.scipy.scipyKrylovSolver import _ScipyKrylovSolver
@@ -15,7 +17,7 @@ class LinearGMRESSolver(_ScipyKrylovSolver):
     Scipy, with no preconditioning by default.
     """
 
-    def __init__(self, tolerance=1e-15, iterations=2000, precon=None):
+    def __init__(self, tolerance=1e-15, iterations=2000, precon=None, matrixFree=False):
         """
         Parameters
         ----------
@@ -25,7 +27,11 @@ class LinearGMRESSolver(_ScipyKrylovSolver):
             Maximum number of iterative steps to perform.
         precon
             Preconditioner to use.
+        matrixFree : bool
+            Whether to apply the unassembled contributions of the terms,
+            instead of assembling a sparse matrix.
         """
 
-        super(LinearGMRESSolver, self).__init__(tolerance=tolerance, iterations=iterations, precon=precon)
-        self.solveFnc = gmres
+        super(LinearGMRESSolver, self).__init__(tolerance=tolerance, iterations=iterations, precon=precon, matrixFree=matrixFree)
+        # count the inner iterations, not the restarts
+        self.solveFnc = partial(gmres, callback_type='legacy')
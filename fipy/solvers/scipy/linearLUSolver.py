@@ -4,6 +4,7 @@ from builtins import range
 __docformat__ = 'restructuredtext'
 
 import os
+from timeit import default_timer as timer
 
 from scipy.sparse.linalg import splu
 
@@ -19,34 +20,176 @@ class LinearLUSolver(_ScipySolver):
     The `LinearLUSolver` solves a linear system of equations using
     LU-factorization.  The `LinearLUSolver` is a wrapper class for the
     the Scipy `scipy.sparse.linalg.splu` module.
+
+    The factorization is kept between solves, so a `LinearLUSolver` that
+    is passed to successive calls of `solve()` or `sweep()` only factors
+    the matrix again when it changes. If only the values of the matrix
+    change, but not its sparsity pattern, the column ordering of the last
+    factorization is reused.
+
+    The solution is refined until its residual meets the `tolerance`, or
+    for at most `iterations` steps, and the residual after the last step
+    is recorded in the :attr:`statistics`
+
+    >>> from fipy import CellVariable, Grid1D, DiffusionTerm
+    >>> mesh = Grid1D(nx=10)
+    >>> var = CellVariable(mesh=mesh)
+    >>> var.constrain(1., where=mesh.facesLeft)
+    >>> solver = LinearLUSolver(iterations=1)
+    >>> DiffusionTerm().solve(var=var, solver=solver)
+    >>> record = solver.statistics[-1]
+    >>> print(record["iterations"], record["finalResidual"] < 1e-10)
+    1 True
+
+    With no steps at all, the variable is left as it is
+
+    >>> var.value = 0.
+    >>> solver = LinearLUSolver(iterations=0)
+    >>> DiffusionTerm().solve(var=var, solver=solver)
+    >>> record = solver.statistics[-1]
+    >>> print(record["iterations"], record["converged"],
+    ...       record["finalResidual"] == record["initialResidual"])
+    0 False True
+    >>> print(numerix.allclose(var, 0.))
+    True
     """
 
+    _factorization = None
+
+    def _factorize(self, A):
+        """Factor `A`, unless it is the matrix that was factored last
+
+        >>> import scipy.sparse
+        >>> A = (scipy.sparse.random(20, 20, density=0.2, random_state=0)
+        ...      + 4 * scipy.sparse.eye(20)).tocsc()
+        >>> b = numerix.arange(20.)
+        >>> solver = LinearLUSolver()
+        >>> print(solver._factorize(A.copy())[2])
+        factored
+        >>> print(solver._factorize(A.copy())[2])
+        reused
+
+        A matrix with the same sparsity pattern, but different values, is
+        factored again in the column order found for the first one
+
+        >>> B = A.copy()
+        >>> B.data *= numerix.linspace(1., 2., len(B.data))
+        >>> LU, columns, status = solver._factorize(B.copy())
+        >>> print(status, columns is not None)
+        refactored True
+        >>> x = LU.solve(b)
+        >>> x[columns] = x.copy()
+        >>> print(numerix.allclose(x, splu(B).solve(b)))
+        True
+
+        and a matrix with a different pattern is factored from scratch
+
+        >>> print(solver._factorize(B[:10, :10].tocsc())[2])
+        factored
+
+        Parameters
+        ----------
+        A : ~scipy.sparse.csc_matrix
+            The matrix to factor
+
+        Returns
+        -------
+        LU : ~scipy.sparse.linalg.SuperLU
+            The factorization of `A[:, columns]`
+        columns : ndarray or None
+            The column ordering that was imposed on `A`, if any
+        status : str
+            Whether the factorization was "reused", "refactored" with the
+            last column ordering, or "factored" from scratch
+        """
+        A.sort_indices()
+        last = self._factorization
+        if (last is not None
+            and A.shape == last["shape"]
+            and numerix.array_equal(A.indptr, last["indptr"])
+            and numerix.array_equal(A.indices, last["indices"])):
+            if numerix.array_equal(A.data, last["data"]):
+                return last["LU"], last["columns"], "reused"
+
+            # same structure, so the same ordering is as good as ever
+            if last["columns"] is None:
+                columns = numerix.argsort(last["LU"].perm_c)
+            else:
+                columns = last["columns"][numerix.argsort(last["LU"].perm_c)]
+            LU = splu(A[:, columns], diag_pivot_thresh=1.,
+                                     relax=1,
+                                     panel_size=10,
+                                     permc_spec="NATURAL")
+            status = "refactored"
+        else:
+            columns = None
+            LU = splu(A, diag_pivot_thresh=1.,
+                         relax=1,
+                         panel_size=10,
+                         permc_spec=3)
+            status = "factored"
+
+        self._factorization = dict(shape=A.shape,
+                                   indptr=A.indptr.copy(),
+                                   indices=A.indices.copy(),
+                                   data=A.data.copy(),
+                                   LU=LU,
+                                   columns=columns)
+
+        return LU, columns, status
+
     def _solve_(self, L, x, b):
+        start = timer()
         diag = L.takeDiagonal()
         maxdiag = max(numerix.absolute(diag))
 
         L = L * (1 / maxdiag)
         b = b * (1 / maxdiag)
 
-        LU = splu(L.matrix.asformat("csc"), diag_pivot_thresh=1.,
-                                            relax=1,
-                                            panel_size=10,
-                                            permc_spec=3)
+        LU, columns, status = self._factorize(L.matrix.asformat("csc"))
+        setupTime = timer() - start
 
+        start = timer()
         error0 = numerix.sqrt(numerix.sum((L * x - b)**2))
 
-        for iteration in range(min(self.iterations, 10)):
+        # the last pass only measures the residual of the last correction
+        maxIterations = min(self.iterations, 10)
+        converged = False
+        for iteration in range(maxIterations + 1):
             errorVector = L * x - b
 
             if (numerix.sqrt(numerix.sum(errorVector**2)) / error0)  <= self.tolerance:
+                converged = True
+                break
+            elif iteration == maxIterations:
                 break
 
             xError = LU.solve(errorVector)
+            if columns is not None:
+                xError[columns] = xError.copy()
             x[:] = x - xError
+        solveTime = timer() - start
+
+        residual = numerix.sqrt(numerix.sum(errorVector**2))
+        self._recordStatistics(iterations=iteration,
+                               initialResidual=error0 * maxdiag,
+                               finalResidual=residual * maxdiag,
+                               reason="converged" if converged else "iterations",
+                               converged=converged,
+                               setupTime=setupTime,
+                               solveTime=solveTime)
 
         if 'FIPY_VERBOSE_SOLVER' in os.environ:
             from fipy.tools.debug import PRINT
-            PRINT('iterations: %d / %d' % (iteration+1, self.iterations))
-            PRINT('residual:', numerix.sqrt(numerix.sum(errorVector**2)))
+            PRINT('factorization:', status)
+            PRINT('iterations: %d / %d' % (iteration, self.iterations))
+            PRINT('residual:', residual)
 
         return x
+
+def _test():
+    import fipy.tests.doctestPlus
+    return fipy.tests.doctestPlus.testmod()
+
+if __name__ == "__main__":
+    _test()
@@ -15,7 +15,7 @@ class LinearPCGSolver(_ScipyKrylovSolver):
     with no preconditioning by default.
     """
 
-    def __init__(self, tolerance=1e-15, iterations=2000, precon=None):
+    def __init__(self, tolerance=1e-15, iterations=2000, precon=None, matrixFree=False):
         """
         Parameters
         ----------
@@ -25,9 +25,12 @@ class LinearPCGSolver(_ScipyKrylovSolver):
             Maximum number of iterative steps to perform.
         precon
             Preconditioner to use.
+        matrixFree : bool
+            Whether to apply the unassembled contributions of the terms,
+            instead of assembling a sparse matrix.
         """
 
-        super(LinearPCGSolver, self).__init__(tolerance=tolerance, iterations=iterations, precon=precon)
+        super(LinearPCGSolver, self).__init__(tolerance=tolerance, iterations=iterations, precon=precon, matrixFree=matrixFree)
         self.solveFnc = cg
 
     def _canSolveAsymmetric(self):
@@ -0,0 +1,11 @@
+from __future__ import unicode_literals
+from fipy.solvers.scipy.preconditioners.jacobiPreconditioner import *
+from fipy.solvers.scipy.preconditioners.iluPreconditioner import *
+from fipy.solvers.scipy.preconditioners.ssorPreconditioner import *
+from fipy.solvers.scipy.preconditioners.smoothedAggregationPreconditioner import *
+
+__all__ = []
+__all__.extend(jacobiPreconditioner.__all__)
+__all__.extend(iluPreconditioner.__all__)
+__all__.extend(ssorPreconditioner.__all__)
+__all__.extend(smoothedAggregationPreconditioner.__all__)
@@ -0,0 +1,97 @@
+from __future__ import unicode_literals
+__docformat__ = 'restructuredtext'
+
+from scipy.sparse.linalg import LinearOperator, spilu
+
+from fipy.solvers.scipy.preconditioners.preconditioner import Preconditioner
+from fipy.tools import numerix
+
+__all__ = ["ILUPreconditioner"]
+from future.utils import text_to_native_str
+__all__ = [text_to_native_str(n) for n in __all__]
+
+class ILUPreconditioner(Preconditioner):
+    """
+    Incomplete LU preconditioner for the SciPy solvers.
+    Really just a wrapper class for `scipy.sparse.linalg.spilu`.
+
+    When only the values of the matrix change, the column ordering of the
+    last factorization is reused.
+
+    >>> from fipy import CellVariable, Grid2D, DiffusionTerm
+    >>> from fipy.solvers.scipy import LinearGMRESSolver, LinearLUSolver
+    >>> mesh = Grid2D(nx=20, ny=20)
+    >>> def solve(solver):
+    ...     phi = CellVariable(mesh=mesh)
+    ...     phi.constrain(1., where=mesh.facesLeft)
+    ...     phi.constrain(0., where=mesh.facesRight)
+    ...     (DiffusionTerm(coeff=1. + mesh.x) == mesh.y).solve(var=phi, solver=solver)
+    ...     return phi.value
+    >>> exact = solve(LinearLUSolver()) # doctest: +SERIAL
+    >>> coarse = LinearGMRESSolver(precon=ILUPreconditioner(dropTol=1e-1),
+    ...                            tolerance=1e-10)
+    >>> print(numerix.allclose(solve(coarse), exact)) # doctest: +SERIAL
+    True
+
+    A smaller drop tolerance keeps more of the factors, so the solver
+    needs fewer iterations
+
+    >>> fine = LinearGMRESSolver(precon=ILUPreconditioner(dropTol=1e-6),
+    ...                          tolerance=1e-10)
+    >>> print(numerix.allclose(solve(fine), exact)) # doctest: +SERIAL
+    True
+    >>> print(fine.statistics.summary()["iterations"]
+    ...       < coarse.statistics.summary()["iterations"]) # doctest: +SERIAL
+    True
+    """
+
+    def __init__(self, dropTol=1e-4, fillFactor=10.):
+        """
+        Parameters
+        ----------
+        dropTol : float
+            Entries of the factors smaller than this, relative to the
+            matrix, are dropped.  Smaller values make a more accurate, but
+            more expensive, preconditioner.
+        fillFactor : float
+            Upper bound on the ratio of the number of nonzeros in the
+            factors to that in the matrix.
+        """
+        super(ILUPreconditioner, self).__init__()
+        self.dropTol = dropTol
+        self.fillFactor = fillFactor
+
+    def _factorOperator(self, A, columns, permc_spec):
+        if columns is not None:
+            A = A[:, columns]
+        ILU = spilu(A.tocsc(),
+                    drop_tol=self.dropTol,
+                    fill_factor=self.fillFactor,
+                    permc_spec=permc_spec)
+
+        if columns is None:
+            self._columns = numerix.argsort(ILU.perm_c)
+            return LinearOperator(A.shape, matvec=ILU.solve, dtype=A.dtype)
+        else:
+            self._columns = columns[numerix.argsort(ILU.perm_c)]
+
+            def matvec(r):
+                x = numerix.empty_like(r)
+                x[columns] = ILU.solve(r)
+                return x
+
+            return LinearOperator(A.shape, matvec=matvec, dtype=A.dtype)
+
+    def _setup(self, A):
+        return self._factorOperator(A, columns=None, permc_spec="COLAMD")
+
+    def _update(self, A):
+        # same structure, so the same ordering is as good as ever
+        return self._factorOperator(A, columns=self._columns, permc_spec="NATURAL")
+
+def _test():
+    import fipy.tests.doctestPlus
+    return fipy.tests.doctestPlus.testmod()
+
+if __name__ == "__main__":
+    _test()
@@ -0,0 +1,57 @@
+from __future__ import unicode_literals
+__docformat__ = 'restructuredtext'
+
+from scipy.sparse import diags
+
+from fipy.solvers.scipy.preconditioners.preconditioner import Preconditioner
+from fipy.tools import numerix
+
+__all__ = ["JacobiPreconditioner"]
+from future.utils import text_to_native_str
+__all__ = [text_to_native_str(n) for n in __all__]
+
+class JacobiPreconditioner(Preconditioner):
+    """
+    Jacobi preconditioner for the SciPy solvers.
+
+    Scales by the inverse of the diagonal of the matrix.  Only the
+    diagonal is needed, so this preconditioner can also be used with
+    `matrixFree=True`.
+
+    >>> from fipy import CellVariable, Grid2D, DiffusionTerm
+    >>> from fipy.solvers.scipy import (LinearGMRESSolver, LinearLUSolver,
+    ...                                 LinearPCGSolver)
+    >>> mesh = Grid2D(nx=20, ny=20)
+    >>> def solve(solver):
+    ...     phi = CellVariable(mesh=mesh)
+    ...     phi.constrain(1., where=mesh.facesLeft)
+    ...     phi.constrain(0., where=mesh.facesRight)
+    ...     (DiffusionTerm(coeff=1. + mesh.x) == mesh.y).solve(var=phi, solver=solver)
+    ...     return phi.value
+    >>> exact = solve(LinearLUSolver()) # doctest: +SERIAL
+    >>> for Solver in (LinearPCGSolver, LinearGMRESSolver):
+    ...     solver = Solver(precon=JacobiPreconditioner(), tolerance=1e-10)
+    ...     print(numerix.allclose(solve(solver), exact),
+    ...           solver.statistics.summary()["failures"]) # doctest: +SERIAL
+    True 0
+    True 0
+    """
+
+    def _inverseDiagonal(self, diagonal):
+        diagonal = numerix.array(diagonal, dtype=float)
+        # leave rows without a diagonal entry alone
+        diagonal[diagonal == 0] = 1.
+        return diags(1. / diagonal, format="csr")
+
+    def _setup(self, A):
+        return self._inverseDiagonal(A.diagonal())
+
+    def _applyToOperator(self, A):
+        return self._inverseDiagonal(A.diagonal())
+
+def _test():
+    import fipy.tests.doctestPlus
+    return fipy.tests.doctestPlus.testmod()
+
+if __name__ == "__main__":
+    _test()
@@ -0,0 +1,138 @@
+from __future__ import unicode_literals
+from builtins import object
+__docformat__ = 'restructuredtext'
+
+from scipy.sparse import issparse
+
+from fipy.tools import numerix
+
+__all__ = ["Preconditioner"]
+from future.utils import text_to_native_str
+__all__ = [text_to_native_str(n) for n in __all__]
+
+class Preconditioner(object):
+    """
+    Base preconditioner class for the SciPy solvers
+
+    The setup of a preconditioner is kept between solves.  It is reused
+    as is while the matrix does not change, and only updated by
+    `_update()` when the values of the matrix change, but not its
+    sparsity pattern, as is usual from one sweep to the next.
+
+    >>> from scipy.sparse import csr_matrix
+    >>> from fipy.solvers.scipy.preconditioners import JacobiPreconditioner
+    >>> class CountingPreconditioner(JacobiPreconditioner):
+    ...     setups = updates = 0
+    ...     def _setup(self, A):
+    ...         self.setups += 1
+    ...         return JacobiPreconditioner._setup(self, A)
+    ...     def _update(self, A):
+    ...         self.updates += 1
+    ...         return JacobiPreconditioner._setup(self, A)
+    >>> A = csr_matrix([[4., 1., 0.],
+    ...                 [1., 4., 1.],
+    ...                 [0., 1., 4.]])
+    >>> precon = CountingPreconditioner()
+    >>> M = precon._applyToMatrix(A)
+    >>> print(precon.setups, precon.updates)
+    1 0
+
+    An equal matrix reuses the last preconditioner as it is
+
+    >>> precon._applyToMatrix(A.copy()) is M
+    True
+    >>> print(precon.setups, precon.updates)
+    1 0
+
+    new values in the same places only update it
+
+    >>> M = precon._applyToMatrix(2 * A)
+    >>> print(precon.setups, precon.updates)
+    1 1
+    >>> print(numerix.allclose(M * numerix.ones(3), 1. / 8))
+    True
+
+    and a new sparsity pattern sets it up afresh
+
+    >>> M = precon._applyToMatrix(A + csr_matrix(([1.], ([0], [2])), shape=(3, 3)))
+    >>> print(precon.setups, precon.updates)
+    2 1
+
+    Preconditioners that need more than the diagonal of the matrix can't
+    be applied to a matrix-free operator
+
+    >>> from scipy.sparse.linalg import aslinearoperator
+    >>> from fipy.solvers.scipy.preconditioners import ILUPreconditioner
+    >>> ILUPreconditioner()._applyToMatrix(aslinearoperator(A))
+    Traceback (most recent call last):
+        ...
+    TypeError: ILUPreconditioner needs an assembled matrix; it cannot be used with `matrixFree=True`
+
+    .. attention:: This class is abstract. Always create one of its subclasses.
+    """
+
+    def __init__(self):
+        """
+        Create a `Preconditioner` object.
+        """
+        if self.__class__ is Preconditioner:
+            raise NotImplementedError("can't instantiate abstract base class")
+
+    _lastMatrix = None
+
+    def _applyToMatrix(self, A):
+        """
+        Returns the preconditioner for the `M` argument of the
+        :mod:`scipy.sparse.linalg` solvers, i.e., something that applies
+        the inverse of an approximation of `A`.
+        """
+        if not issparse(A):
+            return self._applyToOperator(A)
+
+        A = A.tocsr()
+        A.sort_indices()
+
+        last = self._lastMatrix
+        if (last is not None
+            and A.shape == last.shape
+            and numerix.array_equal(A.indptr, last.indptr)
+            and numerix.array_equal(A.indices, last.indices)):
+            if numerix.array_equal(A.data, last.data):
+                return self._M
+            self._M = self._update(A)
+        else:
+            self._M = self._setup(A)
+
+        self._lastMatrix = A.copy()
+
+        return self._M
+
+    def _applyToOperator(self, A):
+        """
+        Returns the preconditioner for a matrix-free
+        :class:`~scipy.sparse.linalg.LinearOperator`, whose entries are
+        not available.
+        """
+        raise TypeError("%s needs an assembled matrix; "
+                        "it cannot be used with `matrixFree=True`"
+                        % self.__class__.__name__)
+
+    def _setup(self, A):
+        """
+        Returns the preconditioner for the CSR matrix `A`.
+        """
+        raise NotImplementedError
+
+    def _update(self, A):
+        """
+        Returns the preconditioner for the CSR matrix `A`, which has the
+        same sparsity pattern as the matrix of the last setup.
+        """
+        return self._setup(A)
+
+def _test():
+    import fipy.tests.doctestPlus
+    return fipy.tests.doctestPlus.testmod()
+
+if __name__ == "__main__":
+    _test()
@@ -0,0 +1,92 @@
+from __future__ import unicode_literals
+__docformat__ = 'restructuredtext'
+
+from fipy.solvers.scipy.preconditioners.preconditioner import Preconditioner
+from fipy.tests.doctestPlus import register_skipper
+
+__all__ = ["SmoothedAggregationPreconditioner"]
+from future.utils import text_to_native_str
+__all__ = [text_to_native_str(n) for n in __all__]
+
+def _checkForPyAMG():
+    hasPyAMG = True
+    try:
+        import pyamg
+    except Exception:
+        hasPyAMG = False
+    return hasPyAMG
+
+register_skipper(flag="PYAMG",
+                 test=_checkForPyAMG,
+                 why="the `pyamg` package cannot be imported")
+
+class SmoothedAggregationPreconditioner(Preconditioner):
+    """
+    Algebraic multigrid preconditioner for the SciPy solvers.
+    Really just a wrapper class for `pyamg.smoothed_aggregation_solver`,
+    so :term:`PyAMG` must be installed.
+
+    When only the values of the matrix change, the aggregates of the last
+    multigrid hierarchy are reused, so only the operators are rebuilt.
+
+    >>> from fipy import CellVariable, Grid2D, DiffusionTerm, TransientTerm
+    >>> from fipy.solvers.scipy import LinearLUSolver, LinearPCGSolver
+    >>> from fipy.tools import numerix
+    >>> mesh = Grid2D(nx=30, ny=30)
+    >>> def solve(solver, dt):
+    ...     phi = CellVariable(mesh=mesh)
+    ...     phi.constrain(1., where=mesh.facesLeft)
+    ...     phi.constrain(0., where=mesh.facesRight)
+    ...     eq = TransientTerm() == DiffusionTerm(coeff=1. + mesh.x)
+    ...     eq.solve(var=phi, solver=solver, dt=dt)
+    ...     return phi.value
+    >>> precon = SmoothedAggregationPreconditioner()
+    >>> solver = LinearPCGSolver(precon=precon, tolerance=1e-10)
+    >>> print(numerix.allclose(solve(solver, dt=1.),
+    ...                        solve(LinearLUSolver(), dt=1.))) # doctest: +PYAMG, +SERIAL
+    True
+    >>> hierarchy = precon._hierarchy # doctest: +PYAMG, +SERIAL
+
+    A new time step changes the values of the matrix, but not where they
+    are, so the aggregates are reused
+
+    >>> print(numerix.allclose(solve(solver, dt=2.),
+    ...                        solve(LinearLUSolver(), dt=2.))) # doctest: +PYAMG, +SERIAL
+    True
+    >>> print(precon._hierarchy is not hierarchy,
+    ...       len(precon._hierarchy.levels) == len(hierarchy.levels)) # doctest: +PYAMG, +SERIAL
+    True True
+    >>> print(all((new.AggOp != old.AggOp).nnz == 0
+    ...           for new, old in zip(precon._hierarchy.levels[:-1],
+    ...                               hierarchy.levels[:-1]))) # doctest: +PYAMG, +SERIAL
+    True
+    """
+
+    def __init__(self, cycle='V'):
+        """
+        Parameters
+        ----------
+        cycle : {'V', 'W', 'F', 'AMLI'}
+            Type of multigrid cycle to apply.
+        """
+        super(SmoothedAggregationPreconditioner, self).__init__()
+        self.cycle = cycle
+
+    def _setup(self, A, **kwargs):
+        from pyamg import smoothed_aggregation_solver
+
+        self._hierarchy = smoothed_aggregation_solver(A, keep=True, **kwargs)
+        return self._hierarchy.aspreconditioner(cycle=self.cycle)
+
+    def _update(self, A):
+        levels = self._hierarchy.levels
+        aggregate = [('predefined', {'AggOp': level.AggOp.tocsr()})
+                     for level in levels[:-1]]
+        return self._setup(A, aggregate=aggregate, max_levels=len(levels))
+
+def _test():
+    import fipy.tests.doctestPlus
+    return fipy.tests.doctestPlus.testmod()
+
+if __name__ == "__main__":
+    _test()
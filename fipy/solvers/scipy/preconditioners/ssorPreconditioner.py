@@ -0,0 +1,82 @@
+from __future__ import unicode_literals
+__docformat__ = 'restructuredtext'
+
+from scipy.sparse import diags, tril, triu
+from scipy.sparse.linalg import LinearOperator, splu
+
+from fipy.solvers.scipy.preconditioners.preconditioner import Preconditioner
+
+__all__ = ["SsorPreconditioner"]
+from future.utils import text_to_native_str
+__all__ = [text_to_native_str(n) for n in __all__]
+
+class SsorPreconditioner(Preconditioner):
+    r"""
+    Symmetric successive over-relaxation preconditioner for the SciPy
+    solvers.
+
+    Applies the inverse of
+
+    .. math::
+
+       M = \frac{1}{\omega (2 - \omega)} (D + \omega L) D^{-1} (D + \omega U)
+
+    where :math:`D`, :math:`L`, and :math:`U` are the diagonal, strictly
+    lower, and strictly upper parts of the matrix.
+
+    >>> from fipy import CellVariable, Grid2D, DiffusionTerm
+    >>> from fipy.solvers.scipy import LinearLUSolver, LinearPCGSolver
+    >>> from fipy.tools import numerix
+    >>> mesh = Grid2D(nx=20, ny=20)
+    >>> def solve(solver):
+    ...     phi = CellVariable(mesh=mesh)
+    ...     phi.constrain(1., where=mesh.facesLeft)
+    ...     phi.constrain(0., where=mesh.facesRight)
+    ...     (DiffusionTerm(coeff=1. + mesh.x) == mesh.y).solve(var=phi, solver=solver)
+    ...     return phi.value
+    >>> exact = solve(LinearLUSolver()) # doctest: +SERIAL
+    >>> for omega in (1., 1.5):
+    ...     solver = LinearPCGSolver(precon=SsorPreconditioner(omega=omega),
+    ...                              tolerance=1e-10)
+    ...     print(numerix.allclose(solve(solver), exact),
+    ...           solver.statistics.summary()["failures"]) # doctest: +SERIAL
+    True 0
+    True 0
+    """
+
+    def __init__(self, omega=1.):
+        """
+        Parameters
+        ----------
+        omega : float
+            Relaxation factor, between 0 and 2.
+        """
+        super(SsorPreconditioner, self).__init__()
+        self.omega = omega
+
+    @staticmethod
+    def _triangularSolver(T):
+        # SuperLU does nothing but substitute when told not to reorder or
+        # pivot a triangular matrix; `spsolve_triangular` loops in Python
+        return splu(T.tocsc(), permc_spec="NATURAL",
+                    diag_pivot_thresh=0.,
+                    options=dict(SymmetricMode=True)).solve
+
+    def _setup(self, A):
+        omega = self.omega
+        D = diags(A.diagonal(), format="csr")
+        lower = self._triangularSolver(D + omega * tril(A, k=-1))
+        upper = self._triangularSolver(D + omega * triu(A, k=1))
+        scale = omega * (2 - omega)
+
+        def matvec(r):
+            return scale * upper(D * lower(r))
+
+        return LinearOperator(A.shape, matvec=matvec, dtype=A.dtype)
+
+def _test():
+    import fipy.tests.doctestPlus
+    return fipy.tests.doctestPlus.testmod()
+
+if __name__ == "__main__":
+    _test()
@@ -4,7 +4,9 @@ __docformat__ = 'restructuredtext'
 __all__ = []
 
 import os
+from timeit import default_timer as timer
 
+from fipy.matrices.scipyMatrix import _ScipyMatrixFreeMeshMatrix
 from fipy.solvers.scipy.scipySolver import _ScipySolver
 
 class _ScipyKrylovSolver(_ScipySolver):
@@ -14,21 +16,79 @@ class _ScipyKrylovSolver(_ScipySolver):
     .. attention:: This class is abstract. Always create one of its subclasses.
     """
 
+    def __init__(self, tolerance=1e-15, iterations=2000, precon=None, matrixFree=False):
+        """
+        Parameters
+        ----------
+        tolerance : float
+            Required error tolerance.
+        iterations : int
+            Maximum number of iterative steps to perform.
+        precon
+            Preconditioner to use.
+        matrixFree : bool
+            Whether to apply the unassembled contributions of the terms as
+            a :class:`~scipy.sparse.linalg.LinearOperator`, instead of
+            assembling a sparse matrix.  Saves the memory of the matrix,
+            but only preconditioners that need no more than the matrix
+            diagonal can be used.
+        """
+        super(_ScipyKrylovSolver, self).__init__(tolerance=tolerance, iterations=iterations, precon=precon)
+        self.matrixFree = matrixFree
+
+    @property
+    def _matrixClass(self):
+        if self.matrixFree:
+            return _ScipyMatrixFreeMeshMatrix
+        else:
+            return super(_ScipyKrylovSolver, self)._matrixClass
+
     def _solve_(self, L, x, b):
+        initialResidual = self._statisticsResidual(L, x, b)
+
+        start = timer()
         A = L.matrix
         if self.preconditioner is None:
             M = None
         else:
             M = self.preconditioner._applyToMatrix(A)
+        setupTime = timer() - start
+
+        iterations = [0]
 
+        def callback(xk):
+            iterations[0] += 1
+
+        start = timer()
         x, info = self.solveFnc(A, b, x,
                                 tol=self.tolerance,
                                 maxiter=self.iterations,
                                 M=M,
-                                atol='legacy')
+                                atol='legacy',
+                                callback=callback)
+        solveTime = timer() - start
+
+        if info == 0:
+            reason = "converged"
+        elif info > 0:
+            reason = "iterations"
+        else:
+            reason = "breakdown"
+
+        finalResidual = self._statisticsResidual(L, x, b)
+        self._recordStatistics(iterations=iterations[0],
+                               initialResidual=initialResidual,
+                               finalResidual=finalResidual,
+                               reason=reason,
+                               converged=(info == 0),
+                               setupTime=setupTime,
+                               solveTime=solveTime)
 
         if 'FIPY_VERBOSE_SOLVER' in os.environ:
-            if info < 0:
-                PRINT('failure', self._warningList[info].__class__.__name__)
+            from fipy.tools.debug import PRINT
+            PRINT('iterations: %d / %d' % (iterations[0], self.iterations))
+            PRINT('convergence:', reason)
+            if finalResidual is not None:
+                PRINT('residual:', finalResidual)
 
         return x
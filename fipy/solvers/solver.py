@@ -17,6 +17,7 @@ from builtins import object
 from builtins import str
 __docformat__ = 'restructuredtext'
 
+from fipy.solvers.solverStatistics import SolverStatistics
 from fipy.tools import numerix
 
 __all__ = ["SolverConvergenceWarning", "MaximumIterationWarning",
@@ -91,6 +92,51 @@ class Solver(object):
 
         self.preconditioner = precon
 
+    _statistics = None
+
+    @property
+    def statistics(self):
+        """Records of the most recent solves by this solver
+
+        A :class:`~fipy.solvers.solverStatistics.SolverStatistics` of the
+        iterations, residuals, and times of each call to `solve()` or
+        `sweep()` that used this solver.
+        """
+        if self._statistics is None:
+            self._statistics = SolverStatistics()
+
+        return self._statistics
+
+    @staticmethod
+    def _residualNorm(L, x, b):
+        return numerix.L2norm(L * x - b)
+
+    def _statisticsResidual(self, L, x, b):
+        """The 2-norm of `L * x - b`, if the :attr:`statistics` want it
+        """
+        if self.statistics.residuals:
+            return self._residualNorm(L, x, b)
+        else:
+            return None
+
+    def _recordStatistics(self, iterations, initialResidual, finalResidual,
+                          reason, converged, setupTime, solveTime):
+        def toFloat(residual):
+            if residual is None:
+                return None
+            else:
+                return float(residual)
+
+        self.statistics.record(solver=self.__class__.__name__,
+                               variable=getattr(self.var, "name", ""),
+                               iterations=iterations,
+                               initialResidual=toFloat(initialResidual),
+                               finalResidual=toFloat(finalResidual),
+                               reason=reason,
+                               converged=bool(converged),
+                               setupTime=setupTime,
+                               solveTime=solveTime)
+
     def _storeMatrix(self, var, matrix, RHSvector):
         self.var = var
         self.matrix = matrix
@@ -0,0 +1,254 @@
+from __future__ import division
+from __future__ import unicode_literals
+from builtins import object
+__docformat__ = 'restructuredtext'
+
+import collections
+import csv
+import json
+
+__all__ = ["SolverStatistics"]
+from future.utils import text_to_native_str
+__all__ = [text_to_native_str(n) for n in __all__]
+
+class SolverStatistics(object):
+    r"""Records of the most recent solves of a
+    :class:`~fipy.solvers.solver.Solver`
+
+    Every call to `solve()` or `sweep()` appends a record, a `dict` with
+    the fields
+
+    `solver`
+        Name of the solver class.
+    `variable`
+        Name of the solution variable.
+    `iterations`
+        Number of iterations, or of refinement steps of a direct solver.
+    `initialResidual`, `finalResidual`
+        2-norm of :math:`b - A x` before and after the solve.  A Krylov
+        solver only reports them if `residuals` is set, as they cost it
+        two more matrix-vector products; otherwise they are `None`.
+    `reason`
+        Why the solver stopped, as reported by the solver suite.
+    `converged`
+        Whether the solver met its tolerance.
+    `setupTime`, `solveTime`
+        Seconds spent preparing (factoring, preconditioning) and iterating.
+
+    Only the last `capacity` records are kept.
+
+    >>> stats = SolverStatistics(capacity=2)
+    >>> for i in range(3):
+    ...     stats.record(solver="LinearPCGSolver", variable="phi",
+    ...                  iterations=10 * (i + 1), initialResidual=1.,
+    ...                  finalResidual=1e-10, reason="converged",
+    ...                  converged=True, setupTime=0.5, solveTime=1.)
+    >>> len(stats)
+    2
+    >>> print([r["iterations"] for r in stats])
+    [20, 30]
+    >>> summary = stats.summary()
+    >>> print(summary["solves"], summary["iterations"], summary["maxIterations"])
+    2 50 30
+    >>> print(summary["setupTime"], summary["solveTime"])
+    1.0 2.0
+
+    Summaries can be broken down by any field, to find the equation that
+    takes the longest to solve
+
+    >>> stats.record(solver="LinearPCGSolver", variable="c",
+    ...              iterations=1000, initialResidual=1.,
+    ...              finalResidual=1e-3, reason="iterations",
+    ...              converged=False, setupTime=0.5, solveTime=20.)
+    >>> byVariable = stats.summary(by="variable")
+    >>> print(sorted(byVariable.keys()))
+    ['c', 'phi']
+    >>> print(byVariable["c"]["failures"], byVariable["phi"]["failures"])
+    1 0
+
+    The records can be exported as CSV
+
+    >>> from io import StringIO
+    >>> f = StringIO()
+    >>> stats.toCSV(f)
+    >>> print(f.getvalue().splitlines()[0])
+    solver,variable,iterations,initialResidual,finalResidual,reason,converged,setupTime,solveTime
+    >>> print(f.getvalue().splitlines()[-1])
+    LinearPCGSolver,c,1000,1.0,0.001,iterations,False,0.5,20.0
+
+    or JSON
+
+    >>> f = StringIO()
+    >>> stats.toJSON(f)
+    >>> import json
+    >>> print(json.loads(f.getvalue())[-1]["variable"])
+    c
+
+    >>> stats.clear()
+    >>> len(stats)
+    0
+
+    Every solver keeps its own records
+
+    >>> from fipy import CellVariable, Grid1D, DiffusionTerm, DefaultSolver
+    >>> mesh = Grid1D(nx=10)
+    >>> var = CellVariable(mesh=mesh, name="phi")
+    >>> var.constrain(1., where=mesh.facesLeft)
+    >>> solver = DefaultSolver()
+    >>> DiffusionTerm().solve(var=var, solver=solver)
+    >>> DiffusionTerm().solve(var=var, solver=solver)
+    >>> print(len(solver.statistics))
+    2
+    >>> record = solver.statistics[-1]
+    >>> print(record["variable"], record["converged"])
+    phi True
+
+    and measures the residuals of each solve if asked to
+
+    >>> from fipy import LinearPCGSolver
+    >>> solver = LinearPCGSolver(tolerance=1e-10)
+    >>> DiffusionTerm().solve(var=var, solver=solver)
+    >>> print(solver.statistics[-1]["finalResidual"])
+    None
+    >>> solver.statistics.residuals = True
+    >>> DiffusionTerm().solve(var=var, solver=solver)
+    >>> print(solver.statistics[-1]["finalResidual"] < 1e-6)
+    True
+    """
+
+    fields = ("solver", "variable", "iterations",
+              "initialResidual", "finalResidual",
+              "reason", "converged",
+              "setupTime", "solveTime")
+
+    def __init__(self, capacity=1000, residuals=False):
+        """
+        Parameters
+        ----------
+        capacity : int
+            Number of records to keep, or `None` to keep them all.
+        residuals : bool
+            Whether solvers should measure residuals that they don't
+            calculate anyway.
+        """
+        self._records = collections.deque(maxlen=capacity)
+        self.residuals = residuals
+
+    @property
+    def capacity(self):
+        """Number of records to keep"""
+        return self._records.maxlen
+
+    @capacity.setter
+    def capacity(self, capacity):
+        self._records = collections.deque(self._records, maxlen=capacity)
+
+    def record(self, **kwargs):
+        """Append a record, dropping the oldest if full
+
+        Parameters
+        ----------
+        **kwargs
+            Values of `fields`. Missing ones are `None`.
+        """
+        self._records.append(dict((field, kwargs.get(field)) for field in self.fields))
+
+    def clear(self):
+        """Discard all records"""
+        self._records.clear()
+
+    def __len__(self):
+        return len(self._records)
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def __getitem__(self, index):
+        return self._records[index]
+
+    @staticmethod
+    def _summarize(records):
+        iterations = [r["iterations"] for r in records if r["iterations"] is not None]
+        summary = dict(solves=len(records),
+                       failures=len([r for r in records if not r["converged"]]),
+                       iterations=sum(iterations),
+                       maxIterations=max(iterations) if iterations else None,
+                       setupTime=sum(r["setupTime"] or 0. for r in records),
+                       solveTime=sum(r["solveTime"] or 0. for r in records))
+        if iterations:
+            summary["meanIterations"] = summary["iterations"] / len(iterations)
+        else:
+            summary["meanIterations"] = None
+
+        return summary
+
+    def summary(self, by=None):
+        """Aggregate the records
+
+        Parameters
+        ----------
+        by : str, optional
+            Field, such as "variable" or "solver", to group the records by.
+
+        Returns
+        -------
+        dict
+            Number of `solves` and of `failures` to converge, total, mean,
+            and maximum `iterations`, and total `setupTime` and
+            `solveTime`, or, if `by` is given, a `dict` of these for each
+            value of the field.
+        """
+        if by is None:
+            return self._summarize(list(self._records))
+
+        groups = collections.OrderedDict()
+        for r in self._records:
+            groups.setdefault(r[by], []).append(r)
+
+        return dict((key, self._summarize(records)) for key, records in groups.items())
+
+    @staticmethod
+    def _open(f):
+        if hasattr(f, "write"):
+            return f, False
+        else:
+            return open(f, "w"), True
+
+    def toCSV(self, f):
+        """Write the records as comma-separated values
+
+        Parameters
+        ----------
+        f : str or file
+            Name of the file, or an open file, to write to.
+        """
+        f, close = self._open(f)
+        try:
+            writer = csv.DictWriter(f, fieldnames=self.fields, lineterminator="\n")
+            writer.writeheader()
+            writer.writerows(self._records)
+        finally:
+            if close:
+                f.close()
+
+    def toJSON(self, f):
+        """Write the records as a JSON list
+
+        Parameters
+        ----------
+        f : str or file
+            Name of the file, or an open file, to write to.
+        """
+        f, close = self._open(f)
+        try:
+            f.write(json.dumps(list(self._records), indent=1))
+        finally:
+            if close:
+                f.close()
+
+def _test():
+    import fipy.tests.doctestPlus
+    return fipy.tests.doctestPlus.testmod()
+
+if __name__ == "__main__":
+    _test()
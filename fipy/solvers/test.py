@@ -1,12 +1,22 @@
 from __future__ import unicode_literals
 __all__ = []
 
-from fipy.tests.lateImportTest import _LateImportTestSuite
+from fipy.tests.doctestPlus import _LateImportDocTestSuite
 import fipy.tests.testProgram
 
 def _suite():
-    return _LateImportTestSuite(testModuleNames = (),
-                                base = __name__)
+    return _LateImportDocTestSuite(docTestModuleNames = (
+            'solverStatistics',
+            'linearSystemStore',
+            'autotuningSolver',
+            'scipy.linearGCRODRSolver',
+            'scipy.linearLUSolver',
+            'scipy.preconditioners.preconditioner',
+            'scipy.preconditioners.jacobiPreconditioner',
+            'scipy.preconditioners.iluPreconditioner',
+            'scipy.preconditioners.ssorPreconditioner',
+            'scipy.preconditioners.smoothedAggregationPreconditioner',
+        ), base = __name__)
 
 if __name__ == '__main__':
     fipy.tests.testProgram.main(defaultTest='_suite')
@@ -4,6 +4,7 @@ from builtins import range
 __docformat__ = 'restructuredtext'
 
 import os
+from timeit import default_timer as timer
 
 from PyTrilinos import Epetra
 from PyTrilinos import Amesos
@@ -47,7 +48,14 @@ class LinearLUSolver(TrilinosSolver):
 
     def _solve_(self, L, x, b):
 
-        for iteration in range(self.iterations):
+        initialResidual = self._residualNorm(L, x, b)
+
+        # Amesos factors the matrix anew for each correction, so the
+        # setup can't be told apart from the solve
+        start = timer()
+        # the last pass only measures the residual of the last correction
+        converged = False
+        for iteration in range(self.iterations + 1):
              # errorVector = L*x - b
              errorVector = Epetra.Vector(L.RangeMap())
              L.Multiply(False, x, errorVector)
@@ -63,6 +71,9 @@ class LinearLUSolver(TrilinosSolver):
                  tol0 = tol
 
              if (tol / tol0) <= self.tolerance:
+                 converged = True
+                 break
+             elif iteration == self.iterations:
                  break
 
              xError = Epetra.Vector(L.RowMap())
@@ -72,8 +83,17 @@ class LinearLUSolver(TrilinosSolver):
              Solver.Solve()
 
              x[:] = x - xError
+        solveTime = timer() - start
+
+        self._recordStatistics(iterations=iteration,
+                               initialResidual=initialResidual,
+                               finalResidual=errorVector.Norm2(),
+                               reason="converged" if converged else "iterations",
+                               converged=converged,
+                               setupTime=0.,
+                               solveTime=solveTime)
 
         if 'FIPY_VERBOSE_SOLVER' in os.environ:
             from fipy.tools.debug import PRINT
-            PRINT('iterations: %d / %d' % (iteration + 1, self.iterations))
+            PRINT('iterations: %d / %d' % (iteration, self.iterations))
             PRINT('residual:', errorVector.Norm2())
@@ -2,6 +2,7 @@ from __future__ import unicode_literals
 __docformat__ = 'restructuredtext'
 
 import os
+from timeit import default_timer as timer
 
 from PyTrilinos import AztecOO
 
@@ -39,6 +40,9 @@ class TrilinosAztecOOSolver(TrilinosSolver):
 
     def _solve_(self, L, x, b):
 
+        initialResidual = self._statisticsResidual(L, x, b)
+
+        start = timer()
         Solver = AztecOO.AztecOO(L, x, b)
         Solver.SetAztecOption(AztecOO.AZ_solver, self.solver)
 
@@ -50,24 +54,35 @@ class TrilinosAztecOOSolver(TrilinosSolver):
             self.preconditioner._applyToSolver(solver=Solver, matrix=L)
         else:
             Solver.SetAztecOption(AztecOO.AZ_precond, AztecOO.AZ_none)
+        setupTime = timer() - start
 
+        start = timer()
         output = Solver.Iterate(self.iterations, self.tolerance)
+        solveTime = timer() - start
 
         if self.preconditioner is not None:
             if hasattr(self.preconditioner, 'Prec'):
                 del self.preconditioner.Prec
 
-        if 'FIPY_VERBOSE_SOLVER' in os.environ:
-            status = Solver.GetAztecStatus()
+        status = Solver.GetAztecStatus()
+        failure = {AztecOO.AZ_normal : 'AztecOO.AZ_normal',
+                   AztecOO.AZ_param : 'AztecOO.AZ_param',
+                   AztecOO.AZ_breakdown : 'AztecOO.AZ_breakdown',
+                   AztecOO.AZ_loss : 'AztecOO.AZ_loss',
+                   AztecOO.AZ_ill_cond : 'AztecOO.AZ_ill_cond',
+                   AztecOO.AZ_maxits : 'AztecOO.AZ_maxits'}
+
+        self._recordStatistics(iterations=int(status[AztecOO.AZ_its]),
+                               initialResidual=initialResidual,
+                               finalResidual=self._statisticsResidual(L, x, b),
+                               reason=failure[status[AztecOO.AZ_why]],
+                               converged=(status[AztecOO.AZ_why] == AztecOO.AZ_normal),
+                               setupTime=setupTime,
+                               solveTime=solveTime)
 
+        if 'FIPY_VERBOSE_SOLVER' in os.environ:
             from fipy.tools.debug import PRINT
             PRINT('iterations: %d / %d' % (status[AztecOO.AZ_its], self.iterations))
-            failure = {AztecOO.AZ_normal : 'AztecOO.AZ_normal',
-                       AztecOO.AZ_param : 'AztecOO.AZ_param',
-                       AztecOO.AZ_breakdown : 'AztecOO.AZ_breakdown',
-                       AztecOO.AZ_loss : 'AztecOO.AZ_loss',
-                       AztecOO.AZ_ill_cond : 'AztecOO.AZ_ill_cond',
-                       AztecOO.AZ_maxits : 'AztecOO.AZ_maxits'}
 
             PRINT('failure', failure[status[AztecOO.AZ_why]])
 
@@ -133,3 +133,11 @@ class TrilinosSolver(Solver):
 
     def _calcRHSNorm(self):
         return self.nonOverlappingRHSvector.Norm2()
+
+    @staticmethod
+    def _residualNorm(L, x, b):
+        # residual = L*x - b
+        residual = Epetra.Vector(L.RangeMap())
+        L.Multiply(False, x, residual)
+        residual -= b
+        return residual.Norm2()
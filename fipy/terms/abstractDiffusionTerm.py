@@ -167,6 +167,18 @@ class _AbstractDiffusionTerm(_UnaryTerm):
 
             return None
 
+    def _assemblyInputs(self, var, dt=None, transientGeomCoeff=None, diffusionGeomCoeff=None):
+        if self.order != 2 or hasattr(self, 'anisotropySource'):
+            return None
+
+        # the solution variable only contributes through its constraints
+        constraints = tuple(var.arithmeticFaceValue.constraints) + tuple(var.faceGrad.constraints)
+        variables = [self.nthCoeff]
+        for constraint in constraints:
+            variables += [constraint.value, constraint.where]
+
+        return (constraints, variables)
+
     def _getCoefficientMatrixForTests(self, SparseMatrix, var, coeff):
         """
         This method was introduced because `__getCoefficientMatrix` is private, but
@@ -174,27 +186,61 @@ class _AbstractDiffusionTerm(_UnaryTerm):
         """
         return self.__getCoefficientMatrix(SparseMatrix, var, coeff)
 
-    def __getCoefficientMatrix(self, SparseMatrix, var, coeff):
+    def __getInteriorFaceIDs(self, var):
+        """Interior faces and the rows and columns they contribute to
+
+        The rows and columns of the `cell 1 diag`, `cell 1 offdiag`,
+        `cell 2 offdiag` and `cell 2 diag` contributions are concatenated,
+        in that order.  They depend only on the mesh and the size of `var`,
+        so they are cached on the mesh.
+
+        >>> from fipy import Grid1D, CellVariable, DiffusionTerm
+        >>> mesh = Grid1D(nx=3)
+        >>> var = CellVariable(mesh=mesh)
+        >>> faces, rows, cols = DiffusionTerm()._AbstractDiffusionTerm__getInteriorFaceIDs(var)
+        >>> print(faces)
+        [1 2]
+        >>> print(rows)
+        [0 1 0 1 1 2 1 2]
+        >>> print(cols)
+        [0 1 1 2 0 1 1 2]
+        >>> print(DiffusionTerm()._AbstractDiffusionTerm__getInteriorFaceIDs(var)[1] is rows)
+        True
+        """
         mesh = var.mesh
 
-        id1, id2 = mesh._adjacentCellIDs
-        interiorFaces = numerix.nonzero(mesh.interiorFaces)[0]
+        if not hasattr(mesh, '_diffusionInteriorFaceIDs'):
+            mesh._diffusionInteriorFaceIDs = {}
 
-        id1 = numerix.take(id1, interiorFaces)
-        id2 = numerix.take(id2, interiorFaces)
+        vectorSize = self._vectorSize(var)
+        if vectorSize not in mesh._diffusionInteriorFaceIDs:
+            interiorFaces = mesh.interiorFaceIDs
 
-        id1 = self._reshapeIDs(var, id1)
-        id2 = self._reshapeIDs(var, id2)
+            id1, id2 = mesh._adjacentCellIDs
+            id1 = self._reshapeIDs(var, numerix.take(id1, interiorFaces))
+            id2 = self._reshapeIDs(var, numerix.take(id2, interiorFaces))
+
+            rows1 = id1.ravel()
+            rows2 = id2.ravel()
+            cols1 = id1.swapaxes(0, 1).ravel()
+            cols2 = id2.swapaxes(0, 1).ravel()
+
+            mesh._diffusionInteriorFaceIDs[vectorSize] = (interiorFaces,
+                                                          numerix.concatenate((rows1, rows1, rows2, rows2)),
+                                                          numerix.concatenate((cols1, cols2, cols1, cols2)))
+
+        return mesh._diffusionInteriorFaceIDs[vectorSize]
+
+    def __getCoefficientMatrix(self, SparseMatrix, var, coeff):
+        mesh = var.mesh
 
-##         print 'id1',id1
-##         print 'id2',id2
+        interiorFaces, rows, cols = self.__getInteriorFaceIDs(var)
 
         coefficientMatrix = SparseMatrix(mesh=mesh, bandwidth = mesh._maxFacesPerCell + 1)
         interiorCoeff = numerix.take(coeff, interiorFaces, axis=-1).ravel()
-        coefficientMatrix.addAt(interiorCoeff, id1.ravel(), id1.swapaxes(0, 1).ravel())
-        coefficientMatrix.addAt(-interiorCoeff, id1.ravel(), id2.swapaxes(0, 1).ravel())
-        coefficientMatrix.addAt(-interiorCoeff, id2.ravel(), id1.swapaxes(0, 1).ravel())
-        coefficientMatrix.addAt(interiorCoeff, id2.ravel(), id2.swapaxes(0, 1).ravel())
+        coefficientMatrix.addAt(numerix.concatenate((interiorCoeff, -interiorCoeff,
+                                                     -interiorCoeff, interiorCoeff)),
+                                rows, cols)
 
 ##         print 'coefficientMatrix',coefficientMatrix
 ##         raw_input('stopped')
@@ -17,7 +17,9 @@ class _UpwindConvectionTermAlpha(FaceVariable):
     if inline.doInline:
         def _calcValue(self):
             P  = self.P.numericValue
-            alpha = self._array.copy()
+            alpha = self._outputBuffer(self._array.shape, self._array.dtype)
+            if alpha is None:
+                alpha = self._array.copy()
 
             inline._runInline("""
                 alpha[i] = 0.5;
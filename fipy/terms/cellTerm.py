@@ -87,6 +87,13 @@ class CellTerm(_NonDiffusionTerm):
 
         return self.coeffVectors
 
+    def _assemblyInputs(self, var, dt=None, transientGeomCoeff=None, diffusionGeomCoeff=None):
+        coeffVectors = self._getCoeffVectors_(var=var, transientGeomCoeff=transientGeomCoeff, diffusionGeomCoeff=diffusionGeomCoeff)
+        if dt is not None:
+            dt = float(dt)
+
+        return ((dt,), list(coeffVectors.values()) + [var.old])
+
     def _buildMatrixInline_(self, L, oldArray, b, dt, coeffVectors):
         oldArray = oldArray.value.ravel()
         N = len(oldArray)
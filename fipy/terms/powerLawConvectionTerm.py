@@ -35,7 +35,9 @@ class _PowerLawConvectionTermAlpha(FaceVariable):
         def _calcValue(self):
             eps = self.eps
             P = self.P.numericValue
-            alpha = self._array.copy()
+            alpha = self._outputBuffer(self._array.shape, self._array.dtype)
+            if alpha is None:
+                alpha = self._array.copy()
 
             inline._runInline("""
                 if (fabs(P[i]) < eps) {
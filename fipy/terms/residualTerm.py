@@ -23,6 +23,9 @@ class ResidualTerm(_ExplicitSourceTerm):
     def __repr__(self):
         return r"$\Delta$[" + repr(self.equation) + "]"
 
+    def _assemblyInputs(self, var, dt=None, transientGeomCoeff=None, diffusionGeomCoeff=None):
+        return None
+
     def _getGeomCoeff(self, var):
         return self.coeff
 
@@ -7,6 +7,7 @@ import os
 
 from fipy import input
 from fipy.tools import numerix
+from fipy.tools import parser
 from fipy.terms import AbstractBaseClassError
 from fipy.terms import SolutionVariableRequiredError
 
@@ -19,6 +20,10 @@ class Term(object):
     .. attention:: This class is abstract. Always create one of its subclasses.
     """
 
+    _incrementalAssembly = ((os.getenv("FIPY_INCREMENTAL_ASSEMBLY") is not None)
+                            or bool(parser.parse("--incremental-assembly",
+                                                 action="store_true")))
+
     def __init__(self, coeff=1., var=None):
         """
         Create a `Term`.
@@ -59,6 +64,22 @@ class Term(object):
     def _checkVar(self, var):
         raise NotImplementedError
 
+    def _assemblyInputs(self, var, dt=None, transientGeomCoeff=None, diffusionGeomCoeff=None):
+        """What the contribution of this term to the linear system depends on
+
+        Used by :envvar:`FIPY_INCREMENTAL_ASSEMBLY` to decide whether a
+        previously built contribution can be reused.
+
+        Returns
+        -------
+        tuple or None
+            `(key, variables)`, where the contribution is reusable as long
+            as the objects (or numbers) in the `key` tuple are unchanged and
+            none of the `Variable` objects in `variables` has gone stale.
+            `None` if the contribution must always be rebuilt.
+        """
+        return None
+
     def _buildCache(self, matrix, RHSvector):
         if self._cacheMatrix:
             self._matrix = matrix
@@ -133,6 +154,12 @@ class Term(object):
 
         solver._storeMatrix(var=var, matrix=matrix, RHSvector=RHSvector)
 
+        if 'FIPY_CAPTURE_SYSTEMS' in os.environ:
+            if not hasattr(Term, "_systemStore"):
+                from fipy.solvers.linearSystemStore import LinearSystemStore
+                Term._systemStore = LinearSystemStore(os.environ['FIPY_CAPTURE_SYSTEMS'])
+            Term._systemStore.capture(term=self, solver=solver, dt=dt)
+
         if 'FIPY_DISPLAY_MATRIX' in os.environ:
             if var is None:
                 name = ""
@@ -398,6 +425,15 @@ class Term(object):
         return NotImplementedError
 
     def getDefaultSolver(self, var=None, solver=None, *args, **kwargs):
+        if solver is None and 'FIPY_AUTOTUNE_SOLVER' in os.environ:
+            # the choice of solver belongs to this equation, and stands in
+            # for any default of the terms, as it only tries solvers that
+            # can solve the matrix
+            if not hasattr(self, "_autotuningSolver"):
+                from fipy.solvers import AutotuningSolver
+                self._autotuningSolver = AutotuningSolver()
+            return self._autotuningSolver
+
         from fipy.solvers import DefaultSolver
         return solver or self._getDefaultSolver(var, solver, *args, **kwargs) or DefaultSolver(*args, **kwargs)
 
@@ -58,7 +58,13 @@ class _UnaryTerm(Term):
 
         """
 
-        if var is self.var or self.var is None:
+        if (var is self.var or self.var is None) and self._incrementalAssembly and not boundaryConditions:
+            var, matrix, RHSvector = self._buildMatrixIncrementally(var,
+                                                                    SparseMatrix,
+                                                                    dt=dt,
+                                                                    transientGeomCoeff=transientGeomCoeff,
+                                                                    diffusionGeomCoeff=diffusionGeomCoeff)
+        elif var is self.var or self.var is None:
             var, matrix, RHSvector = self._buildMatrix(var,
                                                        SparseMatrix,
                                                        boundaryConditions=boundaryConditions,
@@ -86,6 +92,98 @@ class _UnaryTerm(Term):
 
         return (var, matrix, RHSvector)
 
+    def _buildMatrixIncrementally(self, var, SparseMatrix, dt=None, transientGeomCoeff=None, diffusionGeomCoeff=None):
+        """Build the contribution of this term, unless the last one is still valid
+
+        The contribution is kept, along with a `Variable` that subscribes
+        to the inputs declared by `_assemblyInputs()`.  Changing any of
+        those inputs marks it stale, forcing the contribution to be rebuilt.
+
+        >>> from fipy import *
+        >>> m = Grid1D(nx=3)
+        >>> v = CellVariable(mesh=m, value=1., hasOld=True)
+        >>> D = Variable(1.)
+        >>> diff = DiffusionTerm(coeff=D, var=v)
+        >>> trans = TransientTerm(var=v)
+        >>> SparseMatrix = DefaultSolver()._matrixClass
+        >>> def build(term, dt=1.):
+        ...     var, L, b = term._buildMatrixIncrementally(v, SparseMatrix, dt=dt)
+        ...     return L
+        >>> L1 = build(diff)
+        >>> sentinel = diff._assemblyCache[1]
+        >>> L2 = build(diff)
+        >>> print(diff._assemblyCache[1] is sentinel)
+        True
+        >>> print(numerix.allequal(L1.numpyArray, L2.numpyArray))
+        True
+
+        Changing the coefficient invalidates the contribution
+
+        >>> D.setValue(2.)
+        >>> L3 = build(diff)
+        >>> print(diff._assemblyCache[1] is sentinel)
+        False
+        >>> print(numerix.allequal(L3.numpyArray, 2 * L1.numpyArray))
+        True
+
+        as does changing the time step or the old value of the solution
+        variable of a `TransientTerm`
+
+        >>> L1 = build(trans)
+        >>> L2 = build(trans, dt=0.5)
+        >>> print(numerix.allequal(L2.numpyArray, 2 * L1.numpyArray))
+        True
+        >>> sentinel = trans._assemblyCache[1]
+        >>> v.setValue(2.)
+        >>> print(trans._assemblyCache[1].stale)
+        0
+        >>> v.updateOld()
+        >>> print(trans._assemblyCache[1].stale)
+        1
+        """
+        inputs = self._assemblyInputs(var, dt=dt,
+                                      transientGeomCoeff=transientGeomCoeff,
+                                      diffusionGeomCoeff=diffusionGeomCoeff)
+        if inputs is None:
+            self._assemblyCache = None
+            return self._buildMatrix(var,
+                                     SparseMatrix,
+                                     dt=dt,
+                                     transientGeomCoeff=transientGeomCoeff,
+                                     diffusionGeomCoeff=diffusionGeomCoeff)
+
+        key, variables = inputs
+        key = (var, SparseMatrix) + tuple(key)
+
+        cache = getattr(self, "_assemblyCache", None)
+        if (cache is not None
+            and _sameInputs(cache[0], key)
+            and not cache[1].stale):
+            matrix, RHSvector = cache[2:]
+        else:
+            var, matrix, RHSvector = self._buildMatrix(var,
+                                                       SparseMatrix,
+                                                       dt=dt,
+                                                       transientGeomCoeff=transientGeomCoeff,
+                                                       diffusionGeomCoeff=diffusionGeomCoeff)
+
+            from fipy.variables.variable import Variable
+            variables = [v for v in variables if isinstance(v, Variable)]
+            sentinel = Variable()
+            for v in variables:
+                sentinel._requires(v)
+                # changes only propagate through fresh `Variable` objects
+                v.value
+            sentinel._markFresh()
+
+            self._assemblyCache = (key, sentinel, matrix, RHSvector)
+
+        # the caller is free to modify what it is given
+        matrixCopy = SparseMatrix(mesh=var.mesh)
+        matrixCopy += matrix
+
+        return (var, matrixCopy, numerix.array(RHSvector, copy=True))
+
     def _reshapeIDs(self, var, ids):
         shape = (self._vectorSize(var), self._vectorSize(var), ids.shape[-1])
         ids = numerix.resize(ids, shape)
@@ -184,6 +282,23 @@ class _UnaryTerm(Term):
 
         """
 
+def _sameInputs(key, other):
+    """Whether two `_assemblyInputs()` keys are the same
+
+    Numbers are compared by value and everything else by identity.
+    """
+    if len(key) != len(other):
+        return False
+
+    for a, b in zip(key, other):
+        if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+            if a != b:
+                return False
+        elif a is not b:
+            return False
+
+    return True
+
 class __UnaryTerm(_UnaryTerm):
     """
     Dummy subclass for tests
@@ -43,7 +43,7 @@ class test(_test):
     # name), and help string.
     user_options = _test.user_options + [
         ('inline', None, "run FiPy with inline compilation enabled"),
-        ('pythoncompiled=', None, "directory in which to put weave's work product"),
+        ('pythoncompiled=', None, "directory in which to cache compiled inline code"),
         ('Trilinos', None, "run FiPy using Trilinos solvers"),
         ('Pysparse', None, "run FiPy using Pysparse solvers (default)"),
         ('trilinos', None, "run FiPy using Trilinos solvers"),
@@ -253,14 +253,14 @@ class test(_test):
 
         if self.inline:
             try:
-                import weave
+                import numba
             except ImportError as a:
-                print("!!! weave library is not installed", file=sys.stderr)
+                print("!!! numba library is not installed", file=sys.stderr)
                 return
 
         if self.pythoncompiled is not None:
             import os
-            os.environ['PYTHONCOMPILED'] = self.pythoncompiled
+            os.environ['FIPY_INLINE_CACHE'] = self.pythoncompiled
 
         self.printPackageInfo()
 
@@ -46,6 +46,7 @@ from .dimensions.physicalField import PhysicalField
 from fipy.tools.numerix import *
 from fipy.tools.vitals import Vitals
 from fipy.tools.sharedtempfile import SharedTemporaryFile
+from fipy.tools.ensemble import Ensemble
 
 __all__ = ["serialComm",
            "parallelComm",
@@ -56,7 +57,8 @@ __all__ = ["serialComm",
            "Vitals",
            "serial",
            "parallel",
-           "SharedTemporaryFile"]
+           "SharedTemporaryFile",
+           "Ensemble"]
 from future.utils import text_to_native_str
 __all__ = [text_to_native_str(n) for n in __all__]
 
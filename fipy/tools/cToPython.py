@@ -0,0 +1,583 @@
+"""Translation of the C kernels used by :mod:`fipy.tools.inline` to Python
+
+Only the subset of C that FiPy's inline kernels are written in is
+understood: scalar declarations, assignments, `if`/`else`, `for` and
+`while` loops, the usual operators, calls to math functions, object- and
+function-like `#define` macros and the `ITEM(array, i, vec)` macro of
+`_runIterateElementInline()`.  The resulting Python is suitable for
+compilation with :func:`numba.njit`.
+"""
+from __future__ import unicode_literals
+from builtins import object
+__docformat__ = 'restructuredtext'
+
+__all__ = []
+
+import keyword
+import re
+
+_typeNames = ('int', 'long', 'short', 'unsigned', 'signed', 'double',
+              'float', 'char', 'const', 'static', 'register')
+
+_intTypes = ('int', 'long', 'short', 'unsigned', 'signed', 'char')
+
+# math functions whose C names differ from numpy's
+_functions = {
+    'fabs': 'abs',
+    'abs': 'abs',
+    'min': 'min',
+    'max': 'max',
+    'fmod': '_np.fmod',
+    'pow': '_np.power',
+    'asin': '_np.arcsin',
+    'acos': '_np.arccos',
+    'atan': '_np.arctan',
+    'atan2': '_np.arctan2',
+    'asinh': '_np.arcsinh',
+    'acosh': '_np.arccosh',
+    'atanh': '_np.arctanh',
+    'absolute': 'abs',
+}
+
+_tokenPattern = re.compile(r"""
+    (?P<number>(?:\d+\.\d*|\.\d+|\d+)(?:[eE][-+]?\d+)?[fFlLuU]*)
+  | (?P<name>[A-Za-z_]\w*)
+  | (?P<op>\*\*|\+\+|--|\+=|-=|\*=|/=|%=|==|!=|<=|>=|&&|\|\||<<|>>|->|[-+*/%<>=!~&|^?:;,.()\[\]{}])
+  | (?P<space>\s+)
+""", re.VERBOSE)
+
+class CTranslationError(SyntaxError):
+    pass
+
+def _stripComments(code):
+    code = re.sub(r"/\*.*?\*/", " ", code, flags=re.DOTALL)
+    return re.sub(r"//[^\n]*", "", code)
+
+def _tokenize(code):
+    tokens = []
+    pos = 0
+    while pos < len(code):
+        match = _tokenPattern.match(code, pos)
+        if match is None:
+            raise CTranslationError("cannot tokenize %r" % code[pos:pos + 20])
+        pos = match.end()
+        if match.lastgroup != 'space':
+            tokens.append(match.group(match.lastgroup))
+
+    return tokens
+
+def _preprocess(code):
+    """Strip comments and collect `#define` macros
+
+    Returns
+    -------
+    tokens : list of str
+        The tokens of the code, without preprocessor lines.
+    macros : dict
+        Maps macro names to `(parameters, body tokens)`, where
+        `parameters` is `None` for object-like macros.
+    """
+    code = _stripComments(code).replace("\\\n", " ")
+
+    macros = {}
+    lines = []
+    for line in code.splitlines():
+        stripped = line.strip()
+        if stripped.startswith("#"):
+            match = re.match(r"#\s*define\s+([A-Za-z_]\w*)(\(([^)]*)\))?\s*(.*)$", stripped)
+            if match is not None:
+                name, hasParameters, parameters, body = match.groups()
+                if hasParameters:
+                    parameters = [p.strip() for p in parameters.split(",") if p.strip()]
+                else:
+                    parameters = None
+                macros[name] = (parameters, _tokenize(body))
+        else:
+            lines.append(line)
+
+    return _tokenize("\n".join(lines)), macros
+
+def _splitArguments(tokens, start):
+    """Split the parenthesized, comma-separated arguments at `tokens[start]`
+
+    Returns
+    -------
+    arguments : list of list of str
+    end : int
+        Index just past the closing parenthesis.
+    """
+    arguments = [[]]
+    depth = 0
+    for index in range(start, len(tokens)):
+        token = tokens[index]
+        if token == "(":
+            depth += 1
+            if depth == 1:
+                continue
+        elif token == ")":
+            depth -= 1
+            if depth == 0:
+                if arguments == [[]]:
+                    arguments = []
+                return arguments, index + 1
+        elif token == "," and depth == 1:
+            arguments.append([])
+            continue
+        arguments[-1].append(token)
+
+    raise CTranslationError("unbalanced parentheses")
+
+def _expandMacros(tokens, macros, depth=0):
+    if depth > 32:
+        raise CTranslationError("macro expansion too deep")
+
+    expanded = []
+    index = 0
+    changed = False
+    while index < len(tokens):
+        token = tokens[index]
+        if token in macros:
+            parameters, body = macros[token]
+            if parameters is None:
+                expanded += ["("] + body + [")"]
+                index += 1
+                changed = True
+                continue
+            elif index + 1 < len(tokens) and tokens[index + 1] == "(":
+                arguments, index = _splitArguments(tokens, index + 1)
+                substitutions = dict(zip(parameters, arguments))
+                replacement = []
+                for b in body:
+                    if b in substitutions:
+                        replacement += ["("] + substitutions[b] + [")"]
+                    else:
+                        replacement.append(b)
+                expanded += ["("] + replacement + [")"]
+                changed = True
+                continue
+        expanded.append(token)
+        index += 1
+
+    if changed:
+        return _expandMacros(expanded, macros, depth=depth + 1)
+    else:
+        return expanded
+
+class _Parser(object):
+    """Recursive-descent translation of C tokens to Python source
+    """
+
+    _assignments = ("=", "+=", "-=", "*=", "/=", "%=")
+
+    _binaryPrecedence = [
+        ("||",),
+        ("&&",),
+        ("|",),
+        ("^",),
+        ("&",),
+        ("==", "!="),
+        ("<", ">", "<=", ">="),
+        ("<<", ">>"),
+        ("+", "-"),
+        ("*", "/", "%"),
+    ]
+
+    _pythonOperators = {"||": "or", "&&": "and"}
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+        self.lines = []
+        self.declared = set()
+        self.itemArrays = set()
+
+    # token handling
+
+    def peek(self, offset=0):
+        if self.pos + offset < len(self.tokens):
+            return self.tokens[self.pos + offset]
+        else:
+            return None
+
+    def next(self):
+        token = self.peek()
+        if token is None:
+            raise CTranslationError("unexpected end of code")
+        self.pos += 1
+        return token
+
+    def expect(self, token):
+        found = self.next()
+        if found != token:
+            raise CTranslationError("expected %r, found %r" % (token, found))
+
+    def emit(self, indent, line):
+        self.lines.append("    " * indent + line)
+
+    # statements
+
+    def translate(self, indent):
+        start = len(self.lines)
+        while self.peek() is not None:
+            self.statement(indent)
+        if len(self.lines) == start:
+            self.emit(indent, "pass")
+        return self.lines
+
+    def block(self, indent):
+        """A statement, or a braced list of them, as a Python suite
+        """
+        start = len(self.lines)
+        if self.peek() == "{":
+            self.next()
+            while self.peek() != "}":
+                self.statement(indent)
+            self.next()
+        else:
+            self.statement(indent)
+
+        if len(self.lines) == start:
+            self.emit(indent, "pass")
+
+    def statement(self, indent):
+        token = self.peek()
+        if token == "{":
+            self.next()
+            while self.peek() != "}":
+                self.statement(indent)
+            self.next()
+        elif token == ";":
+            self.next()
+        elif token in _typeNames:
+            self.declaration(indent)
+            self.expect(";")
+        elif token == "if":
+            self.ifStatement(indent)
+        elif token == "for":
+            self.forStatement(indent)
+        elif token == "while":
+            self.next()
+            condition = self.expression()
+            self.emit(indent, "while %s:" % condition)
+            self.block(indent + 1)
+        elif token in ("break", "continue"):
+            self.next()
+            self.expect(";")
+            self.emit(indent, token)
+        elif token == "return":
+            self.next()
+            self.expect(";")
+            self.emit(indent, "return")
+        else:
+            self.emit(indent, self.simpleStatement())
+            self.expect(";")
+
+    def declaration(self, indent):
+        types = []
+        while self.peek() in _typeNames:
+            types.append(self.next())
+
+        if any(t in _intTypes for t in types) and "double" not in types and "float" not in types:
+            cast, default = "int", "0"
+        else:
+            cast, default = "float", "0."
+
+        while True:
+            name = self.name(self.next())
+            self.declared.add(name)
+            if self.peek() == "=":
+                self.next()
+                self.emit(indent, "%s = %s(%s)" % (name, cast, self.conditional()))
+            else:
+                self.emit(indent, "%s = %s" % (name, default))
+
+            if self.peek() == ",":
+                self.next()
+            else:
+                break
+
+    def ifStatement(self, indent, keyword="if"):
+        self.expect("if")
+        condition = self.expression()
+        self.emit(indent, "%s %s:" % (keyword, condition))
+        self.block(indent + 1)
+        if self.peek() == "else":
+            self.next()
+            if self.peek() == "if":
+                self.ifStatement(indent, keyword="elif")
+            else:
+                self.emit(indent, "else:")
+                self.block(indent + 1)
+
+    def forStatement(self, indent):
+        self.expect("for")
+        self.expect("(")
+
+        initStart = self.pos
+        if self.peek() in _typeNames:
+            while self.peek() in _typeNames:
+                self.next()
+        init = self.simpleStatement() if self.peek() != ";" else None
+        self.expect(";")
+        condition = self.expression() if self.peek() != ";" else "True"
+        self.expect(";")
+        increment = self.simpleStatement() if self.peek() != ")" else None
+        self.expect(")")
+
+        match = (init and increment
+                 and re.match(r"^(\w+) = (.+)$", init))
+        if match:
+            name, first = match.groups()
+            self.declared.add(name)
+            bound = re.match(r"^\(%s (<|<=) (.+)\)$" % name, condition)
+            step = {"%s += 1" % name: "1"}.get(increment)
+            if bound is not None and step is not None:
+                comparison, last = bound.groups()
+                if comparison == "<=":
+                    last = "(%s) + 1" % last
+                self.emit(indent, "for %s in range(%s, %s):" % (name, first, last))
+                self.block(indent + 1)
+                return
+
+        # general loops become `while` loops
+        if init:
+            self.emit(indent, init)
+        self.emit(indent, "while %s:" % condition)
+        self.block(indent + 1)
+        if increment:
+            self.emit(indent + 1, increment)
+
+    def simpleStatement(self):
+        """An expression statement, which may assign or increment
+        """
+        if self.peek() in ("++", "--"):
+            op = self.next()
+            target = self.unary()
+            return "%s %s= 1" % (target, op[0])
+
+        targets = []
+        start = self.pos
+        target = self.unary()
+        op = self.peek()
+        if op in ("++", "--"):
+            self.next()
+            return "%s %s= 1" % (target, op[0])
+        elif op == "=":
+            # chained assignments, e.g., `a = b = 0.`
+            targets.append(target)
+            self.next()
+            while True:
+                start = self.pos
+                value = self.conditional()
+                if self.peek() == "=":
+                    self.next()
+                    targets.append(value)
+                else:
+                    break
+            return " = ".join(targets + [value])
+        elif op in self._assignments:
+            self.next()
+            return "%s %s %s" % (target, op, self.conditional())
+        else:
+            self.pos = start
+            return self.expression()
+
+    # expressions
+
+    def expression(self):
+        value = self.conditional()
+        if self.peek() == ",":
+            raise CTranslationError("comma expressions are not supported")
+        return value
+
+    def conditional(self):
+        condition = self.binary(0)
+        if self.peek() == "?":
+            self.next()
+            whenTrue = self.conditional()
+            self.expect(":")
+            whenFalse = self.conditional()
+            return "(%s if %s else %s)" % (whenTrue, condition, whenFalse)
+        return condition
+
+    def binary(self, level):
+        if level == len(self._binaryPrecedence):
+            return self.unary()
+
+        left = self.binary(level + 1)
+        while self.peek() in self._binaryPrecedence[level]:
+            op = self.next()
+            right = self.binary(level + 1)
+            left = "(%s %s %s)" % (left, self._pythonOperators.get(op, op), right)
+        return left
+
+    def unary(self):
+        token = self.peek()
+        if token in ("-", "+", "~"):
+            self.next()
+            return "(%s%s)" % (token, self.unary())
+        elif token in ("!", "not"):
+            self.next()
+            return "(not %s)" % self.unary()
+        elif token == "&":
+            self.next()
+            return "&" + self.unary()
+        elif (token == "(" and self.peek(1) in _typeNames):
+            self.next()
+            types = []
+            while self.peek() in _typeNames:
+                types.append(self.next())
+            self.expect(")")
+            cast = "int" if any(t in _intTypes for t in types) else "float"
+            return "%s(%s)" % (cast, self.unary())
+        else:
+            return self.power()
+
+    def power(self):
+        base = self.postfix()
+        if self.peek() == "**":
+            self.next()
+            return "(%s ** %s)" % (base, self.unary())
+        return base
+
+    def postfix(self):
+        value = self.primary()
+        while self.peek() == "[":
+            self.next()
+            index = self.expression()
+            self.expect("]")
+            value = "%s[%s]" % (value, index)
+        return value
+
+    def primary(self):
+        token = self.next()
+        if token == "(":
+            value = self.expression()
+            self.expect(")")
+            return value
+        elif re.match(r"^[\d.]", token):
+            return self.number(token)
+        elif re.match(r"^[A-Za-z_]", token):
+            if self.peek() == "(":
+                return self.call(token)
+            return self.name(token)
+        else:
+            raise CTranslationError("unexpected %r" % token)
+
+    def number(self, token):
+        token = token.rstrip("fFlLuU")
+        if token.startswith("0") and len(token) > 1 and token.isdigit():
+            # C octal literals are not used, but don't misread them
+            token = str(int(token, 8))
+        return token
+
+    def name(self, token):
+        if token == "NULL":
+            return "None"
+        elif keyword.iskeyword(token) or token in ("True", "False", "None"):
+            return token + "_"
+        return token
+
+    def call(self, function):
+        self.expect("(")
+        arguments = []
+        while self.peek() != ")":
+            arguments.append(self.conditional())
+            if self.peek() == ",":
+                self.next()
+        self.expect(")")
+
+        if function == "ITEM":
+            return self.item(*arguments)
+        elif function in _functions:
+            return "%s(%s)" % (_functions[function], ", ".join(arguments))
+        else:
+            return "_np.%s(%s)" % (function, ", ".join(arguments))
+
+    def item(self, array, i, vec):
+        """Element `vec` of the tensor at position `i` of `array`
+        """
+        self.itemArrays.add(array)
+        strides = array + "__strides"
+        last = "%s[%s.shape[0] - 1]" % (strides, strides)
+        if vec == "None":
+            return "%s[(%s) * %s]" % (array, i, last)
+        elif vec.startswith("&"):
+            return "%s[(%s) * %s + (%s) * %s[0]]" % (array, i, last, vec[1:], strides)
+        else:
+            return "%s[_item(%s, %s, %s)]" % (array, strides, i, vec)
+
+def translate(code, indent=0):
+    """Translate C statements to lines of Python
+
+    >>> print("\\n".join(translate('''
+    ...     int ID1 = id1[i];   // a comment
+    ...     double x, y;
+    ...     x = y = 0.;
+    ...     if (fabs(P[i]) < eps && !flag) {
+    ...         alpha[i] = P[i] > 0. ? 1. : 0.;
+    ...     } else if (P[i] > 10.)
+    ...         alpha[i] += (P[i] - 1.) / P[i];
+    ...     else {
+    ...     }
+    ... ''')[0]))
+    ID1 = int(id1[i])
+    x = 0.
+    y = 0.
+    x = y = 0.
+    if ((abs(P[i]) < eps) and (not flag)):
+        alpha[i] = (1. if (P[i] > 0.) else 0.)
+    elif (P[i] > 10.):
+        alpha[i] += ((P[i] - 1.) / P[i])
+    else:
+        pass
+
+    Loops with a simple counter become `range()` loops
+
+    >>> print("\\n".join(translate('''
+    ...     int k;
+    ...     for (k = 0; k < M; k++) {
+    ...         int id = ITEM(ids, i, &k);
+    ...         ITEM(val, i, vec) += ITEM(orientations, i, &k) * ITEM(faceValues, id, NULL);
+    ...     }
+    ... ''')[0]))
+    k = 0
+    for k in range(0, M):
+        id = int(ids[(i) * ids__strides[ids__strides.shape[0] - 1] + (k) * ids__strides[0]])
+        val[_item(val__strides, i, vec)] += (orientations[(i) * orientations__strides[orientations__strides.shape[0] - 1] + (k) * orientations__strides[0]] * faceValues[(id) * faceValues__strides[faceValues__strides.shape[0] - 1]])
+
+    and macros are expanded
+
+    >>> print("\\n".join(translate('''
+    ...     # define pi 3.141592653589793
+    ...     # define mod(x) (fmod(x + 3. * pi, 2. * pi) - pi)
+    ...     val[i] = mod(var[i]);
+    ... ''')[0]))
+    val[i] = (_np.fmod((var[i] + (3. * 3.141592653589793)), (2. * 3.141592653589793)) - 3.141592653589793)
+
+    Parameters
+    ----------
+    code : str
+        The C code.
+    indent : int
+        The indentation level of the generated lines.
+
+    Returns
+    -------
+    lines : list of str
+        The Python code.
+    itemArrays : set of str
+        The names of arrays accessed through the `ITEM` macro, which must be
+        accompanied by a `<name>__strides` vector of element strides.
+    """
+    tokens, macros = _preprocess(code)
+    parser = _Parser(_expandMacros(tokens, macros))
+
+    return parser.translate(indent), parser.itemArrays
+
+def _test():
+    import fipy.tests.doctestPlus
+    return fipy.tests.doctestPlus.testmod()
+
+if __name__ == "__main__":
+    _test()
@@ -6,9 +6,11 @@ __docformat__ = 'restructuredtext'
 import io
 import pickle
 import os
+import struct
 import sys
 import gzip
 
+from fipy.tools import numerix
 from fipy.tools import parallelComm
 
 __all__ = ["write", "read"]
@@ -31,6 +33,57 @@ def write(data, filename = None, extension = '', communicator=parallelComm):
         >>> print(old.numberOfCells == new.numberOfCells)
         True
 
+    If `filename` ends in ".npz", or in ".h5" or ".hdf5" (which requires
+    :term:`h5py`), the object is written as a binary checkpoint,
+    instead.  Its large arrays, and the values of its `CellVariable`
+    objects, are stored as uncompressed binary datasets, which can be
+    memory-mapped when they are read back, and only the rest of the
+    object is pickled.
+
+        >>> import os, shutil, tempfile
+        >>> from fipy import CellVariable, Grid2D
+        >>> from fipy.tools import numerix
+        >>> directory = tempfile.mkdtemp()
+        >>> checkpoint = os.path.join(directory, "checkpoint.npz")
+        >>> mesh = Grid2D(nx=300, ny=200)
+        >>> phi = CellVariable(mesh=mesh, name="phi", hasOld=True,
+        ...                    value=mesh.x * mesh.y)
+        >>> phi.updateOld()
+        >>> phi.setValue(0., where=mesh.x < 10)
+        >>> write({"phi": phi, "time": 3.}, filename=checkpoint)
+        >>> data = read(checkpoint)
+        >>> print(data["time"], data["phi"].name)
+        3.0 phi
+        >>> print(numerix.allclose(data["phi"], phi.globalValue))
+        True
+        >>> print(numerix.allclose(data["phi"].old, phi.old.globalValue))
+        True
+        >>> print(data["phi"].mesh.shape)
+        (300, 200)
+
+    Arrays read with `lazy=True` are not read from the disk until they
+    are used
+
+        >>> big = numerix.arange(200000.)
+        >>> write((big, mesh), filename=checkpoint) # doctest: +SERIAL
+        >>> lazy, mesh2 = read(checkpoint, lazy=True) # doctest: +SERIAL
+        >>> print(isinstance(lazy, numerix.memmap), lazy[-1]) # doctest: +SERIAL
+        True 199999.0
+        >>> del lazy
+
+    When the `communicator` has more than one process, each one writes the
+    values of the cells it owns, without gathering them, to its own file,
+    named `filename` followed by the number of the process, *e.g.*,
+    "checkpoint.npz.3".  Each process of the run that reads the
+    checkpoint takes the values of its own cells from them, however many
+    processes there were in the run that wrote it.  The rest of the
+    object is taken from the file of the first process, so, as for a
+    pickle, meshes must be ones, such as a `Grid2D`, that are rebuilt from
+    the arguments they were created with, rather than from their
+    partitioned arrays.
+
+        >>> shutil.rmtree(directory)
+
     Parameters
     ----------
     data
@@ -44,6 +97,10 @@ def write(data, filename = None, extension = '', communicator=parallelComm):
     communicator : ~fipy.tools.comms.commWrapper.CommWrapper
         A duck-typed object with `procID` and `Nproc` attributes is sufficient
     """
+    if filename is not None and _isCheckpoint(filename):
+        _writeCheckpoint(data, filename, communicator)
+        return
+
     if communicator.procID == 0:
         if filename is None:
             import tempfile
@@ -61,11 +118,14 @@ def write(data, filename = None, extension = '', communicator=parallelComm):
     if filename is None:
         return (f, _filename)
 
-def read(filename, fileobject=None, communicator=parallelComm, mesh_unmangle=False):
+def read(filename, fileobject=None, communicator=parallelComm, mesh_unmangle=False, lazy=False):
     """
     Read a pickled object from a file. Returns the unpickled object.
     Wrapper for `cPickle.load()`.
 
+    Binary checkpoints are recognized by the extension of `filename`, as
+    for :func:`write`.
+
     Parameters
     ----------
     filename : str
@@ -76,7 +136,14 @@ def read(filename, fileobject=None, communicator=parallelComm, mesh_unmangle=Fal
         A duck-typed object with `procID` and `Nproc` attributes is sufficient
     mesh_unmangle : bool
         Whether to correct improper pickling of non-uniform meshes (ticket:243)
+    lazy : bool
+        Whether to memory-map the arrays of a binary checkpoint, rather
+        than read them.  The arrays are copied on write, so changing them
+        does not change the file.
     """
+    if fileobject is None and _isCheckpoint(filename):
+        return _readCheckpoint(filename, communicator, lazy=lazy)
+
     if communicator.procID == 0:
         fileStream = gzip.GzipFile(filename=filename, mode='r', fileobj=None)
         data = fileStream.read()
@@ -124,6 +191,462 @@ def read(filename, fileobject=None, communicator=parallelComm, mesh_unmangle=Fal
 
     return unpickler.load()
 
+_checkpointVersion = 1
+
+# arrays of fewer bytes than this are left in the pickle
+_checkpointThreshold = 2**12
+
+class _NPZStore(object):
+    """Datasets kept as `.npy` members of an uncompressed zip file, as
+    :func:`numpy.savez` writes them
+    """
+
+    def __init__(self, filename, mode="r"):
+        import zipfile
+
+        self.filename = filename
+        self.zip = zipfile.ZipFile(filename, mode=mode,
+                                   compression=zipfile.ZIP_STORED,
+                                   allowZip64=True)
+
+    def __setitem__(self, name, array):
+        from numpy.lib import format
+
+        with self.zip.open(name + ".npy", mode="w", force_zip64=True) as f:
+            format.write_array(f, array, allow_pickle=False)
+
+    def __getitem__(self, name):
+        import numpy
+        from numpy.lib import format
+
+        info = self.zip.getinfo(name + ".npy")
+        with open(self.filename, "rb") as f:
+            # the data follows the local header of the member, whose
+            # extra field need not match the one in the directory
+            f.seek(info.header_offset)
+            header = f.read(30)
+            nameLength, extraLength = struct.unpack("<HH", header[26:30])
+            f.seek(info.header_offset + 30 + nameLength + extraLength)
+            if format.read_magic(f) == (1, 0):
+                shape, fortran, dtype = format.read_array_header_1_0(f)
+            else:
+                shape, fortran, dtype = format.read_array_header_2_0(f)
+            offset = f.tell()
+
+        if numpy.prod(shape) == 0:
+            return numpy.empty(shape, dtype=dtype)
+
+        return numpy.memmap(self.filename, dtype=dtype, mode="c",
+                            offset=offset, shape=shape,
+                            order="F" if fortran else "C")
+
+    def close(self):
+        self.zip.close()
+
+class _HDF5Store(object):
+    """Datasets kept in an HDF5 file
+    """
+
+    def __init__(self, filename, mode="r"):
+        import h5py
+
+        self.filename = filename
+        self.file = h5py.File(filename, mode)
+
+    def __setitem__(self, name, array):
+        self.file.create_dataset(name, data=array)
+
+    def __getitem__(self, name):
+        import numpy
+
+        dataset = self.file[name]
+        offset = dataset.id.get_offset()
+        if (offset is None
+            or dataset.chunks is not None
+            or dataset.size == 0):
+            # only contiguous datasets can be mapped
+            return dataset[()]
+
+        return numpy.memmap(self.filename, dtype=dataset.dtype, mode="c",
+                            offset=offset, shape=dataset.shape)
+
+    def close(self):
+        self.file.close()
+
+_checkpointStores = {
+    ".npz": _NPZStore,
+    ".h5": _HDF5Store,
+    ".hdf5": _HDF5Store
+}
+
+def _isCheckpoint(filename):
+    return os.path.splitext(filename)[1].lower() in _checkpointStores
+
+def _openStore(filename, name, mode="r"):
+    """Open the store for checkpoint `filename` kept in file `name`"""
+    return _checkpointStores[os.path.splitext(filename)[1].lower()](name, mode=mode)
+
+class _LocalCells(object):
+    """Values of the cells of a `CellVariable` owned by this process
+    """
+
+    def __init__(self, var):
+        mesh = var.mesh
+        value = var.value
+        if mesh.communicator.Nproc > 1:
+            self.value = numerix.take(value, mesh._localNonOverlappingCellIDs, axis=-1)
+            self.ids = numerix.asarray(mesh._globalNonOverlappingCellIDs)
+        else:
+            self.value = numerix.asarray(value)
+            self.ids = None
+
+class _SavedCells(object):
+    """Values of the cells of a `CellVariable`, from the files of every
+    process that wrote them
+    """
+
+    def __init__(self, key, stores, hasIDs):
+        self.key = key
+        self.stores = stores
+        self.hasIDs = hasIDs
+
+    def valuesOn(self, mesh):
+        """The saved values of the local cells of `mesh`, ghosts included
+        """
+        import numpy
+
+        values = [store["cells%d" % self.key] for store in self.stores]
+        if not self.hasIDs:
+            if mesh.communicator.Nproc == 1:
+                return values[0]
+            else:
+                return numerix.take(values[0], mesh._globalOverlappingCellIDs, axis=-1)
+
+        wanted = numerix.asarray(mesh._globalOverlappingCellIDs)
+        order = numerix.argsort(wanted)
+        sortedWanted = wanted[order]
+        value = numpy.empty(values[0].shape[:-1] + (len(wanted),), dtype=values[0].dtype)
+        for store, saved in zip(self.stores, values):
+            ids = store["cellIDs%d" % self.key]
+            if len(ids) == 0 or len(wanted) == 0:
+                continue
+            positions = numerix.searchsorted(sortedWanted, ids).clip(max=len(wanted) - 1)
+            found = sortedWanted[positions] == ids
+            value[..., order[positions[found]]] = numerix.compress(found, saved, axis=-1)
+
+        return value
+
+def _restoreCellVariable(cls, state):
+    state = dict(state)
+    state["value"] = state["value"].valuesOn(state["mesh"])
+    var = cls.__new__(cls)
+    var.__setstate__(state)
+    return var
+
+class _CheckpointPickler(pickle.Pickler):
+    """Pickles an object with its large arrays, and the values of its
+    `CellVariable` objects, in `store`
+    """
+
+    def __init__(self, file, store):
+        pickle.Pickler.__init__(self, file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.store = store
+        self.arrays = 0
+        # numbered apart from the arrays, so that the `CellVariable`
+        # objects of every process are numbered alike
+        self.cells = 0
+
+    def reducer_override(self, obj):
+        from fipy.variables.cellVariable import CellVariable
+
+        if (isinstance(obj, CellVariable)
+            and type(obj).__getstate__ is CellVariable.__getstate__
+            and type(obj).__setstate__ is CellVariable.__setstate__):
+            state = dict(mesh=obj.mesh,
+                         name=obj.name,
+                         value=_LocalCells(obj),
+                         unit=obj.unit,
+                         old=obj._old)
+            return (_restoreCellVariable, (type(obj), state))
+
+        return NotImplemented
+
+    def persistent_id(self, obj):
+        import numpy
+
+        if isinstance(obj, _LocalCells):
+            key = self.cells
+            self.cells += 1
+            self.store["cells%d" % key] = obj.value
+            if obj.ids is not None:
+                self.store["cellIDs%d" % key] = obj.ids
+            return ("cells", key, obj.ids is not None)
+        elif (type(obj) is numpy.ndarray
+              and not obj.dtype.hasobject
+              and obj.nbytes >= _checkpointThreshold):
+            key = self.arrays
+            self.arrays += 1
+            self.store["array%d" % key] = obj
+            return ("array", key)
+
+        return None
+
+def _writeCheckpoint(data, filename, communicator):
+    if communicator.Nproc > 1:
+        name = "%s.%d" % (filename, communicator.procID)
+    else:
+        name = filename
+
+    store = _openStore(filename, name, mode="w")
+    try:
+        f = io.BytesIO()
+        _CheckpointPickler(f, store).dump(data)
+        store["objects"] = numerix.frombuffer(f.getvalue(), dtype="uint8")
+        store["header"] = numerix.array([_checkpointVersion, communicator.Nproc])
+    finally:
+        store.close()
+
+def _readCheckpoint(filename, communicator, lazy=False):
+    import numpy
+
+    if os.path.exists(filename):
+        stores = [_openStore(filename, filename)]
+    else:
+        stores = [_openStore(filename, filename + ".0")]
+
+    try:
+        version, Nproc = stores[0]["header"]
+        if version > _checkpointVersion:
+            raise IOError("%s was written by a newer version of FiPy" % filename)
+        for procID in range(1, Nproc):
+            stores.append(_openStore(filename, "%s.%d" % (filename, procID)))
+
+        def load(pid):
+            if pid[0] == "cells":
+                kind, key, hasIDs = pid
+                return _SavedCells(key=key, stores=stores, hasIDs=hasIDs)
+            else:
+                kind, key = pid
+                array = stores[0]["array%d" % key]
+                if not lazy:
+                    array = numpy.array(array)
+                return array
+
+        unpickler = pickle.Unpickler(io.BytesIO(stores[0]["objects"].tobytes()))
+        unpickler.persistent_load = load
+        data = unpickler.load()
+    finally:
+        for store in stores:
+            store.close()
+
+    return data
+
+_meshVersion = 1
+
+def _restoreMeshVariable(cls, mesh, name, value, unit):
+    return cls(mesh=mesh, name=name, value=value, unit=unit)
+
+def _holdsVariables(value):
+    """Whether `value` is a `Variable`, or a container of them
+    """
+    from fipy.variables.variable import Variable
+
+    if isinstance(value, dict):
+        value = list(value.values())
+    if isinstance(value, (list, tuple)):
+        return any(isinstance(v, Variable) for v in value)
+    return isinstance(value, Variable)
+
+class _MeshPickler(pickle.Pickler):
+    """Pickles the attributes of `mesh`, with their arrays, masked or
+    not, in `store`
+
+    The mesh and the communicators are pickled by reference and the
+    `MeshVariable` objects of the mesh by their value.  Arrays are
+    stored once, however many attributes share them, as recorded in
+    `saved`.
+    """
+
+    def __init__(self, file, store, mesh, saved):
+        pickle.Pickler.__init__(self, file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.store = store
+        self.mesh = mesh
+        self.saved = saved
+
+    def reducer_override(self, obj):
+        from fipy.variables.meshVariable import _MeshVariable
+
+        if isinstance(obj, _MeshVariable) and obj.mesh is self.mesh:
+            # operator variables are of classes made on the fly, so are
+            # restored as variables of the class they derive from,
+            # without the name they make from their operands
+            for cls in type(obj).__mro__:
+                module = sys.modules.get(cls.__module__)
+                if getattr(module, cls.__name__, None) is cls:
+                    break
+            return (_restoreMeshVariable,
+                    (cls, obj.mesh, obj._name, obj.value, obj.unit))
+
+        return NotImplemented
+
+    def persistent_id(self, obj):
+        import numpy
+        from fipy.tools import serialComm
+
+        if obj is self.mesh:
+            return ("mesh",)
+        elif obj is parallelComm:
+            return ("parallelComm",)
+        elif obj is serialComm:
+            return ("serialComm",)
+        elif id(obj) in self.saved:
+            return self.saved[id(obj)][1]
+        elif (type(obj) not in (numpy.ndarray, numerix.MA.MaskedArray)
+              or obj.dtype.hasobject
+              or obj.nbytes < _checkpointThreshold):
+            return None
+
+        key = len(self.saved)
+        self.store["array%d" % key] = numerix.MA.getdata(obj)
+        if type(obj) is numpy.ndarray:
+            pid = ("array", key)
+        else:
+            mask = numerix.MA.getmask(obj)
+            if mask is not numerix.MA.nomask:
+                self.store["mask%d" % key] = mask
+            pid = ("masked", key, mask is not numerix.MA.nomask, obj.fill_value)
+        # keep `obj` so that its id is not reused
+        self.saved[id(obj)] = (obj, pid)
+
+        return pid
+
+class _MeshUnpickler(pickle.Unpickler):
+    """Unpickles the attributes of `mesh` pickled by `_MeshPickler`
+    """
+
+    def __init__(self, file, store, mesh, loaded, lazy):
+        pickle.Unpickler.__init__(self, file)
+        self.store = store
+        self.mesh = mesh
+        self.loaded = loaded
+        self.lazy = lazy
+
+    def _array(self, name):
+        import numpy
+
+        array = self.store[name]
+        if self.lazy:
+            return array.view(numpy.ndarray)
+        else:
+            return numpy.array(array)
+
+    def persistent_load(self, pid):
+        from fipy.tools import serialComm
+
+        if pid[0] == "mesh":
+            return self.mesh
+        elif pid[0] == "parallelComm":
+            return parallelComm
+        elif pid[0] == "serialComm":
+            return serialComm
+
+        key = pid[1]
+        if key not in self.loaded:
+            array = self._array("array%d" % key)
+            if pid[0] == "masked":
+                kind, key, hasMask, fill_value = pid
+                if hasMask:
+                    mask = self._array("mask%d" % key)
+                else:
+                    mask = numerix.MA.nomask
+                array = numerix.MA.MaskedArray(array, mask=mask,
+                                               fill_value=fill_value)
+            self.loaded[key] = array
+
+        return self.loaded[key]
+
+def _meshStore(filename, name, mode="r"):
+    """Open the store for mesh file `filename` kept in file `name`"""
+    ext = os.path.splitext(filename)[1].lower()
+    return _checkpointStores.get(ext, _NPZStore)(name, mode=mode)
+
+# caches that terms and matrices keep on a mesh to speed up assembly,
+# which depend on the solver suite and are rebuilt on demand
+_meshCaches = ("_scipyScatterPatterns", "_diffusionInteriorFaceIDs")
+
+def _writeMesh(mesh, filename, geometry=True):
+    """Write `mesh` to `filename`, as :meth:`~fipy.meshes.abstractMesh.AbstractMesh.save`
+    """
+    Nproc = mesh.communicator.Nproc
+    if Nproc > 1:
+        name = "%s.%d" % (filename, mesh.communicator.procID)
+    elif parallelComm.procID == 0:
+        name = filename
+    else:
+        # every process holds the whole of a serial mesh
+        name = None
+
+    if name is not None:
+        if geometry:
+            state = dict((key, value) for (key, value) in mesh.__dict__.items()
+                         if key not in _meshCaches)
+            attributes = dict((key, value) for (key, value) in state.items()
+                              if not _holdsVariables(value))
+            variables = dict((key, value) for (key, value) in state.items()
+                             if _holdsVariables(value))
+        else:
+            attributes = mesh.__getstate__()
+            variables = {}
+
+        store = _meshStore(filename, name, mode="w")
+        try:
+            saved = {}
+            for key, value in (("attributes", attributes), ("variables", variables)):
+                f = io.BytesIO()
+                _MeshPickler(f, store, mesh, saved).dump(value)
+                store[key] = numerix.frombuffer(f.getvalue(), dtype="uint8")
+            store["class"] = numerix.frombuffer(pickle.dumps(type(mesh)), dtype="uint8")
+            store["header"] = numerix.array([_meshVersion, Nproc, geometry])
+        finally:
+            store.close()
+
+    parallelComm.Barrier()
+
+def _readMesh(filename, lazy=False):
+    """Read a mesh from `filename`, as :meth:`~fipy.meshes.abstractMesh.AbstractMesh.load`
+    """
+    if os.path.exists(filename):
+        name = filename
+    else:
+        name = "%s.%d" % (filename, parallelComm.procID)
+
+    store = _meshStore(filename, name)
+    try:
+        version, Nproc, geometry = store["header"]
+        if version > _meshVersion:
+            raise IOError("%s was written by a newer version of FiPy" % filename)
+        if Nproc > 1 and Nproc != parallelComm.Nproc:
+            raise IOError("%s was written by %d processes, not %d"
+                          % (filename, Nproc, parallelComm.Nproc))
+
+        cls = pickle.loads(store["class"].tobytes())
+        mesh = cls.__new__(cls)
+        loaded = {}
+        def load(key):
+            f = io.BytesIO(store[key].tobytes())
+            return _MeshUnpickler(f, store, mesh, loaded, lazy).load()
+
+        if geometry:
+            # the variables need the rest of the mesh to be built
+            mesh.__dict__.update(load("attributes"))
+            mesh.__dict__.update(load("variables"))
+        else:
+            mesh.__setstate__(load("attributes"))
+    finally:
+        store.close()
+
+    return mesh
+
 def _test():
     import fipy.tests.doctestPlus
     return fipy.tests.doctestPlus.testmod()
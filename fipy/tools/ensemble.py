@@ -0,0 +1,353 @@
+"""Run many independent simulations, that differ only in their parameters,
+in a pool of processes on one machine.
+
+The mesh, which is usually the largest object the simulations have in
+common, is built once, by the parent process, and sent to each worker
+only once.  Its arrays are passed through shared memory, rather than
+pickled and piped to every worker, and each worker rebuilds the mesh
+from them.
+
+Each worker is limited to `threads` BLAS (and OpenMP) threads, so that
+`processes` workers, each using every core for its linear algebra, do not
+fight over the machine.
+
+.. note::
+
+   The workers are started with the ``"spawn"`` method, by default, so
+   that the limit on the number of BLAS threads can take effect before
+   :term:`NumPy` is imported.  As for any :mod:`multiprocessing` program,
+   the `model` must then be defined at the top level of a module, and a
+   script that runs an `Ensemble` must guard its work with
+   ``if __name__ == "__main__":``.
+"""
+from __future__ import division
+from __future__ import unicode_literals
+from builtins import object
+__docformat__ = 'restructuredtext'
+
+import io
+import itertools
+import os
+import pickle
+
+__all__ = ["Ensemble", "parameterGrid"]
+from future.utils import text_to_native_str
+__all__ = [text_to_native_str(n) for n in __all__]
+
+_threadVariables = ("OMP_NUM_THREADS",
+                    "OPENBLAS_NUM_THREADS",
+                    "MKL_NUM_THREADS",
+                    "BLIS_NUM_THREADS",
+                    "VECLIB_MAXIMUM_THREADS",
+                    "NUMEXPR_NUM_THREADS")
+
+def parameterGrid(**axes):
+    """Every combination of the values of the parameters
+
+    >>> for parameters in parameterGrid(D=(1., 2.), nx=(10, 20)):
+    ...     print(sorted(parameters.items()))
+    [('D', 1.0), ('nx', 10)]
+    [('D', 1.0), ('nx', 20)]
+    [('D', 2.0), ('nx', 10)]
+    [('D', 2.0), ('nx', 20)]
+
+    Parameters
+    ----------
+    **axes
+        Sequence of values to take for each parameter.
+
+    Returns
+    -------
+    list of dict
+    """
+    names = sorted(axes.keys())
+    return [dict(zip(names, values))
+            for values in itertools.product(*[axes[name] for name in names])]
+
+class _SharedArrays(object):
+    """Pickles objects with their large arrays in shared memory
+
+    >>> from fipy.tools import numerix
+    >>> shared = _SharedArrays(threshold=0)
+    >>> a = numerix.arange(12.).reshape((3, 4))
+    >>> payload = shared.dumps({"a": a, "b": a.T, "c": [1, 2]})
+    >>> len(shared._blocks)
+    2
+    >>> blocks = []
+    >>> b = _SharedArrays.loads(payload, blocks=blocks)
+    >>> print(numerix.array_equal(b["a"], a), numerix.array_equal(b["b"], a.T))
+    True True
+    >>> print(b["a"].flags.writeable, b["c"])
+    False [1, 2]
+    >>> del b
+    >>> for block in blocks:
+    ...     block.close()
+    >>> shared.close()
+    """
+
+    def __init__(self, threshold=2**16):
+        """
+        Parameters
+        ----------
+        threshold : int
+            Arrays of fewer bytes than this are pickled as usual.
+        """
+        self.threshold = threshold
+        self._blocks = []
+
+    def _share(self, obj):
+        import numpy
+        from multiprocessing import shared_memory
+
+        if (type(obj) is not numpy.ndarray
+            or obj.dtype.hasobject
+            or obj.nbytes < max(self.threshold, 1)):
+            return None
+
+        if obj.flags.f_contiguous and not obj.flags.c_contiguous:
+            order = "F"
+        else:
+            order = "C"
+
+        block = shared_memory.SharedMemory(create=True, size=obj.nbytes)
+        self._blocks.append(block)
+        copy = numpy.ndarray(obj.shape, dtype=obj.dtype, buffer=block.buf, order=order)
+        copy[...] = obj
+        del copy
+
+        return (block.name, obj.shape, obj.dtype.str, order)
+
+    def dumps(self, obj):
+        f = io.BytesIO()
+        pickler = pickle.Pickler(f, protocol=pickle.HIGHEST_PROTOCOL)
+        pickler.persistent_id = self._share
+        pickler.dump(obj)
+        return f.getvalue()
+
+    @staticmethod
+    def loads(payload, blocks):
+        """Unpickle `payload`, keeping the shared memory it maps in `blocks`
+        """
+        import numpy
+        from multiprocessing import shared_memory
+
+        def load(pid):
+            name, shape, dtype, order = pid
+            block = shared_memory.SharedMemory(name=name)
+            blocks.append(block)
+            array = numpy.ndarray(shape, dtype=dtype, buffer=block.buf, order=order)
+            # every worker sees the same copy
+            array.flags.writeable = False
+            return array
+
+        unpickler = pickle.Unpickler(io.BytesIO(payload))
+        unpickler.persistent_load = load
+        return unpickler.load()
+
+    def close(self):
+        """Release the shared memory"""
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+class _ThreadLimit(object):
+    """Sets the environment that limits the BLAS threads of new processes
+
+    >>> before = os.environ.get("OMP_NUM_THREADS")
+    >>> with _ThreadLimit(2):
+    ...     print(os.environ["OMP_NUM_THREADS"])
+    2
+    >>> print(os.environ.get("OMP_NUM_THREADS") == before)
+    True
+    """
+
+    def __init__(self, threads):
+        self.threads = threads
+
+    def __enter__(self):
+        self._saved = dict((name, os.environ.get(name)) for name in _threadVariables)
+        if self.threads is not None:
+            for name in _threadVariables:
+                os.environ[name] = str(self.threads)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        for name, value in self._saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+# what each worker process was given by `_initializeWorker()`
+_worker = {}
+
+def _initializeWorker(payload, threads):
+    if threads is not None:
+        for name in _threadVariables:
+            os.environ[name] = str(threads)
+        try:
+            # BLAS that was already loaded, e.g., by a forked worker,
+            # has to be told directly
+            import threadpoolctl
+        except ImportError:
+            pass
+        else:
+            _worker["threadLimit"] = threadpoolctl.threadpool_limits(limits=threads)
+
+    _worker["blocks"] = []
+    _worker["model"], _worker["mesh"] = _SharedArrays.loads(payload, blocks=_worker["blocks"])
+
+def _runCase(parameters):
+    """Run the model of this worker for one set of `parameters`
+
+    A worker process is started with :func:`_initializeWorker`.  What it
+    does can be tried in this process, without a pool, whose workers
+    would have to import the script that runs the tests
+
+    >>> import gc
+    >>> from fipy.meshes import Grid1D
+    >>> shared = _SharedArrays(threshold=0)
+    >>> payload = shared.dumps((_steadyDiffusion, Grid1D(nx=10)))
+    >>> _initializeWorker(payload, threads=None)
+    >>> print(_worker["mesh"].numberOfCells, len(_worker["blocks"]) > 0) # doctest: +SERIAL
+    10 True
+    >>> print(round(_runCase(dict(right=3.)), 6)) # doctest: +SERIAL
+    2.85
+
+    Without a mesh, the model is only given the parameters
+
+    >>> _worker.update(model=lambda right: 2 * right, mesh=None)
+    >>> print(_runCase(dict(right=3.)))
+    6.0
+
+    >>> blocks = _worker.pop("blocks")
+    >>> _worker.clear()
+    >>> _ = gc.collect()
+    >>> for block in blocks:
+    ...     block.close()
+    >>> shared.close()
+    """
+    model, mesh = _worker["model"], _worker["mesh"]
+    if mesh is None:
+        return model(**parameters)
+    else:
+        return model(mesh=mesh, **parameters)
+
+class Ensemble(object):
+    """Runs a model for many sets of parameters in a pool of processes
+
+    The `model` is called once for each set of parameters, as
+    ``model(mesh=mesh, **parameters)``, or ``model(**parameters)`` if no
+    `mesh` is given, and whatever it returns, which must be picklable, is
+    passed back to the parent process.  For instance, a script that
+    solves a steady diffusion problem for three boundary values might
+    read::
+
+        from fipy import CellVariable, DiffusionTerm, Grid1D
+        from fipy.tools.ensemble import Ensemble
+
+        def steadyDiffusion(mesh, right):
+            phi = CellVariable(mesh=mesh)
+            phi.constrain(0., where=mesh.facesLeft)
+            phi.constrain(right, where=mesh.facesRight)
+            DiffusionTerm().solve(var=phi)
+            return float(phi.value[-1])
+
+        if __name__ == "__main__":
+            ensemble = Ensemble(model=steadyDiffusion, mesh=Grid1D(nx=10),
+                                processes=2)
+            for parameters, value in ensemble.run({"right": (1., 2., 3.)}):
+                print(parameters["right"], value)
+
+    The results arrive as each simulation finishes, not necessarily in the
+    order of `parameters`, which is why each is paired with the
+    parameters that produced it.
+    """
+
+    def __init__(self, model, mesh=None, processes=None, threads=1, startMethod="spawn"):
+        """
+        Parameters
+        ----------
+        model : callable
+            Builds and runs one simulation.  Must be defined at the top level
+            of a module, so that it can be pickled.
+        mesh : ~fipy.meshes.mesh.Mesh, optional
+            Mesh shared by every simulation.
+        processes : int, optional
+            Number of worker processes.  By default, as many as fit on the
+            cores of the machine with `threads` each.
+        threads : int, optional
+            Number of BLAS threads for each worker, or `None` to leave them
+            be.
+        startMethod : str
+            How :mod:`multiprocessing` starts the workers.
+        """
+        self.model = model
+        self.mesh = mesh
+        if processes is None:
+            processes = max((os.cpu_count() or 1) // (threads or 1), 1)
+        self.processes = processes
+        self.threads = threads
+        self.startMethod = startMethod
+
+    def run(self, parameters):
+        """Run every case, yielding each result as it finishes
+
+        Parameters
+        ----------
+        parameters : dict or iterable of dict
+            Keyword arguments for each call of the `model`, or a `dict` of
+            sequences of values to take every combination of, as
+            :func:`parameterGrid` does.
+
+        Yields
+        ------
+        parameters : dict
+            The parameters of a case.
+        result
+            What `model` returned for them.
+        """
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+
+        if isinstance(parameters, dict):
+            parameters = parameterGrid(**parameters)
+        parameters = list(parameters)
+
+        shared = _SharedArrays()
+        try:
+            payload = shared.dumps((self.model, self.mesh))
+            executor = ProcessPoolExecutor(max_workers=self.processes,
+                                           mp_context=multiprocessing.get_context(self.startMethod),
+                                           initializer=_initializeWorker,
+                                           initargs=(payload, self.threads))
+            futures = {}
+            try:
+                # workers are started as the cases are submitted
+                with _ThreadLimit(self.threads):
+                    futures = dict((executor.submit(_runCase, case), case)
+                                   for case in parameters)
+                for future in as_completed(futures):
+                    yield futures[future], future.result()
+            finally:
+                for future in futures:
+                    future.cancel()
+                executor.shutdown(wait=True)
+        finally:
+            shared.close()
+
+def _steadyDiffusion(mesh, right):
+    from fipy import CellVariable, DiffusionTerm
+
+    phi = CellVariable(mesh=mesh)
+    phi.constrain(0., where=mesh.facesLeft)
+    phi.constrain(right, where=mesh.facesRight)
+    DiffusionTerm().solve(var=phi)
+    return float(phi.value[-1])
+
+def _test():
+    import fipy.tests.doctestPlus
+    return fipy.tests.doctestPlus.testmod()
+
+if __name__ == "__main__":
+    _test()
@@ -1,20 +1,90 @@
+"""Compiled evaluation of FiPy's C kernels
+
+When `--inline` is passed on the command line, or :envvar:`FIPY_INLINE` is
+set, many of FiPy's array calculations are performed by small kernels,
+written in C, that loop over the elements of the arrays involved.  The
+kernels are translated to Python by :mod:`fipy.tools.cToPython` and
+compiled with `numba`_.  The generated modules, and `numba`'s compiled
+objects, are kept in the directory named by :envvar:`FIPY_INLINE_CACHE`,
+so that each kernel is only compiled once, rather than once per run.
+
+Alternatively, when `--fuse` is passed on the command line, or
+:envvar:`FIPY_FUSE` is set, expressions built from
+:class:`~fipy.variables.variable.Variable` objects are evaluated in a
+single pass by `numexpr`_, without allocating an array for every
+intermediate result.
+
+.. _numba: https://numba.pydata.org
+.. _numexpr: https://github.com/pydata/numexpr
+"""
 from __future__ import unicode_literals
 from builtins import range
-__all__ = ["doInline"]
+__all__ = ["doInline", "doFuse"]
 from future.utils import text_to_native_str
 __all__ = [text_to_native_str(n) for n in __all__]
 
+import hashlib
 import inspect
 import os
 import sys
+import tempfile
+import warnings
+
+from fipy.tests.doctestPlus import register_skipper
+
+def _checkForNumba():
+    hasNumba = True
+    try:
+        import numba
+    except Exception:
+        hasNumba = False
+    return hasNumba
+
+register_skipper(flag="NUMBA",
+                 test=_checkForNumba,
+                 why="the `numba` package cannot be imported")
 
 if '--inline' in [s.lower() for s in sys.argv[1:]]:
     doInline = True
 else:
     doInline = 'FIPY_INLINE' in os.environ
 
+if doInline:
+    if not _checkForNumba():
+        warnings.warn("inlining requires numba; continuing without it",
+                      UserWarning, stacklevel=2)
+        doInline = False
+
+def _checkForNumexpr():
+    hasNumexpr = True
+    try:
+        import numexpr
+    except Exception:
+        hasNumexpr = False
+    return hasNumexpr
+
+register_skipper(flag="NUMEXPR",
+                 test=_checkForNumexpr,
+                 why="the `numexpr` package cannot be imported")
+
+if '--fuse' in [s.lower() for s in sys.argv[1:]]:
+    doFuse = True
+else:
+    doFuse = 'FIPY_FUSE' in os.environ
+
+if doFuse:
+    if not _checkForNumexpr():
+        warnings.warn("fused evaluation requires numexpr; continuing without it",
+                      UserWarning, stacklevel=2)
+        doFuse = False
+
 _inlineFrameComment = 'FIPY_INLINE_COMMENT' in os.environ
 
+_inlineCacheDir = os.getenv('FIPY_INLINE_CACHE',
+                            os.path.join(tempfile.gettempdir(), 'fipy-inline'))
+
+_kernels = {}
+
 def _getframeinfo(level, context=1):
     """
     Much faster alternative to `inspect.getouterframes(inspect.currentframe())[level]`
@@ -29,11 +99,6 @@ def _rawCodeComment(code, level=2):
     if _inlineFrameComment:
         finfo = _getframeinfo(level=level)
 
-        # note:
-        # don't use #line because it actually makes it harder
-        # to find the offending code in both the C++ source and in the Python
-        #line %d "%s"
-
         return '''
 /*
     %s:%d
@@ -48,11 +113,6 @@ def _operatorVariableComment(canInline=True, level=3):
     if canInline and doInline and _inlineFrameComment:
         finfo = _getframeinfo(level=level)
 
-        # note:
-        # don't use #line because it actually makes it harder
-        # to find the offending code in both the C++ source and in the Python
-        #line %d "%s"
-
         if finfo[4] is not None:
             code = "\n".join(finfo[4])
         else:
@@ -68,7 +128,128 @@ def _operatorVariableComment(canInline=True, level=3):
     else:
         return ""
 
+_moduleTemplate = '''\
+%(comment)s
+import numpy as _np
+from numba import njit
+
+@njit(cache=True)
+def _item(strides, i, vec):
+    index = strides[strides.shape[0] - 1] * i
+    for j in range(strides.shape[0] - 1):
+        index += strides[j] * vec[j]
+    return index
+
+@njit(cache=True)
+def kernel(%(arguments)s):
+%(body)s
+'''
+
+def _loadKernel(code, lines, names):
+    """Compile the translated `lines`, caching the result on disk
+
+    Parameters
+    ----------
+    code : str
+        The original C code, recorded in the generated module.
+    lines : list of str
+        The body of the kernel, in Python, indented by one level.
+    names : list of str
+        The names of the kernel's arguments.
+    """
+    source = _moduleTemplate % dict(comment="\n".join("# " + line for line in code.splitlines()),
+                                    arguments=", ".join(names),
+                                    body="\n".join(lines))
+
+    key = hashlib.sha1(source.encode('utf-8')).hexdigest()
+
+    if key not in _kernels:
+        import importlib.util
+
+        if not os.path.isdir(_inlineCacheDir):
+            os.makedirs(_inlineCacheDir, exist_ok=True)
+
+        path = os.path.join(_inlineCacheDir, "kernel_%s.py" % key)
+        if not os.path.exists(path):
+            # write atomically, as other processes may be compiling
+            # the same kernel
+            fd, tmp = tempfile.mkstemp(suffix=".py", dir=_inlineCacheDir)
+            with os.fdopen(fd, 'w') as f:
+                f.write(source)
+            os.replace(tmp, path)
+
+        spec = importlib.util.spec_from_file_location("fipy_inline_%s" % key, path)
+        module = importlib.util.module_from_spec(spec)
+        # numba's cache must be able to find the module by name
+        sys.modules[spec.name] = module
+        spec.loader.exec_module(module)
+
+        _kernels[key] = module.kernel
+
+    return _kernels[key]
+
+def _prepareArguments(args, itemArrays=()):
+    """Flatten array arguments into contiguous buffers
+
+    Returns
+    -------
+    arguments : dict
+        The arguments to pass to the kernel.
+    writeBack : list of tuple
+        `(original, buffer)` pairs of arrays that had to be copied and whose
+        kernel results must be copied back.
+    """
+    from fipy.tools import numerix
+
+    arguments = {}
+    writeBack = []
+    for key, value in args.items():
+        if hasattr(value, 'dtype') and hasattr(value, 'shape'):
+            original = value
+            if value.dtype.char == '?':
+                value = value.astype('B')
+            value = numerix.ascontiguousarray(value)
+            if value is not original and getattr(original, 'flags', None) is not None and original.flags.writeable:
+                writeBack.append((original, value))
+            if key in itemArrays:
+                strides = numerix.array(value.strides, dtype=numerix.INT_DTYPE) // max(value.itemsize, 1)
+                if len(strides) == 0:
+                    strides = numerix.ones((1,), dtype=numerix.INT_DTYPE)
+                arguments[key + "__strides"] = strides
+            value = value.reshape(-1)
+        arguments[key] = value
+
+    return arguments, writeBack
+
+def _execute(code, lines, itemArrays, args):
+    from fipy.tools import cToPython
+
+    arguments, writeBack = _prepareArguments(args, itemArrays)
+    names = sorted(arguments.keys())
+    kernel = _loadKernel(code, lines, [cToPython._Parser([]).name(n) for n in names])
+
+    kernel(*[arguments[n] for n in names])
+
+    for original, buffer in writeBack:
+        original[...] = buffer.reshape(original.shape).astype(original.dtype)
+
 def _runInline(code_in, converters=None, verbose=0, comment=None, **args):
+    """Evaluate the C statements `code_in` for every `i`, `j`, `k`
+
+    Loops are generated over whichever of `ni`, `nj`, and `nk` are
+    present in `args`.
+
+    >>> from fipy.tools import numerix
+    >>> a = numerix.arange(6.).reshape((2, 3))
+    >>> b = numerix.zeros((2, 3))
+    >>> _runInline("b[i + j * ni] = a[i + j * ni] * a[i + j * ni] + j;",
+    ...            a=a, b=b, ni=3, nj=2) # doctest: +NUMBA
+    >>> print(numerix.allclose(b, [[0., 1., 4.],
+    ...                            [10., 17., 26.]]))
+    True
+    """
+    from fipy.tools import cToPython
+
     argsKeys = list(args.keys())
     dimList = ['i', 'j', 'k']
 
@@ -81,107 +262,56 @@ def _runInline(code_in, converters=None, verbose=0, comment=None, **args):
     else:
         dimensions = 0
 
-    if dimensions == 0:
-        code = """ { %s } """ % code_in
-    else:
-        loops = """"""
-        enders = """"""
-        declarations = []
-        for dim in range(dimensions):
-            d = dimList[dim]
-            declarations.append(d)
-            loops += "\t" * dim + "for(%s=0;%s<n%s;%s++) {\n" % (d, d, d, d)
-            enders += "\n" + "\t" * (dimensions - dim -1) + "}"
-        code = 'int ' + ','.join(declarations) + ';\n' + loops + "\t" * dimensions + code_in + enders
+    lines = []
+    for dim in range(dimensions):
+        d = dimList[dim]
+        lines.append("    " * (dim + 1) + "for %s in range(n%s):" % (d, d))
 
     if comment is None:
         comment = _rawCodeComment(code_in)
 
-    code = "\n" + comment + "\n" + code
-
-    import weave
+    body, itemArrays = cToPython.translate(code_in, indent=dimensions + 1)
 
-    for key in list(args.keys()):
-        if hasattr(args[key], 'dtype') and args[key].dtype.char == '?':
-            args[key] = args[key].astype('B')
-
-    weave.inline(code,
-                 list(args.keys()),
-                 local_dict=args,
-                 type_converters=None, #weave.converters.blitz,
-                 compiler = 'gcc',
-                 force=0,
-                 verbose = 0 or verbose,
-                 extra_compile_args =['-O3'])
+    _execute(comment + "\n" + code_in, lines + body, itemArrays, args)
 
 def _runIterateElementInline(code_in, converters=None, verbose=0, comment=None, **args):
-    loops = """
-int i;
-for(i=0; i < ni; i++) {
-
-"""
-
-    enders = ""
+    """Evaluate the C statements `code_in` for every element of the
+    tensors at every position `i < ni`
+
+    The `ITEM(arr, i, vec)` macro refers to the element `vec` of the
+    tensor at position `i` of `arr`.
+
+    >>> from fipy.tools import numerix
+    >>> a = numerix.arange(6.).reshape((2, 3))
+    >>> b = numerix.zeros((2, 3))[::-1]
+    >>> _runIterateElementInline("ITEM(b, i, vec) = ITEM(a, i, vec) * 2;",
+    ...                          a=a, b=b, ni=3,
+    ...                          shape=numerix.array(a.shape)) # doctest: +NUMBA
+    >>> print(numerix.allclose(b, [[0., 2., 4.],
+    ...                            [6., 8., 10.]]))
+    True
+    """
+    from fipy.tools import cToPython
 
     shape = args['shape']
     rank = len(shape) - 1
-    for dim in range(rank):
-        loops += "\t" * (dim + 1) + "for (vec[%(dim)d]=0; vec[%(dim)d] < shape[%(dim)d]; vec[%(dim)d]++) {\n" % {'dim': dim}
-        enders += "\n" + "\t" * (rank - dim) + "}"
 
-    enders += """
-
-}
-"""
-
-    indent = "\t" * rank
+    lines = ["    vec = _np.zeros(%d, dtype=_np.int64)" % max(rank, 1),
+             "    for i in range(ni):"]
+    for dim in range(rank):
+        lines.append("    " * (dim + 2) + "for vec%(dim)d in range(shape[%(dim)d]):" % {'dim': dim})
+        lines.append("    " * (dim + 3) + "vec[%(dim)d] = vec%(dim)d" % {'dim': dim})
 
-    code = """
-    #define ITEM(arr,i,vec) (arr[arrayIndex(arr##_array, i, vec)])
+    if comment is None:
+        comment = _rawCodeComment(code_in)
 
-    int vec[%(rank)d];
-    %(loops)s%(indent)s%(code_in)s%(enders)s
+    body, itemArrays = cToPython.translate(code_in, indent=rank + 2)
 
-    #undef ITEM
-    """ % locals()
+    _execute(comment + "\n" + code_in, lines + body, itemArrays, args)
 
-    if comment is None:
-        comment = _rawCodeComment(code_in)
+def _test():
+    import fipy.tests.doctestPlus
+    return fipy.tests.doctestPlus.testmod()
 
-    code = "\n" + comment + "\n" + code
-
-    import weave
-
-    for key in list(args.keys()):
-        if hasattr(args[key], 'dtype') and args[key].dtype.char == '?':
-            args[key] = args[key].astype('B')
-
-    weave.inline(code,
-                 list(args.keys()),
-                 local_dict=args,
-                 type_converters=None, #weave.converters.blitz,
-                 compiler = 'gcc',
-                 force=0,
-                 verbose = 0 or verbose,
-                 extra_compile_args =['-O3'],
-                 support_code="""
-
-// returns the index (accounting for strides) of the tensor element vec
-// in position i of array
-//
-// array holds a tensor at each position i
-// vec identifies a particular element in that tensor
-static int arrayIndex(PyArrayObject* array, int i, int vec[])
-{
-    int index = array->strides[array->nd-1] * i;
-
-    if (vec != NULL) {
-        int j;
-        for (j=0; j < array->nd - 1; j++) {
-            index += array->strides[j] * vec[j];
-        }
-    }
-
-    return index / array->descr->elsize;
-}
-                 """)
+if __name__ == "__main__":
+    _test()
@@ -10,7 +10,10 @@ def _suite():
             'numerix',
             'dump',
             'vector',
-            'sharedtempfile'
+            'sharedtempfile',
+            'ensemble',
+            'cToPython',
+            'inline'
         ), base = __name__)
 
     return theSuite
@@ -35,7 +35,9 @@ class _AddOverFacesVariable(CellVariable):
         NCells = self.mesh.numberOfCells
         ids = self.mesh.cellFaceIDs
 
-        val = self._array.copy()
+        val = self._outputBuffer(self._array.shape, self._array.dtype)
+        if val is None:
+            val = self._array.copy()
 
         inline._runInline("""
         int i;
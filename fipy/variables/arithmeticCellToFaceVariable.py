@@ -8,7 +8,9 @@ from fipy.tools import inline
 class _ArithmeticCellToFaceVariable(_CellToFaceVariable):
     if inline.doInline:
         def _calcValue_(self, alpha, id1, id2):
-            val = self._array.copy()
+            val = self._outputBuffer(self._array.shape, self._array.dtype)
+            if val is None:
+                val = self._array.copy()
 
             inline._runIterateElementInline("""
                 int ID1 = ITEM(id1, i, NULL);
@@ -29,4 +31,15 @@ class _ArithmeticCellToFaceVariable(_CellToFaceVariable):
         def _calcValue_(self, alpha, id1, id2):
             cell1 = numerix.take(self.var, id1, axis=-1)
             cell2 = numerix.take(self.var, id2, axis=-1)
-            return (cell2 - cell1) * alpha + cell1
+
+            value = None
+            if type(cell1) is numerix.ndarray:
+                value = self._outputBuffer(cell1.shape, numerix.result_type(cell1, alpha))
+
+            if value is None:
+                return (cell2 - cell1) * alpha + cell1
+            else:
+                numerix.subtract(cell2, cell1, out=value)
+                value *= alpha
+                value += cell1
+                return value
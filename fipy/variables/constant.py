@@ -5,5 +5,7 @@ __all__ = []
 from fipy.variables.variable import Variable
 
 class _Constant(Variable):
+    _literalInExpressions = True
+
     def __repr__(self):
         return str(self)
@@ -54,7 +54,9 @@ class _FaceGradVariable(FaceVariable):
         tangents1 = self.mesh._faceTangents1
         tangents2 = self.mesh._faceTangents2
 
-        val = self._array.copy()
+        val = self._outputBuffer(self._array.shape, self._array.dtype)
+        if val is None:
+            val = self._array.copy()
 
         faceNormals = self.mesh._orientedFaceNormals
         if numerix.MA.isMaskedArray(faceNormals):
@@ -141,7 +143,18 @@ class _FaceGradVariable(FaceVariable):
         T1 = (t1grad1 + t1grad2) / 2.
         T2 = (t2grad1 + t2grad2) / 2.
 
-        return normals[s] * N[numerix.newaxis] + tangents1[s] * T1[numerix.newaxis] + tangents2[s] * T2[numerix.newaxis]
+        value = None
+        if type(N) is numerix.ndarray and type(normals) is numerix.ndarray:
+            value = self._outputBuffer(numerix.broadcast(normals[s], N[numerix.newaxis]).shape,
+                                       numerix.result_type(normals, N, tangents1, T1, tangents2, T2))
+
+        if value is None:
+            return normals[s] * N[numerix.newaxis] + tangents1[s] * T1[numerix.newaxis] + tangents2[s] * T2[numerix.newaxis]
+        else:
+            numerix.multiply(normals[s], N[numerix.newaxis], out=value)
+            value += tangents1[s] * T1[numerix.newaxis]
+            value += tangents2[s] * T2[numerix.newaxis]
+            return value
 
 def _test():
     import fipy.tests.doctestPlus
@@ -44,7 +44,9 @@ class _GaussCellGradVariable(CellVariable):
 
 
     def _calcValueInline(self, N, M, ids, orientations, volumes):
-        val = self._array.copy()
+        val = self._outputBuffer(self._array.shape, self._array.dtype)
+        if val is None:
+            val = self._array.copy()
 
         inline._runIterateElementInline("""
             ITEM(val, i, vec) = 0.;
@@ -71,7 +73,12 @@ class _GaussCellGradVariable(CellVariable):
     def _calcValueNoInline(self, N, M, ids, orientations, volumes):
         contributions = numerix.take(self.faceGradientContributions, ids, axis=-1)
         grad = numerix.array(numerix.sum(orientations * contributions, -2))
-        return grad / volumes
+
+        value = self._outputBuffer(grad.shape, numerix.result_type(grad, volumes))
+        if value is None:
+            return grad / volumes
+        else:
+            return numerix.divide(grad, volumes, out=value)
 
     def _calcValue(self):
         if inline.doInline and self.var.rank == 0:
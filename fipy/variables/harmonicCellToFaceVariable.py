@@ -11,7 +11,9 @@ from fipy.tools import inline
 class _HarmonicCellToFaceVariable(_CellToFaceVariable):
     if inline.doInline:
         def _calcValue_(self, alpha, id1, id2):
-            val = self._array.copy()
+            val = self._outputBuffer(self._array.shape, self._array.dtype)
+            if val is None:
+                val = self._array.copy()
 
             inline._runIterateElementInline("""
                 int ID1 = ITEM(id1, i, NULL);
@@ -38,11 +40,28 @@ class _HarmonicCellToFaceVariable(_CellToFaceVariable):
         def _calcValue_(self, alpha, id1, id2):
             cell1 = numerix.take(self.var, id1, axis=-1)
             cell2 = numerix.take(self.var, id2, axis=-1)
-            value = ((cell2 - cell1) * alpha + cell1)
             eps = 1e-20
-            value = (value == 0.) * eps + (value != 0.) * value
-            cell1Xcell2 = cell1 * cell2
-            value = ((value > eps) | (value < -eps)) * cell1Xcell2 / value
-            value = (cell1Xcell2 >= 0.) * value
+
+            value = None
+            if type(cell1) is numerix.ndarray:
+                value = self._outputBuffer(cell1.shape, numerix.result_type(cell1, alpha))
+
+            if value is None:
+                value = ((cell2 - cell1) * alpha + cell1)
+                value = (value == 0.) * eps + (value != 0.) * value
+                cell1Xcell2 = cell1 * cell2
+                value = ((value > eps) | (value < -eps)) * cell1Xcell2 / value
+                value = (cell1Xcell2 >= 0.) * value
+            else:
+                # same arithmetic as above, in place
+                numerix.subtract(cell2, cell1, out=value)
+                value *= alpha
+                value += cell1
+                value[value == 0.] = eps
+                cell1Xcell2 = numerix.multiply(cell1, cell2, out=cell1)
+                nonnegative = (cell1Xcell2 >= 0.)
+                cell1Xcell2 *= ((value > eps) | (value < -eps))
+                numerix.divide(cell1Xcell2, value, out=value)
+                value *= nonnegative
 
             return value
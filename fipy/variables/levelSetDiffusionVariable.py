@@ -45,7 +45,9 @@ class _LevelSetDiffusionVariable(_CellToFaceVariable):
 
     if inline.doInline:
         def _calcValue_(self, alpha, id1, id2):
-            val = self._array.copy()
+            val = self._outputBuffer(self._array.shape, self._array.dtype)
+            if val is None:
+                val = self._array.copy()
 
             inline._runInline("""
                 int ID1 = id1[i];
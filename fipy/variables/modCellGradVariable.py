@@ -16,7 +16,9 @@ class _ModCellGradVariable(_GaussCellGradVariable):
 
 
     def _calcValueInline(self, N, M, ids, orientations, volumes):
-        val = self._array.copy()
+        val = self._outputBuffer(self._array.shape, self._array.dtype)
+        if val is None:
+            val = self._array.copy()
 
         inline._runIterateElementInline(self.modIn + """
             ITEM(val, i, vec) = 0.;
@@ -21,7 +21,9 @@ class _ModFaceGradVariable(_FaceGradVariable):
             tangents1 = self.mesh._faceTangents1
             tangents2 = self.mesh._faceTangents2
 
-            val = self._array.copy()
+            val = self._outputBuffer(self._array.shape, self._array.dtype)
+            if val is None:
+                val = self._array.copy()
 
             inline._runIterateElementInline(self.modIn + """
             int j;
@@ -51,9 +51,66 @@ def _OperatorVariableClass(baseClass=object):
                 from fipy.tools import inline
                 if inline.doInline:
                     return self._execInline(comment=self.comment)
+                elif inline.doFuse and self._canFuse:
+                    return self._execFused()
                 else:
                     return self._calcValue_()
 
+        _canFuse = True
+        _fusedSignature = None
+
+        def _execFused(self):
+            """Evaluate the whole expression tree in one pass with `numexpr`
+
+            Intermediate `_OperatorVariable` objects are folded into the
+            expression, rather than evaluated to temporary arrays, unless
+            something else subscribes to them.
+            """
+            import numexpr
+            argDict = {}
+            expression = self._getNumexprString(argDict=argDict, freshen=True)
+
+            # the same expression of the same types has the same result
+            # type as last time, so the cached value can receive it
+            signature = (expression,) + tuple((key, argDict[key].dtype.char, argDict[key].shape)
+                                              for key in sorted(argDict.keys()))
+            out = None
+            if signature == self._fusedSignature:
+                out = self._outputBuffer(*self._fusedShapeAndType)
+
+            try:
+                value = numexpr.evaluate(expression, local_dict=argDict, out=out)
+            except (KeyError, NotImplementedError, TypeError, ValueError):
+                # `numexpr` doesn't support the expression, so don't try
+                # again; the operands can still fuse
+                self._canFuse = False
+                return self._calcValue_()
+
+            if value.dtype.type is not numerix.dtype(value.dtype.str).type:
+                # `numexpr` may return, e.g., `longlong` where NumPy returns
+                # the equivalent `int_`
+                value = value.view(value.dtype.str)
+
+            if signature != self._fusedSignature:
+                # `numexpr` doesn't always promote as NumPy does, e.g., it
+                # returns the `fmod` of integers as floats, so check the
+                # first result of each signature against NumPy's
+                expected = self._calcValue_()
+                if numerix.asarray(expected).dtype != value.dtype:
+                    if self._getNumexprString(argDict={}) == expression:
+                        self._canFuse = False
+                    # else an operand that stopped fusing while evaluating
+                    # `expected` changes the expression, so try that one
+                    self._fusedSignature = None
+                    return expected
+
+            self._fusedSignature = signature
+            self._fusedShapeAndType = (value.shape, value.dtype)
+            if value.shape == ():
+                # match the scalars that NumPy returns
+                value = value[()]
+            return value
+
         def _calcValue_(self):
             pass
 
@@ -67,21 +124,39 @@ def _OperatorVariableClass(baseClass=object):
             else:
                 s = baseClass._getCstring(self, argDict=argDict, id=id)
             if freshen:
-                self._markFresh()
+                self._markFresh(recalculated=True)
 
             return s
 
+        def _getNumexprString(self, argDict={}, id="", freshen=False):
+            if self.canInline and self._canFuse:
+                s = self._getRepresentation(style="numexpr", argDict=argDict, id=id, freshen=freshen)
+            else:
+                s = baseClass._getNumexprString(self, argDict=argDict, id=id)
+            if freshen:
+                self._markFresh(recalculated=True)
+
+            return s
+
+        _numexprFunctions = {
+            "absolute": "abs",
+            "conjugate": "conj",
+        }
+
         def _getRepresentation(self, style="__repr__", argDict={}, id=id, freshen=False):
             """
 
             Parameters
             ----------
-            style : {'__repr__', 'name', 'TeX', 'C'}
+            style : {'__repr__', 'name', 'TeX', 'C', 'numexpr'}
                desired formatting for representation
             """
             if isinstance(self.op, numerix.ufunc):
-                return "%s(%s)" % (self.op.__name__, ", ".join([self.__var(i, style, argDict, id, freshen)
-                                                               for i in range(len(self.var))]))
+                name = self.op.__name__
+                if style == "numexpr":
+                    name = self._numexprFunctions.get(name, name)
+                return "%s(%s)" % (name, ", ".join([self.__var(i, style, argDict, id, freshen)
+                                                    for i in range(len(self.var))]))
 
             try:
                 instructions = dis.get_instructions(self.op.__code__)
@@ -114,17 +189,21 @@ def _OperatorVariableClass(baseClass=object):
 
             elif style == "TeX":
                 raise Exception("TeX style not yet implemented")
-            elif style == "C":
+            elif style in ("C", "numexpr"):
+                if style == "C":
+                    getString = "_getCstring"
+                else:
+                    getString = "_getNumexprString"
                 if not v._isCached():
-                    result = v._getCstring(argDict, id=id + str(i), freshen=freshen)
+                    result = getattr(v, getString)(argDict, id=id + str(i), freshen=freshen)
                     if isinstance(v, Variable):
                         v._value = None
                     else:
                         v.value = None
                 else:
-                    result = v._variableClass._getCstring(v, argDict,
-                                                               id=id + str(i),
-                                                               freshen=False)
+                    result = getattr(v._variableClass, getString)(v, argDict,
+                                                                  id=id + str(i),
+                                                                  freshen=False)
             else:
                 raise SyntaxError("Unknown style: %s" % style)
 
@@ -139,6 +218,13 @@ def _OperatorVariableClass(baseClass=object):
                     62: "<<", 63: ">>", 64: "&", 65: "^", 66: "|", 106: "=="
         }
 
+        def _formatCall(self, function, args, style):
+            if style == "numexpr" and function == "pow" and len(args) == 2:
+                # `numexpr` only simplifies powers written as `**`
+                return "%s ** %s" % tuple(args)
+            else:
+                return function + "(" + ", ".join(args) + ")"
+
         def _py2kInstructions(self, bytecodes, style, argDict, id, freshen):
             def _popIndex():
                 return bytecodes.pop(0) + bytecodes.pop(0) * 256
@@ -157,6 +243,8 @@ def _OperatorVariableClass(baseClass=object):
                     s = stack.pop()
                     if style == 'C':
                         return s.replace('numerix.', '').replace('arc', 'a')
+                    elif style == 'numexpr':
+                        return s.replace('numerix.', '')
                     else:
                         return s
                 elif dis.opname[bytecode] == 'LOAD_CONST':
@@ -195,9 +283,12 @@ def _OperatorVariableClass(baseClass=object):
 
         def _py3kInstructions(self, instructions, style, argDict, id, freshen):
             stack = []
+            kwnames = ()
             
             for ins in instructions:
-                if ins.opname == 'UNARY_CONVERT':
+                if ins.opname in ('RESUME', 'NOP', 'PUSH_NULL', 'PRECALL', 'CACHE'):
+                    continue
+                elif ins.opname == 'UNARY_CONVERT':
                     stack.append("`" + stack.pop() + "`")
                 elif ins.opname == 'BINARY_SUBSCR':
                     stack.append(stack.pop(-2) + "[" + stack.pop() + "]")
@@ -205,22 +296,38 @@ def _OperatorVariableClass(baseClass=object):
                     s = stack.pop()
                     if style == 'C':
                         return s.replace('numerix.', '').replace('arc', 'a')
+                    elif style == 'numexpr':
+                        return s.replace('numerix.', '')
                     else:
                         return s
                 elif ins.opname == 'LOAD_CONST':
                     stack.append(ins.argval)
-                elif ins.opname == 'LOAD_ATTR':
+                elif ins.opname in ('LOAD_ATTR', 'LOAD_METHOD'):
                     stack.append(stack.pop() + "." + ins.argval)
                 elif ins.opname == 'COMPARE_OP':
-                    stack.append(stack.pop(-2) + " " + dis.cmp_op[ins.arg] + " " + stack.pop())
+                    stack.append(stack.pop(-2) + " " + ins.argval + " " + stack.pop())
                 elif ins.opname == 'LOAD_GLOBAL':
                     stack.append(ins.argval)
                 elif ins.opname == 'LOAD_FAST':
                     stack.append(self.__var(ins.arg, style=style, argDict=argDict, id=id, freshen=freshen))
-                elif ins.opname == 'CALL_FUNCTION':
+                elif ins.opname == 'KW_NAMES':
+                    kwnames = self.op.__code__.co_consts[ins.arg]
+                elif ins.opname == 'CALL':
+                    # Python >= 3.11
+                    args, stack = stack[len(stack) - ins.arg:], stack[:len(stack) - ins.arg]
+                    kws = list(kwnames)
+                    kwargs = []
+                    while kws:
+                        kwargs.insert(0, kws.pop() + "=" + args.pop())
+                    kwnames = ()
+                    stack.append(self._formatCall(stack.pop(), args + kwargs, style))
+                elif ins.opname == 'BINARY_OP':
+                    # Python >= 3.11
+                    stack.append(stack.pop(-2) + " " + ins.argrepr + " " + stack.pop())
+                elif ins.opname in ('CALL_FUNCTION', 'CALL_METHOD'):
                     # args are last ins.arg items on stack
                     args, stack = stack[-ins.arg:], stack[:-ins.arg]
-                    stack.append(stack.pop() + "(" + ", ".join(args) + ")")
+                    stack.append(self._formatCall(stack.pop(), args, style))
                 elif ins.opname == 'CALL_FUNCTION_KW':
                     kws = list(stack.pop())
                     # args are last ins.arg items on stack
@@ -1203,6 +1310,59 @@ def _testBinOp(self):
     """
     pass
 
+def _testFused(self):
+    """
+    Test of `_execFused`
+
+        >>> from fipy import Grid1D, CellVariable, numerix
+        >>> m = Grid1D(nx=4)
+        >>> phi = CellVariable(mesh=m, value=(0., .25, .5, 1.))
+        >>> T = CellVariable(mesh=m, value=2.)
+        >>> D = 3. * (1 - phi)**2 * numerix.exp(-2. / T)
+        >>> print(numerix.allclose(D._execFused(), D._calcValue_())) # doctest: +NUMEXPR
+        True
+        >>> from future.utils import text_to_native_str as ttns
+        >>> ttns(D._getNumexprString(argDict={}))
+        '((((1 - var0000) ** 2) * 3.0) * exp((-2.0 / var100)))'
+
+    If `numexpr` cannot evaluate the expression, the
+    `_OperatorVariable` falls back to evaluating its operands.
+
+        >>> F = numerix.rint(phi * 2)
+        >>> print(numerix.allclose(F._execFused(), (0, 0, 1, 2))) # doctest: +NUMEXPR
+        True
+        >>> print(F._canFuse) # doctest: +NUMEXPR
+        False
+
+    Nor does the `_OperatorVariable` fuse operations that `numexpr`
+    evaluates to a different type than NumPy, such as the remainder of
+    integers, although the rest of the expression still fuses
+
+        >>> from fipy.tools import inline
+        >>> doFuse, inline.doFuse = inline.doFuse, True
+        >>> doInline, inline.doInline = inline.doInline, False
+        >>> b = CellVariable(mesh=m, value=(0, 1, 2, 3))
+        >>> R = b % 3 + b
+        >>> print(R.value, R.value.dtype == b.value.dtype)
+        [0 2 4 3] True
+        >>> print(R._canFuse, R.var[0]._canFuse) # doctest: +NUMEXPR
+        True False
+
+    A cached expression is evaluated into its previous value
+
+        >>> D.cacheMe()
+        >>> address = id(D.value) # doctest: +NUMEXPR
+        >>> phi.setValue((1., .75, .5, 0.))
+        >>> print(id(D.value) == address) # doctest: +NUMEXPR
+        True
+        >>> print(numerix.allclose(D, 3. * (1 - phi.value)**2 * numerix.exp(-1.)))
+        True
+        >>> inline.doFuse = doFuse
+        >>> inline.doInline = doInline
+
+    """
+    pass
+
 def _test():
     import fipy.tests.doctestPlus
     return fipy.tests.doctestPlus.testmod()
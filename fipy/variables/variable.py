@@ -6,6 +6,7 @@ from future.utils import string_types
 __docformat__ = 'restructuredtext'
 
 import os
+import sys
 
 from fipy.tools.dimensions import physicalField
 from fipy.tools import numerix
@@ -92,7 +93,6 @@ class Variable(object):
 
         self._cached = cached
 
-        self.stale = 1
         self._markFresh()
 
 ##    __array_priority__ and __array_wrap__ are required to override
@@ -434,6 +434,44 @@ class Variable(object):
          else:
              return identifier + self._getCIndexString(shape)
 
+    def _getNumexprString(self, argDict={}, id="", freshen=None):
+        """
+        Generate the expression and dictionary to be evaluated by `numexpr`
+
+            >>> from future.utils import text_to_native_str as ttns
+            >>> argDict = {}
+            >>> ttns((Variable((1, 2, 3)) * Variable(2))._getNumexprString(argDict=argDict))
+            '(var0 * var1)'
+            >>> print(argDict["var0"])
+            [1 2 3]
+
+        Scalar constants are written into the expression, where `numexpr`
+        can fold them, e.g., `x**2` into `x*x`
+
+            >>> argDict = {}
+            >>> ttns((1 - Variable((1., 2.))**2)._getNumexprString(argDict=argDict))
+            '(1 - (var00 ** 2))'
+            >>> print(list(argDict.keys()))
+            ['var00']
+
+        freshen is ignored
+        """
+        identifier = 'var%s' % (id)
+
+        v = self.value
+
+        if type(v) not in (type(numerix.array(1)),):
+            v = numerix.array(v)
+
+        if self._literalInExpressions and v.shape == () and v.dtype.kind in "if":
+            return repr(v.item())
+
+        argDict[identifier] = v
+
+        return identifier
+
+    _literalInExpressions = False
+
     def tostring(self, max_line_width=75, precision=8, suppress_small=False, separator=' '):
         return numerix.tostring(self.value,
                                 max_line_width=max_line_width,
@@ -489,19 +527,26 @@ class Variable(object):
 
         """
 
-        if self.stale or not self._isCached() or self._value is None:
+        stale = self.stale
+        if stale or not self._isCached() or self._value is None:
             value = self._calcValue()
             if self._isCached():
                 self._setValueInternal(value=value)
             else:
                 self._setValueInternal(value=None)
-            self._markFresh()
+            if stale:
+                self._markFresh(recalculated=True)
         else:
             value = self._value
 
-        if len(self.constraints) > 0:
+        constraints = self.constraints
+        if len(constraints) > 0:
+            if self._sameSources(self._constrainedSources,
+                                 self._getConstrainedSources(constraints)):
+                return self._constrainedValue
+
             value = value.copy()
-            for constraint in self.constraints:
+            for constraint in constraints:
                 if constraint.where is None:
                     value[:] = constraint.value
                 else:
@@ -515,8 +560,74 @@ class Variable(object):
                         except:
                             value[..., mask] = numerix.array(constraint.value)[..., mask]
 
+            # every read gets this same array, so nobody may write to it
+            value.flags.writeable = False
+            self._constrainedValue = value
+            self._constrainedSources = self._getConstrainedSources(constraints)
+
         return value
 
+    _constrainedSources = None
+
+    def _getConstrainedSources(self, constraints):
+        """What the constrained value is built from
+
+        The constrained value can be reused for as long as the raw value,
+        the `constraints`, and the value and `where` of each of them stay
+        the same. A `Variable` is the same if its version has not changed;
+        anything else must be the very same object, so an array that is
+        changed in place must be wrapped in a `Variable`.
+
+            >>> v = Variable((0, 1, 2, 3))
+            >>> mask = Variable((True, False, False, False))
+            >>> v.constrain(2, where=mask)
+            >>> print(v)
+            [2 1 2 3]
+            >>> print(v.value is v.value)
+            True
+
+        The value that is shared among reads can't be changed
+
+            >>> v.value[1:] = 99 # doctest: +IGNORE_EXCEPTION_DETAIL
+            Traceback (most recent call last):
+            ...
+            ValueError: assignment destination is read-only
+            >>> print(v)
+            [2 1 2 3]
+
+            >>> mask[3] = True
+            >>> print(v)
+            [2 1 2 2]
+            >>> v.constraints[0].value = 5
+            >>> print(v)
+            [5 1 2 5]
+
+        Returns
+        -------
+        list or None
+            `None` if any `Variable` among them is stale, and so cannot
+            be compared.
+        """
+        sources = [self._version]
+        for constraint in constraints:
+            sources.append(constraint)
+            for source in (constraint.value, constraint.where):
+                sources.append(source)
+                if isinstance(source, Variable):
+                    if source.stale:
+                        return None
+                    sources.append(source._version)
+
+        return sources
+
+    @staticmethod
+    def _sameSources(old, new):
+        if old is None or new is None or len(old) != len(new):
+            return False
+        # `==` would compare `Variable` and array values
+        return all(a is b or (type(a) is int and type(b) is int and a == b)
+                   for a, b in zip(old, new))
+
     def _setValueProperty(self, newVal):
         """Since `self.setValue` contains optional, named parameters, we will
         punt the property's set method off to that."""
@@ -734,6 +845,69 @@ class Variable(object):
         else:
             return self._value
 
+    def _outputBuffer(self, shape, dtype):
+        """The cached value, if `_calcValue()` may overwrite it in place
+
+        Reusing the cached array avoids allocating a new one every time a
+        stale `Variable` is reevaluated.  The array is only offered if it
+        has the requested `shape` and `dtype` and nothing but this
+        `Variable` refers to it, so arrays (or views of them) obtained
+        earlier from :attr:`value` never change behind the caller's back.
+
+            >>> from fipy import Grid1D, CellVariable
+            >>> var = CellVariable(mesh=Grid1D(nx=3), value=(1., 2., 3.))
+            >>> faceValue = var.arithmeticFaceValue
+            >>> held = faceValue.value
+            >>> print(faceValue._outputBuffer(held.shape, held.dtype) is None)
+            True
+            >>> del held
+            >>> print(faceValue._outputBuffer((4,), numerix.NUMERIX.float64) is faceValue._array)
+            True
+            >>> print(faceValue._outputBuffer((4,), numerix.NUMERIX.int64))
+            None
+
+        so reevaluation reuses the array
+
+            >>> address = id(faceValue.value)
+            >>> var.value = (2., 4., 6.)
+            >>> print(id(faceValue.value) == address)
+            True
+            >>> print(numerix.allclose(faceValue, (2., 3., 5., 6.)))
+            True
+
+        unless the old value is still in use
+
+            >>> held = faceValue.value
+            >>> var.value = (0., 1., 2.)
+            >>> print(faceValue.value is held)
+            False
+            >>> print(numerix.allclose(held, (2., 3., 5., 6.)))
+            True
+
+        Parameters
+        ----------
+        shape : tuple of int
+            Shape of the value about to be calculated.
+        dtype : ~numpy.dtype
+            Type of the value about to be calculated.
+
+        Returns
+        -------
+        ~numpy.ndarray or None
+        """
+        value = self._value
+        if (type(value) is numerix.ndarray
+            and value.shape == tuple(shape)
+            and value.dtype == dtype
+            and value.flags.owndata
+            and value.flags.writeable
+            and hasattr(sys, "getrefcount")
+            # `self._value`, `value`, and the argument of `getrefcount()`
+            and sys.getrefcount(value) <= 3):
+            return value
+        else:
+            return None
+
     @property
     def numericValue(self):
         value = self.value
@@ -800,35 +974,167 @@ class Variable(object):
         raise NotImplementedError
 
     def _getSubscribedVariables(self):
-        self._subscribedVariables = [sub for sub in self._subscribedVariables if sub() is not None]
+        if self._deadSubscribers:
+            ## dead references are only stripped out once the weak
+            ## references report that their subscribers have died
+            self._subscribedVariables = [sub for sub in self._subscribedVariables if sub() is not None]
+            self._deadSubscribers = 0
 
         return self._subscribedVariables
 
     def _setSubscribedVariables(self, sVars):
         self._subscribedVariables = sVars
+        self._deadSubscribers = 0
 
     subscribedVariables = property(_getSubscribedVariables,
                                    _setSubscribedVariables)
 
-    def __markStale(self):
-        for subscriber in self.subscribedVariables:
-            if subscriber() is not None:
-                ## Even though getSubscribedVariables() strips out dead
-                ## references, subscriber() might still be dead due to the
-                ## vagaries of garbage collection and the possibility that
-                ## later subscribedVariables were removed, changing the
-                ## dependencies of this subscriber.
-                ## See <https://github.com/usnistgov/fipy/issues/103> for more explanation.
-                subscriber()._markStale()
-
-    def _markFresh(self):
-        self.stale = 0
-        self.__markStale()
+    ## Staleness is not pushed to subscribers when a `Variable` changes.
+    ## Instead, every change bumps the `Variable`'s `_version` and the
+    ## global `_generation`, and a `Variable` is stale if it has been
+    ## marked so, if the version of any of its `requiredVariables` differs
+    ## from the one it recorded when it was last freshened, or if any of
+    ## them is stale. The answer is remembered until the next change
+    ## anywhere, so repeated reads of an unchanged graph cost O(1).
+    ## Recalculations do not count as changes; see `_markFresh()`.
+
+    _generation = 0
+
+    _version = 0
+    _staleFlag = 1
+    _inputVersions = ()
+    _staleGeneration = -1
+    _staleCache = 1
+
+    def _getStale(self):
+        """Whether the value must be recalculated
+
+        The dependencies are walked iteratively, and only when the value is
+        read, so changing a `Variable` costs the same no matter how many
+        others depend on it.
+
+            >>> a = Variable(value=1.)
+            >>> terms = [a * i for i in range(20)]
+            >>> b = terms[0]
+            >>> for term in terms[1:]:
+            ...     b = b + term
+            >>> b.cacheMe()
+            >>> print(b.value)
+            190.0
+            >>> print(b.stale)
+            0
+            >>> a.value = 2.
+            >>> print(b.stale)
+            1
+            >>> print(b.value)
+            380.0
+
+        Changes to variables that `b` does not depend on leave it fresh
+
+            >>> c = Variable(value=3.)
+            >>> c.value = 4.
+            >>> print(b.stale)
+            0
+
+        A `Variable` reached along more than one path is decided before
+        anything that depends on it
+
+            >>> y = a * 1
+            >>> y2 = y * 2
+            >>> w = y + y2
+            >>> for var in (y, y2, w):
+            ...     var.cacheMe()
+            >>> print(w.value)
+            6.0
+            >>> a.value = 3.
+            >>> print(w.value)
+            9.0
+        """
+        if len(self.requiredVariables) == 0:
+            return self._staleFlag
+
+        generation = Variable._generation
+        if self._staleGeneration == generation:
+            return self._staleCache
+
+        # `Variable` objects whose inputs are being decided; meeting one of
+        # them again means a cycle, which cannot make anything stale
+        expanding = set()
+        stack = [self]
+        while stack:
+            var = stack[-1]
+            if var._staleGeneration == generation:
+                # reached again through another path
+                stack.pop()
+                continue
+
+            required = var.requiredVariables
+            stale = (var._staleFlag
+                     or len(var._inputVersions) != len(required)
+                     or any(req._version != version
+                            for req, version in zip(required, var._inputVersions)))
+
+            if not stale:
+                if id(var) not in expanding:
+                    pending = [req for req in required
+                               if req._staleGeneration != generation
+                               and id(req) not in expanding]
+                    if len(pending) > 0:
+                        # decide the inputs first, then come back to `var`
+                        expanding.add(id(var))
+                        stack.extend(pending)
+                        continue
+
+                stale = any(req._staleCache for req in required
+                            if req._staleGeneration == generation)
+
+            var._staleCache = int(bool(stale))
+            var._staleGeneration = generation
+            expanding.discard(id(var))
+            stack.pop()
+
+        return self._staleCache
+
+    def _setStale(self, stale):
+        if stale:
+            self._markStale()
+        else:
+            self._markFresh()
+
+    stale = property(_getStale, _setStale,
+                     doc="Whether the value must be recalculated")
+
+    def _markFresh(self, recalculated=False):
+        """Record that the value is current
+
+        Parameters
+        ----------
+        recalculated : bool
+            Whether the value was just recalculated from the
+            `requiredVariables`, rather than changed from outside. A
+            recalculation cannot make anything stale that was not already,
+            so other `Variable` objects need not check again. Whether `self`
+            is fresh is left to the next check, though, as not all of the
+            `requiredVariables` need have been recalculated first.
+        """
+        inputVersions = [var._version for var in self.requiredVariables]
+        if (not recalculated
+            or self._staleFlag
+            or inputVersions != list(self._inputVersions)):
+            # only a changed value makes the subscribers stale
+            self._version += 1
+        self._staleFlag = 0
+        self._inputVersions = inputVersions
+        if recalculated:
+            self._staleGeneration = -1
+        else:
+            Variable._generation += 1
+            self._staleGeneration = Variable._generation
+            self._staleCache = 0
 
     def _markStale(self):
-        if not self.stale:
-            self.stale = 1
-            self.__markStale()
+        self._staleFlag = 1
+        Variable._generation += 1
 
     def _requires(self, var):
         if isinstance(var, Variable):
@@ -847,7 +1153,14 @@ class Variable(object):
         # due to circular references between the subscriber
         # and the subscribee
         import weakref
-        self.subscribedVariables.append(weakref.ref(var))
+        selfRef = weakref.ref(self)
+
+        def _subscriberDied(ref):
+            subscribee = selfRef()
+            if subscribee is not None:
+                subscribee._deadSubscribers += 1
+
+        self._subscribedVariables.append(weakref.ref(var, _subscriberDied))
 
     @property
     def _variableClass(self):
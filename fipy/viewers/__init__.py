@@ -17,10 +17,12 @@ except:
     pass
 
 from fipy.viewers.multiViewer import *
+from fipy.viewers.seriesViewer import *
 from fipy.viewers.tsvViewer import *
 from fipy.viewers.vtkViewer import *
 
 __all__.extend(multiViewer.__all__)
+__all__.extend(seriesViewer.__all__)
 __all__.extend(tsvViewer.__all__)
 __all__.extend(vtkViewer.__all__)
 
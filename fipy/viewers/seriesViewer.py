@@ -0,0 +1,371 @@
+"""Stream the values of variables, step after step, to a binary file
+
+Unlike a :class:`~fipy.viewers.tsvViewer.TSVViewer`, which formats every
+value as text each time it plots, a :class:`SeriesViewer` writes the mesh
+once, at the head of the file, and then appends the raw values of each
+step as a record of fixed size.  The records are written by a background
+thread, from a bounded queue, so the simulation does not wait on the disk
+unless it gets more than `queueSize` steps ahead of it.  A
+:class:`SeriesReader` memory-maps the records for post-processing, even
+while the series is still being written.
+
+The file is laid out as
+
+=================  ====================================================
+``FIPYSERIES``     magic string, followed by a one byte version
+header length      8 byte, little-endian, unsigned integer
+header             JSON description of the records, padded to a
+                   multiple of 64 bytes
+mesh               pickle of the mesh, padded to a multiple of 64 bytes
+records            one for each step: the time, as a little-endian
+                   double, followed by the values of each variable
+=================  ====================================================
+"""
+from __future__ import division
+from __future__ import unicode_literals
+from builtins import object
+__docformat__ = 'restructuredtext'
+
+import json
+import os
+import pickle
+import struct
+import threading
+import weakref
+
+from fipy.tools import numerix
+from fipy.viewers.viewer import AbstractViewer
+
+__all__ = ["SeriesViewer", "SeriesReader"]
+from future.utils import text_to_native_str
+__all__ = [text_to_native_str(n) for n in __all__]
+
+_magic = b"FIPYSERIES"
+_version = 1
+_alignment = 64
+
+def _padding(length):
+    return (-length) % _alignment
+
+def _stopWriting(queue, thread):
+    """Write any steps still waiting and let `thread` finish"""
+    queue.put(None)
+    thread.join()
+
+class SeriesViewer(AbstractViewer):
+    """
+    "Views" one or more variables by appending their values to a binary
+    series file at each `plot()`.
+
+    >>> import os, shutil, tempfile
+    >>> from fipy import CellVariable, Grid2D
+    >>> directory = tempfile.mkdtemp()
+    >>> filename = os.path.join(directory, "run.series")
+    >>> mesh = Grid2D(nx=3, ny=2)
+    >>> phi = CellVariable(mesh=mesh, name="phi")
+    >>> viewer = SeriesViewer(vars=(phi, phi.faceGrad), filename=filename)
+    >>> for step in range(4):
+    ...     phi.setValue(mesh.x * step)
+    ...     viewer.plot(time=step * 0.5)
+    >>> viewer.close()
+
+    >>> series = SeriesReader(filename) # doctest: +PROCESSOR_0
+    >>> print(len(series), series.names) # doctest: +PROCESSOR_0
+    4 ['phi', 'var1']
+    >>> print(series.times) # doctest: +PROCESSOR_0
+    [0.  0.5 1.  1.5]
+    >>> print(series["phi"][2]) # doctest: +PROCESSOR_0
+    [1. 3. 5. 1. 3. 5.]
+    >>> print(series[1].shape) # doctest: +PROCESSOR_0
+    (4, 2, 17)
+    >>> print(series.mesh.shape) # doctest: +PROCESSOR_0
+    (3, 2)
+    >>> series.close() # doctest: +PROCESSOR_0
+
+    Variables without a name, like the gradient above, are named after
+    their position.
+
+    Variables without a mesh, and steps without a time, may be recorded,
+    too
+
+    >>> from fipy import Variable
+    >>> k = Variable(name="k", value=(1., 2.))
+    >>> with SeriesViewer(vars=(phi, k), filename=filename) as viewer:
+    ...     viewer.plot()
+    >>> series = SeriesReader(filename) # doctest: +PROCESSOR_0
+    >>> print(series.times, series["k"]) # doctest: +PROCESSOR_0
+    [nan] [[1. 2.]]
+    >>> series.close() # doctest: +PROCESSOR_0
+
+    A viewer needn't be closed.  The steps still waiting are written when
+    the script exits
+
+    >>> import subprocess, sys, textwrap
+    >>> script = os.path.join(directory, "script.py")
+    >>> with open(script, "w") as f:
+    ...     _ = f.write(textwrap.dedent('''
+    ...         from fipy import CellVariable, Grid1D
+    ...         from fipy.viewers.seriesViewer import SeriesViewer
+    ...         mesh = Grid1D(nx=100)
+    ...         phi = CellVariable(mesh=mesh, name="phi")
+    ...         viewer = SeriesViewer(vars=phi, filename=%r)
+    ...         for step in range(30):
+    ...             phi.setValue(step)
+    ...             viewer.plot(time=step)
+    ...         ''' % filename))
+    >>> import fipy
+    >>> env = dict(os.environ,
+    ...            PYTHONPATH=os.path.dirname(os.path.dirname(fipy.__file__)))
+    >>> subprocess.check_call([sys.executable, script], env=env) # doctest: +SERIAL
+    0
+    >>> series = SeriesReader(filename) # doctest: +SERIAL
+    >>> print(len(series), series["phi"][-1, 0]) # doctest: +SERIAL
+    30 29.0
+    >>> series.close() # doctest: +SERIAL
+
+    >>> shutil.rmtree(directory)
+
+    In parallel, the values are gathered, as for a `TSVViewer`, and
+    written by the first process.
+    """
+
+    def __init__(self, vars, filename, title=None, queueSize=8):
+        """
+        Parameters
+        ----------
+        vars : ~fipy.variables.cellVariable.CellVariable or ~fipy.variables.faceVariable.FaceVariable or list
+            the `Variable` objects to record. `MeshVariable` objects must
+            all have the same mesh.
+        filename : str
+            Name of the file to write the series to. Any existing file is
+            replaced.
+        title : str, optional
+            Stored in the header of the file
+        queueSize : int
+            Number of steps the simulation may get ahead of the disk
+            before `plot()` waits for it.
+        """
+        AbstractViewer.__init__(self, vars=vars, title=title)
+
+        self.filename = filename
+        self.queueSize = queueSize
+
+        self.mesh = None
+        for var in self.vars:
+            mesh = getattr(var, "mesh", None)
+            if self.mesh is None:
+                self.mesh = mesh
+            elif mesh is not None and mesh is not self.mesh:
+                raise ValueError("all variables must have the same mesh")
+
+        self._recordType = None
+        self._thread = None
+        self._queue = None
+        self._error = None
+
+    @property
+    def _isWriter(self):
+        return self.mesh is None or self.mesh.communicator.procID == 0
+
+    def _snapshot(self):
+        values = []
+        for var in self.vars:
+            if hasattr(var, "globalValue"):
+                values.append(numerix.array(var.globalValue))
+            else:
+                values.append(numerix.array(var.value))
+        return values
+
+    def _header(self, values):
+        names = [var.name or "var%d" % i for i, var in enumerate(self.vars)]
+        fields = [("time", "<f8")]
+        fields += [("var%d" % i, value.dtype.str, value.shape)
+                   for i, value in enumerate(values)]
+        self._recordType = numerix.dtype(fields)
+
+        header = dict(version=_version,
+                      title=self.title,
+                      names=names,
+                      shapes=[list(value.shape) for value in values],
+                      dtypes=[value.dtype.str for value in values])
+
+        return header
+
+    def _start(self, header):
+        import queue
+
+        if self.mesh is not None:
+            mesh = pickle.dumps(self.mesh, protocol=pickle.HIGHEST_PROTOCOL)
+        else:
+            mesh = b""
+        header["mesh"] = len(mesh)
+        text = json.dumps(header).encode("utf-8")
+        prefix = _magic + struct.pack("<BQ", _version, len(text))
+        text += b" " * _padding(len(prefix) + len(text))
+
+        f = open(self.filename, "wb")
+        f.write(prefix + text + mesh + b"\0" * _padding(len(mesh)))
+
+        self._queue = queue.Queue(maxsize=self.queueSize)
+        self._thread = threading.Thread(target=self._write, args=(f,),
+                                        name="SeriesViewer(%r)" % self.filename)
+        self._thread.daemon = True
+        self._thread.start()
+
+        # viewers needn't be closed, so the steps still waiting are
+        # written when the interpreter exits, if not before
+        self._finalizer = weakref.finalize(self, _stopWriting,
+                                           self._queue, self._thread)
+
+    def _write(self, f):
+        try:
+            while True:
+                record = self._queue.get()
+                try:
+                    if record is None:
+                        break
+                    if self._error is None:
+                        f.write(record.tobytes())
+                except Exception as error:
+                    self._error = error
+                finally:
+                    self._queue.task_done()
+        finally:
+            f.close()
+
+    def _raiseError(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def plot(self, time=None):
+        """
+        Append the current values of the variables to the series.
+
+        Parameters
+        ----------
+        time : float, optional
+            Stored with the values, *e.g.*, the elapsed time of the
+            simulation. NaN if not given.
+        """
+        values = self._snapshot()
+
+        if self._recordType is None:
+            header = self._header(values)
+            if self._isWriter:
+                self._start(header)
+        else:
+            for var, value, (name, (dtype, offset)) in zip(self.vars, values,
+                                                            list(self._recordType.fields.items())[1:]):
+                if value.shape != dtype.shape:
+                    raise ValueError("%s has shape %s, not %s" % (var.name, value.shape, dtype.shape))
+
+        self._raiseError()
+
+        if self._isWriter:
+            record = numerix.zeros((), dtype=self._recordType)
+            record["time"] = numerix.nan if time is None else time
+            for i, value in enumerate(values):
+                record["var%d" % i] = value
+            self._queue.put(record)
+
+    def flush(self):
+        """Wait for every step so far to be written"""
+        if self._queue is not None:
+            self._queue.join()
+        self._raiseError()
+
+    def close(self):
+        """Write any steps still waiting and close the file"""
+        if self._thread is not None:
+            self._finalizer()
+            self._thread = None
+        self._raiseError()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+class SeriesReader(object):
+    """Memory-mapped steps of a file written by a :class:`SeriesViewer`
+
+    Indexing by the name, or the position, of a variable gives its values
+    at every step, with the steps along the first axis.  Only complete
+    steps are included, so a series can be read while it is still being
+    written.
+    """
+
+    def __init__(self, filename):
+        """
+        Parameters
+        ----------
+        filename : str
+            Name of the series file.
+        """
+        self.filename = filename
+
+        with open(filename, "rb") as f:
+            prefix = f.read(len(_magic) + 9)
+            if prefix[:len(_magic)] != _magic:
+                raise IOError("%s is not a series written by a SeriesViewer" % filename)
+            version, length = struct.unpack("<BQ", prefix[len(_magic):])
+            if version > _version:
+                raise IOError("%s was written by a newer version of FiPy" % filename)
+            header = json.loads(f.read(length).decode("utf-8"))
+
+        self.title = header["title"]
+        self.names = header["names"]
+        fields = [("time", "<f8")]
+        fields += [("var%d" % i, dtype, tuple(shape))
+                   for i, (dtype, shape) in enumerate(zip(header["dtypes"], header["shapes"]))]
+        self._recordType = numerix.dtype(fields)
+
+        self._meshOffset = len(prefix) + length + _padding(len(prefix) + length)
+        self._meshLength = header["mesh"]
+        self._offset = self._meshOffset + self._meshLength + _padding(self._meshLength)
+        self._mesh = None
+        self.refresh()
+
+    def refresh(self):
+        """Map any steps written since the series was last mapped"""
+        steps = (os.path.getsize(self.filename) - self._offset) // self._recordType.itemsize
+        if steps > 0:
+            self.records = numerix.memmap(self.filename, dtype=self._recordType, mode="r",
+                                          offset=self._offset, shape=(steps,))
+        else:
+            self.records = numerix.zeros((0,), dtype=self._recordType)
+
+    @property
+    def mesh(self):
+        """The mesh of the variables, or `None`"""
+        if self._mesh is None and self._meshLength > 0:
+            with open(self.filename, "rb") as f:
+                f.seek(self._meshOffset)
+                self._mesh = pickle.loads(f.read(self._meshLength))
+        return self._mesh
+
+    @property
+    def times(self):
+        """The time of each step"""
+        return self.records["time"]
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, key):
+        if not isinstance(key, int):
+            key = self.names.index(key)
+        return self.records["var%d" % key]
+
+    def close(self):
+        """Release the mapping of the file"""
+        self.records = None
+
+def _test():
+    import fipy.tests.doctestPlus
+    return fipy.tests.doctestPlus.testmod()
+
+if __name__ == "__main__":
+    _test()
@@ -28,6 +28,8 @@ class TSVViewer(AbstractViewer):
         :
         :
 
+    To record the values of large meshes at many steps, a
+    :class:`~fipy.viewers.seriesViewer.SeriesViewer` is much faster.
     """
     _axis = ["x", "y", "z"]
 
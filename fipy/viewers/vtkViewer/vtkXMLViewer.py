@@ -0,0 +1,467 @@
+from __future__ import division
+from __future__ import unicode_literals
+from builtins import range
+__docformat__ = 'restructuredtext'
+
+import base64
+import os
+import re
+import struct
+
+from fipy.tools import numerix
+from fipy.variables.cellVariable import CellVariable
+from fipy.viewers.viewer import AbstractViewer
+
+__all__ = ["VTKXMLViewer"]
+from future.utils import text_to_native_str
+__all__ = [text_to_native_str(n) for n in __all__]
+
+# VTK_LINE, VTK_POLYGON, and VTK_CONVEX_POINT_SET, as for `VTKCellDataSet`
+_cellTypes = {1: 3, 2: 7, 3: 41}
+
+_types = {
+    "float64": "Float64",
+    "float32": "Float32",
+    "int64": "Int64",
+    "int32": "Int32",
+    "int16": "Int16",
+    "int8": "Int8",
+    "uint64": "UInt64",
+    "uint32": "UInt32",
+    "uint16": "UInt16",
+    "uint8": "UInt8"
+}
+
+_fileTypes = {
+    ".vtr": "RectilinearGrid",
+    ".vtu": "UnstructuredGrid"
+}
+
+class VTKXMLViewer(AbstractViewer):
+    """Writes `CellVariable` data in the XML formats of VTK, without
+    needing :term:`Mayavi` or VTK.
+
+    The values are written as binary blocks appended to the XML, so writing
+    a step costs little more than writing its arrays.  The topology of
+    the mesh is encoded once, by the first `plot()`, and the same bytes
+    are written with every step that follows.
+
+    >>> import os, shutil, tempfile
+    >>> from fipy import CellVariable, Grid2D
+    >>> directory = tempfile.mkdtemp()
+    >>> mesh = Grid2D(nx=3, ny=2, dx=0.5)
+    >>> phi = CellVariable(mesh=mesh, name="phi", value=mesh.x * mesh.y)
+    >>> viewer = VTKXMLViewer(vars=(phi, phi.grad))
+
+    A `UniformGrid` is written as a rectilinear grid, with a ".vtr"
+    extension
+
+    >>> viewer.plot(os.path.join(directory, "phi.vtr")) # doctest: +SERIAL
+    >>> data = _readVTKXML(os.path.join(directory, "phi.vtr")) # doctest: +SERIAL
+    >>> print(data["x_coordinates"], data["y_coordinates"]) # doctest: +SERIAL
+    [0.  0.5 1.  1.5] [0. 1. 2.]
+    >>> print(numerix.allclose(data["phi"], phi.value)) # doctest: +SERIAL
+    True
+    >>> print(data["phi_gauss_grad"].shape) # doctest: +SERIAL
+    (6, 3)
+
+    and any mesh can be written as an unstructured grid, with a ".vtu"
+    extension
+
+    >>> viewer.plot(os.path.join(directory, "phi.vtu")) # doctest: +SERIAL
+    >>> data = _readVTKXML(os.path.join(directory, "phi.vtu")) # doctest: +SERIAL
+    >>> print(data["offsets"], data["types"]) # doctest: +SERIAL
+    [ 4  8 12 16 20 24] [7 7 7 7 7 7]
+    >>> print(numerix.allclose(data["Points"][data["connectivity"][:4], :2].mean(axis=0),
+    ...                        mesh.cellCenters[..., 0])) # doctest: +SERIAL
+    True
+
+    Plotting to a name ending in ".pvd" writes each step to a file of
+    its own, next to it, and lists the steps, with their times, in the
+    ".pvd" collection, which ParaView_ reads as a time series
+
+    >>> for step in range(3):
+    ...     phi.setValue(mesh.x * step)
+    ...     viewer.plot(os.path.join(directory, "series.pvd"),
+    ...                 time=step * 0.1)
+    >>> with open(os.path.join(directory, "series.pvd")) as f:
+    ...     print(f.read().rstrip()) # doctest: +SERIAL
+    <?xml version="1.0"?>
+    <VTKFile type="Collection" version="0.1" byte_order="LittleEndian">
+      <Collection>
+        <DataSet timestep="0" group="" part="0" file="series_000000.vtr"/>
+        <DataSet timestep="0.1" group="" part="0" file="series_000001.vtr"/>
+        <DataSet timestep="0.2" group="" part="0" file="series_000002.vtr"/>
+      </Collection>
+    </VTKFile>
+    >>> data = _readVTKXML(os.path.join(directory, "series_000002.vtr")) # doctest: +SERIAL
+    >>> print(data["phi"]) # doctest: +SERIAL
+    [0.5 1.5 2.5 0.5 1.5 2.5]
+
+    The blocks can instead be encoded in base64, which is slower, but
+    keeps the files valid XML
+
+    >>> viewer = VTKXMLViewer(vars=phi, encoding="base64")
+    >>> viewer.plot(os.path.join(directory, "phi64.vtu")) # doctest: +SERIAL
+    >>> import xml.etree.ElementTree as ET
+    >>> root = ET.parse(os.path.join(directory, "phi64.vtu")).getroot() # doctest: +SERIAL
+    >>> print(root.get("type")) # doctest: +SERIAL
+    UnstructuredGrid
+    >>> data = _readVTKXML(os.path.join(directory, "phi64.vtu")) # doctest: +SERIAL
+    >>> print(data["phi"]) # doctest: +SERIAL
+    [0.5 1.5 2.5 0.5 1.5 2.5]
+
+    >>> shutil.rmtree(directory)
+
+    In parallel, each process writes the cells it owns to an unstructured
+    piece of its own, and the first process lists the pieces in a
+    ".pvtu" file, which is what `filename`, or the steps of a ".pvd"
+    collection, must then be.
+
+    .. _ParaView: https://www.paraview.org
+    """
+
+    def __init__(self, vars, title=None, encoding="raw"):
+        """Creates a `VTKXMLViewer`
+
+        Parameters
+        ----------
+        vars : ~fipy.variables.cellVariable.CellVariable or list
+            the `CellVariable` objects to write. Must all have the same
+            mesh.
+        title : str, optional
+            not used
+        encoding : {"raw", "base64"}
+            how the binary blocks are appended to the XML
+        """
+        AbstractViewer.__init__(self, vars=vars, title=title)
+
+        if encoding not in ("raw", "base64"):
+            raise ValueError("encoding must be 'raw' or 'base64'")
+        self.encoding = encoding
+
+        self.mesh = self.vars[0].mesh
+        self._topology = {}
+        self._steps = {}
+
+    def _getSuitableVars(self, vars):
+        if type(vars) not in [type([]), type(())]:
+            vars = [vars]
+        vars = [var for var in vars if isinstance(var, CellVariable)]
+        if len(vars) == 0:
+            raise TypeError("%s can only display CellVariable" % self.__class__.__name__)
+        return [var for var in vars if var.mesh == vars[0].mesh]
+
+    @property
+    def _isParallel(self):
+        return self.mesh.communicator.Nproc > 1
+
+    @property
+    def _isRectilinear(self):
+        from fipy.meshes.uniformGrid import UniformGrid
+
+        return isinstance(self.mesh, UniformGrid) and not self._isParallel
+
+    @property
+    def _cellIDs(self):
+        if self._isParallel:
+            return self.mesh._localNonOverlappingCellIDs
+        else:
+            return None
+
+    def _block(self, array):
+        array = numerix.ascontiguousarray(array)
+        if array.dtype.kind == "b":
+            array = array.astype("uint8")
+        elif array.dtype.name not in _types:
+            array = array.astype("float64")
+        array = array.astype(array.dtype.newbyteorder("<"), copy=False)
+
+        data = array.tobytes()
+        block = struct.pack("<Q", len(data)) + data
+        if self.encoding == "base64":
+            block = base64.b64encode(block)
+
+        return array, block
+
+    def _dataArray(self, name, array, offset, components=1, indent=8):
+        return ('%s<DataArray type="%s" Name="%s" NumberOfComponents="%d" '
+                'format="appended" offset="%d"/>\n'
+                % (" " * indent, _types[array.dtype.name], name, components, offset))
+
+    def _rectilinearTopology(self):
+        mesh = self.mesh
+        shape = tuple(mesh.shape)
+        vertexCoords = numerix.array(mesh.vertexCoords)
+
+        xml = "      <Coordinates>\n"
+        blocks = []
+        offset = 0
+        for axis, name in enumerate(("x", "y", "z")):
+            if axis < mesh.dim:
+                # vertices are numbered with x varying fastest
+                coords = numerix.reshape(vertexCoords[axis],
+                                         tuple(n + 1 for n in shape[::-1]))
+                coords = numerix.moveaxis(coords, mesh.dim - 1 - axis, -1)
+                coords = coords[(0,) * (mesh.dim - 1)]
+            else:
+                coords = numerix.zeros((1,))
+            coords, block = self._block(coords)
+            xml += self._dataArray(name + "_coordinates", coords, offset)
+            blocks.append(block)
+            offset += len(block)
+        xml += "      </Coordinates>\n"
+
+        extent = " ".join("0 %d" % (shape[axis] if axis < mesh.dim else 0)
+                          for axis in range(3))
+
+        return dict(extent=extent,
+                    piece='Extent="%s"' % extent,
+                    xml=xml,
+                    bytes=b"".join(blocks))
+
+    def _unstructuredTopology(self):
+        mesh = self.mesh
+        vertexCoords = numerix.array(mesh.vertexCoords)
+        points = numerix.concatenate((vertexCoords,
+                                      numerix.zeros((3 - mesh.dim,) + vertexCoords.shape[1:])))
+
+        cellVertexIDs = mesh._orderedCellVertexIDs
+        if self._cellIDs is not None:
+            cellVertexIDs = numerix.take(cellVertexIDs, self._cellIDs, axis=-1)
+        if isinstance(cellVertexIDs, numerix.ma.masked_array):
+            counts = cellVertexIDs.count(axis=0)
+            connectivity = cellVertexIDs.swapaxes(0, 1).compressed()
+        else:
+            counts = numerix.zeros((cellVertexIDs.shape[-1],), dtype="int64") + cellVertexIDs.shape[0]
+            connectivity = cellVertexIDs.swapaxes(0, 1).ravel()
+        numberOfCells = len(counts)
+
+        arrays = [("Points", points.swapaxes(0, 1), 3),
+                  ("connectivity", numerix.asarray(connectivity, dtype="int64"), 1),
+                  ("offsets", numerix.cumsum(counts).astype("int64"), 1),
+                  ("types", numerix.zeros((numberOfCells,), dtype="uint8") + _cellTypes[mesh.dim], 1)]
+
+        xml = ""
+        blocks = []
+        offset = 0
+        for name, array, components in arrays:
+            array, block = self._block(array)
+            line = self._dataArray(name, array, offset, components)
+            if name == "Points":
+                xml += "      <Points>\n" + line + "      </Points>\n      <Cells>\n"
+            else:
+                xml += line
+            blocks.append(block)
+            offset += len(block)
+        xml += "      </Cells>\n"
+
+        return dict(extent=None,
+                    piece='NumberOfPoints="%d" NumberOfCells="%d"' % (points.shape[-1], numberOfCells),
+                    xml=xml,
+                    bytes=b"".join(blocks))
+
+    def _getTopology(self, fileType):
+        if fileType not in self._topology:
+            if fileType == "RectilinearGrid":
+                self._topology[fileType] = self._rectilinearTopology()
+            else:
+                self._topology[fileType] = self._unstructuredTopology()
+        return self._topology[fileType]
+
+    def _cellData(self):
+        """Name, number of components and values of each variable,
+        with the cells along the first axis
+        """
+        data = []
+        for i, var in enumerate(self.vars):
+            name = var.name or "%s%d" % (var.__class__.__name__, i)
+            value = numerix.asarray(var.value)
+            if self._cellIDs is not None:
+                value = numerix.take(value, self._cellIDs, axis=-1)
+            if var.rank > 0:
+                # pad vectors and tensors out to three dimensions
+                pad = [(0, 3 - n) for n in value.shape[:-1]] + [(0, 0)]
+                value = numerix.pad(value, pad, mode="constant")
+            components = int(numerix.prod(value.shape[:-1]))
+            value = value.reshape((components, -1)).swapaxes(0, 1)
+            if components == 1:
+                value = value[..., 0]
+            data.append((name, var.rank, components, value))
+        return data
+
+    def _activeAttributes(self, data):
+        active = {}
+        for name, rank, components, value in data:
+            kind = {0: "Scalars", 1: "Vectors"}.get(rank, "Tensors")
+            active.setdefault(kind, name)
+        return "".join(' %s="%s"' % item for item in sorted(active.items()))
+
+    def _writePiece(self, filename, fileType):
+        topology = self._getTopology(fileType)
+        data = self._cellData()
+
+        xml = ""
+        blocks = [topology["bytes"]]
+        offset = len(topology["bytes"])
+        for name, rank, components, value in data:
+            value, block = self._block(value)
+            xml += self._dataArray(name, value, offset, components)
+            blocks.append(block)
+            offset += len(block)
+
+        if topology["extent"] is not None:
+            whole = ' WholeExtent="%s"' % topology["extent"]
+        else:
+            whole = ""
+
+        header = ('<?xml version="1.0"?>\n'
+                  '<VTKFile type="%(type)s" version="1.0" byte_order="LittleEndian" header_type="UInt64">\n'
+                  '  <%(type)s%(whole)s>\n'
+                  '    <Piece %(piece)s>\n'
+                  '%(topology)s'
+                  '      <CellData%(active)s>\n'
+                  '%(data)s'
+                  '      </CellData>\n'
+                  '    </Piece>\n'
+                  '  </%(type)s>\n'
+                  '  <AppendedData encoding="%(encoding)s">\n'
+                  '   _') % dict(type=fileType,
+                                 whole=whole,
+                                 piece=topology["piece"],
+                                 topology=topology["xml"],
+                                 active=self._activeAttributes(data),
+                                 data=xml,
+                                 encoding=self.encoding)
+
+        with open(filename, "wb") as f:
+            f.write(header.encode("utf-8"))
+            for block in blocks:
+                f.write(block)
+            f.write(b"\n  </AppendedData>\n</VTKFile>\n")
+
+    def _writeParallel(self, filename):
+        comm = self.mesh.communicator
+        root = os.path.splitext(filename)[0]
+        pieces = ["%s_%d.vtu" % (root, procID) for procID in range(comm.Nproc)]
+
+        self._writePiece(pieces[comm.procID], "UnstructuredGrid")
+
+        if comm.procID == 0:
+            data = self._cellData()
+            arrays = "".join('      <PDataArray type="%s" Name="%s" NumberOfComponents="%d"/>\n'
+                             % (_types.get(value.dtype.name, "Float64"), name, components)
+                             for name, rank, components, value in data)
+            with open(filename, "w") as f:
+                f.write('<?xml version="1.0"?>\n'
+                        '<VTKFile type="PUnstructuredGrid" version="1.0" byte_order="LittleEndian" header_type="UInt64">\n'
+                        '  <PUnstructuredGrid GhostLevel="0">\n'
+                        '    <PPoints>\n'
+                        '      <PDataArray type="Float64" NumberOfComponents="3"/>\n'
+                        '    </PPoints>\n'
+                        '    <PCellData%s>\n'
+                        '%s'
+                        '    </PCellData>\n' % (self._activeAttributes(data), arrays))
+                for piece in pieces:
+                    f.write('    <Piece Source="%s"/>\n' % os.path.basename(piece))
+                f.write('  </PUnstructuredGrid>\n'
+                        '</VTKFile>\n')
+
+    def _writeStep(self, filename):
+        extension = os.path.splitext(filename)[1].lower()
+        if self._isParallel:
+            if extension != ".pvtu":
+                raise ValueError("in parallel, %s must be written to a '.pvtu' file" % self.__class__.__name__)
+            self._writeParallel(filename)
+        elif extension not in _fileTypes:
+            raise ValueError("%s can only write '.vtu', '.vtr', '.pvtu', and '.pvd' files"
+                             % self.__class__.__name__)
+        elif extension == ".vtr" and not self._isRectilinear:
+            raise ValueError("only a UniformGrid can be written to a '.vtr' file")
+        else:
+            self._writePiece(filename, _fileTypes[extension])
+
+    def _writeCollection(self, filename, time):
+        steps = self._steps.setdefault(filename, [])
+        if self._isParallel:
+            extension = ".pvtu"
+        elif self._isRectilinear:
+            extension = ".vtr"
+        else:
+            extension = ".vtu"
+        step = "%s_%06d%s" % (os.path.splitext(filename)[0], len(steps), extension)
+
+        self._writeStep(step)
+
+        if time is None:
+            time = len(steps)
+        steps.append((time, os.path.basename(step)))
+
+        if self.mesh.communicator.procID == 0:
+            with open(filename, "w") as f:
+                f.write('<?xml version="1.0"?>\n'
+                        '<VTKFile type="Collection" version="0.1" byte_order="LittleEndian">\n'
+                        '  <Collection>\n')
+                for time, step in steps:
+                    f.write('    <DataSet timestep="%.15g" group="" part="0" file="%s"/>\n'
+                            % (time, step))
+                f.write('  </Collection>\n'
+                        '</VTKFile>\n')
+
+    def plot(self, filename=None, time=None):
+        """Write the variables to `filename`
+
+        Parameters
+        ----------
+        filename : str
+            Name of a ".vtu", ".vtr", or ".pvtu" file to write, or of a
+            ".pvd" collection to add a step to.
+        time : float, optional
+            Time of the step added to a ".pvd" collection. By default,
+            the number of the step.
+        """
+        if filename is None:
+            raise ValueError("%s needs a filename to write to" % self.__class__.__name__)
+
+        if os.path.splitext(filename)[1].lower() == ".pvd":
+            self._writeCollection(filename, time)
+        else:
+            self._writeStep(filename)
+
+def _readVTKXML(filename):
+    """The arrays of a file written by `VTKXMLViewer`, by name"""
+    with open(filename, "rb") as f:
+        content = f.read()
+
+    start = content.index(b"<AppendedData")
+    header = content[:start].decode("utf-8")
+    encoding = re.search(r'encoding="(\w+)"', content[start:start + 100].decode("latin-1")).group(1)
+    appended = content[content.index(b"_", start) + 1:]
+
+    types = dict((vtk, name) for name, vtk in _types.items())
+    arrays = {}
+    for element in re.findall(r"<DataArray ([^>]*)/>", header):
+        attributes = dict(re.findall(r'(\w+)="([^"]*)"', element))
+        offset = int(attributes["offset"])
+        if encoding == "base64":
+            # each block is encoded on its own
+            size, = struct.unpack("<Q", base64.b64decode(appended[offset:offset + 12])[:8])
+            block = base64.b64decode(appended[offset:offset + 4 * ((8 + size + 2) // 3)])[8:]
+        else:
+            size, = struct.unpack("<Q", appended[offset:offset + 8])
+            block = appended[offset + 8:offset + 8 + size]
+        dtype = numerix.dtype(types[attributes["type"]]).newbyteorder("<")
+        array = numerix.frombuffer(block, dtype=dtype)
+        components = int(attributes["NumberOfComponents"])
+        if components > 1:
+            array = array.reshape((-1, components))
+        arrays[attributes["Name"]] = array
+
+    return arrays
+
+def _test():
+    import fipy.tests.doctestPlus
+    return fipy.tests.doctestPlus.testmod()
+
+if __name__ == "__main__":
+    _test()